@@ -4,133 +4,421 @@
 Backend Flask para o sistema de busca de novelas/minisséries da Globo
 """
 
-from flask import Flask, request, jsonify, send_from_directory
-import sqlite3
+from flask import Flask, request, jsonify, g, make_response, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from functools import wraps
+import gzip
 import os
+import time
+
+from autocomplete import IndiceAutocomplete
+from busca_aproximada import IndiceAproximado
+from cache_respostas import CacheRespostas, EntradaCache
+from coalescencia import ChamadaUnica
+from compressao import (
+    AtivoEstatico, aceita, calcular_etag, comprimir, compressivel, etag_variante, negociar
+)
+from conexoes import PoolConexoes
+from consultas import (
+    ParametroInvalido, ProducaoNaoEncontrada, buscar_atores, buscar_lote, buscar_producoes,
+    buscar_titulos, chave_busca, contar_totais, elenco_producao
+)
+from elencos import CacheElencos
+from exportacao import FORMATOS, gerar_exportacao
+from filmografias import filmografia_exata
+from grafo import AtorNaoEncontrado, GrafoElenco
+from indice_binario import IndiceBinario
+from metricas import encerrar_medicao, iniciar_medicao, registro, somar_fase
+
+class JSONMedido(DefaultJSONProvider):
+    """Serialização do jsonify, contada na fase 'json' da requisição"""
+
+    def dumps(self, obj, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            somar_fase('json', time.perf_counter() - inicio)
 
 app = Flask(__name__)
+app.json = JSONMedido(app)
+
+DB_PATH = os.environ.get('NOVELAS_DB', 'novelas_globo.db')
+
+# Página principal na memória, já comprimida; o navegador reusa por 10 min e
+# depois revalida pelo ETag (em segundo plano por até um dia)
+pagina_inicial = AtivoEstatico(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.html'),
+    'text/html', 'public, max-age=600, stale-while-revalidate=86400'
+)
+
+# O índice de nomes do autocomplete só muda com o banco: mesmo cache da página
+CACHE_INDICE_ATORES = 'public, max-age=600, stale-while-revalidate=86400'
+
+# Conexões de leitura reaproveitadas entre requisições (com NOVELAS_MEMORIA=1,
+# a uma cópia do banco em memória, ver conexoes.py)
+pool_conexoes = PoolConexoes(DB_PATH)
+
+# Respostas JSON prontas de /api/buscar e /api/estatisticas
+cache_respostas = CacheRespostas(DB_PATH)
+
+# Consultas idênticas simultâneas (faltas do cache, autocomplete) rodam uma vez só
+chamadas_em_andamento = ChamadaUnica()
+
+# Elencos inteiros das produções grandes, paginados na memória
+cache_elencos = CacheElencos(DB_PATH)
+
+# Autocomplete em memória, carregado na inicialização e recarregado se o banco mudar
+indice_autocomplete = IndiceAutocomplete(DB_PATH)
+# Grafo ator-produção para coestrelas e graus de separação, idem
+grafo_elenco = GrafoElenco(DB_PATH)
+
+# Índice binário mapeado (indice_binario.py) para os nomes exatos do lote;
+# sem o arquivo, ou se ele for de outra versão do banco, o lote usa o SQL
+indice_binario = IndiceBinario(DB_PATH)
+
+# Trigramas dos nomes para sugerir grafias próximas quando a busca não acha nada
+indice_aproximado = IndiceAproximado(DB_PATH)
+if os.path.exists(DB_PATH):
+    pool_conexoes.iniciar()
+    indice_autocomplete.carregar()
+    grafo_elenco.carregar()
+    indice_aproximado.carregar()
 
 def get_db_connection():
-    """Cria conexão com o banco de dados"""
-    conn = sqlite3.connect('novelas_globo.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """
+    Conexão de leitura da requisição atual, emprestada do pool.
+    É devolvida automaticamente no fim da requisição (não chame close).
+    """
+    if 'db' not in g:
+        g.db = pool_conexoes.obter()
+    return g.db
+
+@app.teardown_appcontext
+def devolver_conexao(exc):
+    """Devolve ao pool a conexão usada pela requisição"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        pool_conexoes.devolver(conn)
+
+@app.before_request
+def iniciar_medicao_requisicao():
+    g.token_medicao = iniciar_medicao()
+
+@app.after_request
+def guardar_status(resposta):
+    g.status_resposta = resposta.status_code
+    return resposta
+
+@app.teardown_request
+def encerrar_medicao_requisicao(exc):
+    """Registra as métricas da requisição (no fim do streaming, se houver)"""
+    token = g.pop('token_medicao', None)
+    if token is not None:
+        rota = request.url_rule.rule if request.url_rule else 'desconhecida'
+        encerrar_medicao(token, rota, 500 if exc else g.get('status_resposta', 500))
+
+def codificar(resposta, codificacao):
+    """Marca a codificação do corpo e que a resposta depende do Accept-Encoding"""
+    if codificacao:
+        resposta.headers['Content-Encoding'] = codificacao
+    resposta.vary.add('Accept-Encoding')
+
+def responder_entrada(entrada):
+    """
+    Monta a resposta de uma EntradaCache na melhor codificação aceita pelo
+    cliente (comprimida uma vez só por entrada), com 304 se ele já tem o ETag
+    """
+    corpo, codificacao, etag = entrada.variante(negociar(request.headers.get('Accept-Encoding')))
+    resposta = Response(corpo, mimetype=entrada.mimetype)
+    codificar(resposta, codificacao)
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta.make_conditional(request)
+
+@app.after_request
+def finalizar_resposta(resposta):
+    """
+    Respostas 200 que as rotas não codificaram: ETag e Cache-Control: no-cache
+    nos GET (o cliente revalida e recebe 304), e compressão na melhor
+    codificação aceita quando o corpo passa de LIMITE_COMPRESSAO.
+    Streaming e arquivos passam direto.
+    """
+    if resposta.status_code != 200 or resposta.is_streamed or resposta.direct_passthrough \
+            or 'Content-Encoding' in resposta.headers:
+        return resposta
+    
+    corpo = resposta.get_data()
+    etag = None
+    if request.method in ('GET', 'HEAD'):
+        etag = resposta.get_etag()[0] or calcular_etag(corpo)
+        resposta.headers.setdefault('Cache-Control', 'no-cache')
+    
+    codificacao = None
+    if compressivel(resposta.mimetype, len(corpo)):
+        codificacao = negociar(request.headers.get('Accept-Encoding'))
+        if codificacao:
+            resposta.set_data(comprimir(corpo, codificacao))
+        codificar(resposta, codificacao)
+    
+    if etag:
+        resposta.set_etag(etag_variante(etag, codificacao))
+        resposta.make_conditional(request)
+    return resposta
+
+def em_cache(funcao_chave):
+    """
+    Cacheia as respostas 200 da rota pela chave de `funcao_chave()` (calculada
+    a partir da consulta normalizada). Um acerto devolve os bytes guardados
+    sem consultar o SQLite nem serializar JSON; se o If-None-Match do cliente
+    bate com o ETag, a resposta é um 304 sem corpo. Faltas simultâneas da
+    mesma chave executam a view uma vez só.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            chave = funcao_chave()
+            entrada = cache_respostas.obter(chave)
+            if entrada is None:
+                def gerar():
+                    versao = cache_respostas.versao()
+                    resposta = make_response(view(*args, **kwargs))
+                    if resposta.status_code != 200:
+                        # Cada requisição monta a própria Response (os hooks a alteram)
+                        return resposta.get_data(), resposta.status_code, resposta.mimetype
+                    return cache_respostas.guardar(chave, resposta.get_data(), resposta.mimetype, versao)
+
+                entrada = chamadas_em_andamento.executar(chave, gerar)
+                if not isinstance(entrada, EntradaCache):
+                    corpo, status, mimetype = entrada
+                    return Response(corpo, status, mimetype=mimetype)
+            return responder_entrada(entrada)
+        return wrapper
+    return decorador
 
 @app.route('/')
 def index():
-    """Serve a página principal"""
-    return send_from_directory('.', 'index.html')
+    """Serve a página principal (pré-comprimida em gzip/brotli)"""
+    corpo, codificacao, etag, modificado_em = pagina_inicial.obter(request.headers.get('Accept-Encoding'))
+    resposta = Response(corpo, mimetype=pagina_inicial.mimetype)
+    codificar(resposta, codificacao)
+    resposta.set_etag(etag)
+    resposta.last_modified = modificado_em
+    resposta.headers['Cache-Control'] = pagina_inicial.cache_control
+    return resposta.make_conditional(request)
 
 @app.route('/api/buscar', methods=['GET'])
 def buscar_ator():
     """
-    Busca produções por nome do ator
-    Parâmetros: nome (query string)
-    """
-    nome = request.args.get('nome', '').strip()
-    
-    if not nome or len(nome) < 2:
-        return jsonify({
-            'erro': 'Digite pelo menos 2 caracteres para buscar'
-        }), 400
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Busca com LIKE para permitir busca parcial
-    query = '''
-        SELECT 
-            a.nome as ator,
-            p.titulo,
-            p.tipo,
-            p.ano_inicio,
-            p.ano_fim,
-            e.personagem
-        FROM atores a
-        JOIN elenco e ON a.id = e.ator_id
-        JOIN producoes p ON e.producao_id = p.id
-        WHERE a.nome LIKE ?
-        ORDER BY p.ano_inicio DESC, p.titulo
-    '''
-    
-    cursor.execute(query, (f'%{nome}%',))
-    resultados = cursor.fetchall()
-    conn.close()
-    
-    if not resultados:
-        return jsonify({
-            'ator': nome,
-            'total': 0,
-            'producoes': []
-        })
-    
-    # Organiza os resultados
-    ator_nome = resultados[0]['ator']
-    producoes = []
-    
-    for row in resultados:
-        anos = f"{row['ano_inicio']}"
-        if row['ano_fim'] and row['ano_fim'] != row['ano_inicio']:
-            anos += f"-{row['ano_fim']}"
-        
-        producoes.append({
-            'titulo': row['titulo'],
-            'tipo': row['tipo'],
-            'anos': anos,
-            'personagem': row['personagem'] or 'Não especificado'
-        })
-    
-    return jsonify({
-        'ator': ator_nome,
-        'total': len(producoes),
-        'producoes': producoes
-    })
+    Busca produções por nome do ator, agrupadas por ator
+    Parâmetros: nome, limite (opcional, máx. 100 produções por página) e
+    cursor (opcional, o proximo_cursor da página anterior). Sem resultados,
+    a resposta traz 'sugestoes' com nomes de grafia parecida.
+    Com exato=1, devolve a filmografia completa de quem tem exatamente esse
+    nome (sem diferenciar acentos/caixa), ou 404
+    """
+    if request.args.get('exato') == '1':
+        return buscar_ator_exato()
+    return buscar_ator_substring()
+
+@em_cache(lambda: chave_busca(
+    request.args.get('nome'), request.args.get('cursor'), request.args.get('limite')
+))
+def buscar_ator_substring():
+    try:
+        resultado = buscar_producoes(
+            get_db_connection(), request.args.get('nome', ''),
+            request.args.get('cursor'), request.args.get('limite'),
+            indice_aproximado
+        )
+    except ParametroInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    return jsonify(resultado)
+
+def buscar_ator_exato():
+    """
+    Uma leitura da tabela filmografias: o corpo gzip vai como está (ou
+    descomprimido, se o cliente não aceita gzip), sem consultar o elenco
+    nem serializar JSON
+    """
+    corpo = filmografia_exata(get_db_connection(), request.args.get('nome', ''))
+    if corpo is None:
+        return jsonify({'erro': 'Ator não encontrado'}), 404
+    
+    if not aceita(request.headers.get('Accept-Encoding'), 'gzip'):
+        # ETag e outra codificação, se houver, ficam com finalizar_resposta
+        return Response(gzip.decompress(corpo), mimetype='application/json')
+    
+    resposta = Response(corpo, mimetype='application/json')
+    codificar(resposta, 'gzip')
+    resposta.set_etag(etag_variante(calcular_etag(corpo), 'gzip'))
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta.make_conditional(request)
+
+@app.route('/api/buscar/lote', methods=['POST'])
+def buscar_lote_atores():
+    """
+    Busca de uma vez as produções de uma lista de nomes exatos
+    Corpo: {"nomes": ["LIMA DUARTE", "Regina Duarte", ...]} (máx. 1000);
+    a resposta traz um resultado por nome, inclusive os não encontrados
+    """
+    corpo = request.get_json(silent=True) or {}
+    nomes = corpo.get('nomes') if isinstance(corpo, dict) else None
+    
+    try:
+        resultado = indice_binario.buscar_lote(nomes)
+        if resultado is None:
+            resultado = buscar_lote(get_db_connection(), nomes)
+    except ParametroInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    return jsonify(resultado)
 
 @app.route('/api/atores', methods=['GET'])
 def listar_atores():
     """Lista todos os atores para autocomplete"""
     termo = request.args.get('termo', '').strip()
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    # Prefixo de nome/sobrenome sai do índice em memória, sem tocar no SQLite
     if termo and len(termo) >= 2:
-        cursor.execute('''
-            SELECT nome FROM atores 
-            WHERE nome LIKE ?
-            ORDER BY nome
-            LIMIT 20
-        ''', (f'%{termo}%',))
-    else:
-        cursor.execute('SELECT nome FROM atores ORDER BY nome LIMIT 20')
-    
-    atores = [row['nome'] for row in cursor.fetchall()]
-    conn.close()
+        atores = indice_autocomplete.sugerir(termo)
+        if atores:
+            return jsonify(atores)
     
-    return jsonify(atores)
+    # Sem prefixo correspondente: busca por substring no meio das palavras,
+    # uma vez só para as requisições simultâneas com o mesmo termo
+    try:
+        return jsonify(chamadas_em_andamento.executar(
+            ('atores', termo), lambda: buscar_atores(get_db_connection(), termo)
+        ))
+    except ParametroInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+
+@app.route('/api/atores/indice', methods=['GET'])
+def indice_atores():
+    """
+    Índice de nomes para o autocomplete no navegador (ver
+    IndiceAutocomplete.exportar), pré-comprimido; revalidado pelo ETag
+    """
+    resposta = responder_entrada(indice_autocomplete.exportar())
+    resposta.headers['Cache-Control'] = CACHE_INDICE_ATORES
+    return resposta
 
 @app.route('/api/estatisticas', methods=['GET'])
+@em_cache(lambda: ('estatisticas',))
 def estatisticas():
     """Retorna estatísticas gerais do banco"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    return jsonify(contar_totais(get_db_connection()))
+
+@app.route('/api/producoes', methods=['GET'])
+@em_cache(lambda: ('producoes', request.args.get('titulo', '').strip()))
+def buscar_producoes_titulo():
+    """
+    Busca produções pelo título (substring, sem diferenciar acentos/caixa)
+    Parâmetro: titulo (mín. 2 caracteres); até 50 produções, com o tamanho
+    do elenco de cada uma
+    """
+    try:
+        return jsonify(buscar_titulos(get_db_connection(), request.args.get('titulo', '')))
+    except ParametroInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+
+@app.route('/api/producao/<int:producao_id>', methods=['GET'])
+def elenco(producao_id):
+    """
+    Dados e elenco de uma produção, em ordem de nome do ator
+    Parâmetros: limite (opcional, máx. 100 atores por página) e cursor
+    (opcional, o proximo_cursor da página anterior)
+    """
+    try:
+        resultado = elenco_producao(
+            get_db_connection(), producao_id,
+            request.args.get('cursor'), request.args.get('limite'),
+            cache_elencos
+        )
+    except ParametroInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    except ProducaoNaoEncontrada as e:
+        return jsonify({'erro': str(e)}), 404
     
-    cursor.execute('SELECT COUNT(*) as total FROM atores')
-    total_atores = cursor.fetchone()['total']
+    return jsonify(resultado)
+
+@app.route('/api/coestrelas', methods=['GET'])
+def coestrelas():
+    """
+    Atores que trabalharam com o ator informado, por produções em comum
+    Parâmetros: nome (exato, sem diferenciar acentos/caixa) e limite (máx. 100)
+    """
+    try:
+        limite = int(request.args.get('limite') or 20)
+    except ValueError:
+        return jsonify({'erro': 'Limite inválido'}), 400
+    if limite < 1:
+        return jsonify({'erro': 'Limite inválido'}), 400
     
-    cursor.execute('SELECT COUNT(*) as total FROM producoes')
-    total_producoes = cursor.fetchone()['total']
+    try:
+        return jsonify(grafo_elenco.coestrelas(request.args.get('nome', ''), limite))
+    except AtorNaoEncontrado as e:
+        return jsonify({'erro': str(e)}), 404
+
+@app.route('/api/caminho', methods=['GET'])
+def caminho():
+    """
+    Menor caminho de coestrelas entre dois atores (graus de separação)
+    Parâmetros: de, para (nomes exatos, sem diferenciar acentos/caixa)
+    """
+    try:
+        return jsonify(grafo_elenco.caminho(request.args.get('de', ''), request.args.get('para', '')))
+    except AtorNaoEncontrado as e:
+        return jsonify({'erro': str(e)}), 404
+
+@app.route('/api/exportar', methods=['GET'])
+def exportar():
+    """
+    Exporta todo o mapeamento ator -> produção em streaming
+    Parâmetros: formato (ndjson ou csv), tipo, ano_de, ano_ate (filtram
+    pelo ano_inicio da produção) e gzip=1 para comprimir o fluxo
+    """
+    formato = request.args.get('formato', 'ndjson')
+    if formato not in FORMATOS:
+        return jsonify({'erro': f"Formato inválido (use {' ou '.join(FORMATOS)})"}), 400
+    
+    try:
+        ano_de, ano_ate = (
+            int(request.args[campo]) if request.args.get(campo) else None
+            for campo in ('ano_de', 'ano_ate')
+        )
+    except ValueError:
+        return jsonify({'erro': 'Ano inválido'}), 400
     
-    conn.close()
+    em_gzip = request.args.get('gzip') == '1'
     
-    return jsonify({
-        'total_atores': total_atores,
-        'total_producoes': total_producoes
-    })
+    gerador = gerar_exportacao(
+        DB_PATH, formato, em_gzip, pool_conexoes.abrir,
+        tipo=request.args.get('tipo') or None, ano_de=ano_de, ano_ate=ano_ate
+    )
+    
+    resposta = Response(stream_with_context(gerador), mimetype=FORMATOS[formato])
+    resposta.headers['Content-Disposition'] = f'attachment; filename=elenco.{formato}'
+    if em_gzip:
+        resposta.headers['Content-Encoding'] = 'gzip'
+    return resposta
+
+@app.route('/metrics', methods=['GET'])
+def metricas():
+    """Métricas de requisições, consultas e cache no formato do Prometheus"""
+    registro.definir('novelas_cache_respostas_acertos_total', cache_respostas.acertos)
+    registro.definir('novelas_cache_respostas_faltas_total', cache_respostas.faltas)
+    registro.definir('novelas_cache_elencos_acertos_total', cache_elencos.acertos)
+    registro.definir('novelas_cache_elencos_faltas_total', cache_elencos.faltas)
+    resposta = Response(registro.exportar(), mimetype='text/plain; version=0.0.4')
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
 
 if __name__ == '__main__':
     # Verifica se o banco existe
-    if not os.path.exists('novelas_globo.db'):
+    if not os.path.exists(DB_PATH):
         print("ERRO: Banco de dados não encontrado!")
         print("Execute primeiro: python criar_banco.py")
         exit(1)
@@ -139,6 +427,7 @@ if __name__ == '__main__':
     print("SERVIDOR INICIADO!")
     print("="*60)
     print("Acesse: http://localhost:5000")
+    print("Modo de desenvolvimento; em produção use: python servidor.py")
     print("="*60)
     
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+App ASGI com a página principal e as rotas de consulta (/api/buscar,
+/api/atores, /api/atores/indice, /api/estatisticas) e /metrics
+
+O sqlite3 é bloqueante: cada consulta roda num ThreadPoolExecutor de tamanho
+fixo, com uma conexão do pool, e o loop de eventos fica livre para aceitar
+conexões e responder acertos de cache e do autocomplete sem esperar o banco.
+Quando há consultas demais na fila (MAXIMO_EM_ESPERA por thread), a resposta
+é 503 com Retry-After em vez de acumular requisições sem limite.
+
+Sem framework: qualquer servidor ASGI serve `app`, por exemplo
+    uvicorn asgi:app --workers 4
+ou python servidor.py --asgi. A exportação e as demais rotas continuam no
+app Flask (app.py).
+"""
+
+import asyncio
+import contextvars
+import gzip
+import json
+import os
+import threading
+import time
+from email.utils import formatdate
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from autocomplete import IndiceAutocomplete
+from busca_aproximada import IndiceAproximado
+from cache_respostas import CacheRespostas
+from coalescencia import ChamadaUnicaAsync
+from compressao import (
+    AtivoEstatico, aceita, calcular_etag, comprimir, compressivel, etag_variante, negociar
+)
+from conexoes import PoolConexoes
+from consultas import (
+    ParametroInvalido, buscar_atores, buscar_producoes, chave_busca, contar_totais
+)
+from filmografias import filmografia_exata
+from metricas import encerrar_medicao, iniciar_medicao, registro, somar_fase
+
+DB_PATH = os.environ.get('NOVELAS_DB', 'novelas_globo.db')
+
+# Threads de consulta ao SQLite por processo
+THREADS = int(os.environ.get('NOVELAS_THREADS', 8))
+
+# Consultas aguardando thread, por thread, antes de responder 503
+MAXIMO_EM_ESPERA = 8
+
+TIPO_JSON = b'application/json'
+TIPO_HTML = b'text/html'
+TIPO_METRICAS = b'text/plain; version=0.0.4'
+
+CACHE_INDICE_ATORES = b'public, max-age=600, stale-while-revalidate=86400'
+
+PAGINA_INICIAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.html')
+
+class Resposta:
+    """Status, corpo e cabeçalhos extras de uma resposta HTTP"""
+    __slots__ = ('status', 'corpo', 'tipo', 'cabecalhos')
+
+    def __init__(self, status, corpo, tipo=TIPO_JSON, cabecalhos=()):
+        self.status = status
+        self.corpo = corpo
+        self.tipo = tipo
+        self.cabecalhos = list(cabecalhos)
+
+def _json(dados, status=200):
+    # Mesma serialização do jsonify do Flask: corpo (e ETag) idênticos nos dois apps
+    inicio = time.perf_counter()
+    corpo = json.dumps(dados, sort_keys=True, separators=(',', ':')).encode('utf-8') + b'\n'
+    somar_fase('json', time.perf_counter() - inicio)
+    return Resposta(status, corpo)
+
+def _erro(mensagem, status=400, cabecalhos=()):
+    resposta = _json({'erro': mensagem}, status)
+    resposta.cabecalhos.extend(cabecalhos)
+    return resposta
+
+def _codificar(resposta, codificacao):
+    """Marca a codificação do corpo e que a resposta depende do Accept-Encoding"""
+    if codificacao:
+        resposta.cabecalhos.append((b'content-encoding', codificacao.encode('ascii')))
+    resposta.cabecalhos.append((b'vary', b'Accept-Encoding'))
+
+def _condicional(resposta, etag, cabecalhos):
+    """Acrescenta o ETag e responde 304 (sem corpo) se o cliente já tem essa versão"""
+    etag = f'"{etag}"'.encode('ascii')
+    resposta.cabecalhos.append((b'etag', etag))
+    if etag not in cabecalhos.get(b'if-none-match', b'').replace(b'W/', b'').split(b', '):
+        return resposta
+    return Resposta(304, b'', cabecalhos=[
+        (nome, valor) for nome, valor in resposta.cabecalhos if nome != b'content-encoding'
+    ])
+
+class SobrecargaConsultas(Exception):
+    """A fila de consultas do executor está cheia"""
+
+class AppConsultas:
+    """
+    Aplicação ASGI. O executor é criado no startup do lifespan (ou na primeira
+    requisição, em servidores sem lifespan) e encerrado no shutdown, depois
+    que as consultas em andamento terminam.
+    """
+
+    def __init__(self, db_path, threads=THREADS, maximo_em_espera=MAXIMO_EM_ESPERA):
+        self.db_path = db_path
+        self.threads = threads
+        self.maximo_pendentes = threads * (1 + maximo_em_espera)
+        self.pool = PoolConexoes(db_path, tamanho=threads)
+        self.cache = CacheRespostas(db_path)
+        self.chamadas = ChamadaUnicaAsync()
+        self.autocomplete = IndiceAutocomplete(db_path)
+        self.aproximado = IndiceAproximado(db_path)
+        self.pagina = AtivoEstatico(
+            PAGINA_INICIAL, TIPO_HTML, b'public, max-age=600, stale-while-revalidate=86400'
+        )
+        self.executor = None
+        self._lock_inicio = threading.Lock()
+        self.pendentes = 0
+        self.rotas = {
+            '/': self._pagina_inicial,
+            '/api/buscar': self._buscar,
+            '/api/atores': self._atores,
+            '/api/atores/indice': self._indice_atores,
+            '/api/estatisticas': self._estatisticas,
+            '/metrics': self._metricas,
+        }
+
+    def iniciar(self):
+        with self._lock_inicio:
+            if self.executor is not None:
+                return
+            executor = ThreadPoolExecutor(self.threads, thread_name_prefix='consulta')
+            if os.path.exists(self.db_path):
+                self.pool.iniciar()
+                self.autocomplete.carregar()
+                self.aproximado.carregar()
+            # O autocomplete responde no loop: recargas vão para o executor
+            self.autocomplete.executor = executor
+            self.executor = executor
+
+    def encerrar(self):
+        with self._lock_inicio:
+            if self.executor is not None:
+                self.autocomplete.executor = None
+                self.executor.shutdown(wait=True)
+                self.executor = None
+            self.pool.fechar()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, send)
+
+    async def _ciclo_de_vida(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                await loop.run_in_executor(None, self.iniciar)
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                await loop.run_in_executor(None, self.encerrar)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, send):
+        rota = self.rotas.get(scope['path'])
+        token = iniciar_medicao()
+        status = 500
+        try:
+            status = await self._responder(rota, scope, send)
+        finally:
+            encerrar_medicao(token, scope['path'] if rota else 'desconhecida', status)
+
+    async def _responder(self, rota, scope, send):
+        if rota is None:
+            resposta = _erro('Rota não encontrada', 404)
+        elif scope['method'] not in ('GET', 'HEAD'):
+            resposta = _erro('Método não permitido', 405, [(b'allow', b'GET, HEAD')])
+        else:
+            if self.executor is None:
+                # Servidores sem lifespan: a carga inicial também fica fora do loop
+                await asyncio.get_running_loop().run_in_executor(None, self.iniciar)
+            parametros = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+            cabecalhos = dict(scope.get('headers', ()))
+            try:
+                resposta = self._finalizar(await rota(parametros, cabecalhos), scope['method'], cabecalhos)
+            except ParametroInvalido as e:
+                resposta = _erro(str(e))
+            except SobrecargaConsultas:
+                resposta = _erro('Servidor ocupado, tente novamente', 503, [(b'retry-after', b'1')])
+
+        cabecalhos = resposta.cabecalhos
+        if resposta.status != 304:
+            cabecalhos = [
+                (b'content-type', resposta.tipo + b'; charset=utf-8'),
+                (b'content-length', str(len(resposta.corpo)).encode('ascii')),
+            ] + cabecalhos
+        await send({'type': 'http.response.start', 'status': resposta.status, 'headers': cabecalhos})
+        corpo = b'' if scope['method'] == 'HEAD' else resposta.corpo
+        await send({'type': 'http.response.body', 'body': corpo})
+        return resposta.status
+
+    def _finalizar(self, resposta, metodo, cabecalhos):
+        """
+        Como app.finalizar_resposta: nas respostas 200 que a rota não
+        codificou, ETag e no-cache nos GET e compressão acima do limite
+        """
+        if resposta.status != 200 or any(nome in (b'etag', b'content-encoding') for nome, _ in resposta.cabecalhos):
+            return resposta
+
+        mimetype = resposta.tipo.split(b';')[0].decode('ascii')
+        if compressivel(mimetype, len(resposta.corpo)):
+            etag = calcular_etag(resposta.corpo)
+            codificacao = negociar(cabecalhos.get(b'accept-encoding', b'').decode('latin-1'))
+            if codificacao:
+                resposta.corpo = comprimir(resposta.corpo, codificacao)
+            _codificar(resposta, codificacao)
+        else:
+            etag, codificacao = calcular_etag(resposta.corpo), None
+
+        if metodo not in ('GET', 'HEAD'):
+            return resposta
+        if not any(nome == b'cache-control' for nome, _ in resposta.cabecalhos):
+            resposta.cabecalhos.append((b'cache-control', b'no-cache'))
+        return _condicional(resposta, etag_variante(etag, codificacao), cabecalhos)
+
+    async def _consultar(self, funcao, *args):
+        """Executa funcao(conn, *args) numa thread do executor e serializa o resultado"""
+        return await self._na_thread(lambda conn: _json(funcao(conn, *args)))
+
+    async def _na_thread(self, funcao):
+        """Executa funcao(conn) numa thread do executor, com uma conexão do pool"""
+        if self.pendentes >= self.maximo_pendentes:
+            raise SobrecargaConsultas()
+
+        def executar():
+            conn = self.pool.obter()
+            try:
+                return funcao(conn)
+            finally:
+                self.pool.devolver(conn)
+
+        # O contexto leva a medição da requisição para a thread do executor
+        contexto = contextvars.copy_context()
+        self.pendentes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, contexto.run, executar)
+        finally:
+            self.pendentes -= 1
+
+    async def _em_dia(self, indice):
+        """Sem snapshot ou com o banco mudado, (re)carrega o índice numa thread do executor"""
+        if indice.desatualizado():
+            await asyncio.get_running_loop().run_in_executor(self.executor, indice.atual)
+
+    async def _em_cache(self, chave, cabecalhos, funcao, *args):
+        """
+        Como app.em_cache: corpo pronto do cache, com 304 se o ETag bate;
+        faltas simultâneas da mesma chave consultam o banco uma vez só
+        """
+        entrada = self.cache.obter(chave)
+        if entrada is None:
+            async def gerar():
+                versao = self.cache.versao()
+                resposta = await self._consultar(funcao, *args)
+                return self.cache.guardar(chave, resposta.corpo, versao=versao)
+
+            entrada = await self.chamadas.executar(chave, gerar)
+
+        corpo, codificacao, etag = entrada.variante(
+            negociar(cabecalhos.get(b'accept-encoding', b'').decode('latin-1'))
+        )
+        resposta = Resposta(200, corpo)
+        _codificar(resposta, codificacao)
+        resposta.cabecalhos.append((b'cache-control', b'no-cache'))
+        return _condicional(resposta, etag, cabecalhos)
+
+    async def _buscar(self, parametros, cabecalhos):
+        if parametros.get('exato') == '1':
+            return await self._buscar_exato(parametros.get('nome', ''), cabecalhos)
+        nome, cursor, limite = (parametros.get(campo) for campo in ('nome', 'cursor', 'limite'))
+        return await self._em_cache(
+            chave_busca(nome, cursor, limite), cabecalhos,
+            buscar_producoes, nome, cursor, limite, self.aproximado
+        )
+
+    async def _buscar_exato(self, nome, cabecalhos):
+        """Como app.buscar_ator_exato: o corpo gzip materializado, sem reserializar"""
+        corpo = await self._na_thread(lambda conn: filmografia_exata(conn, nome))
+        if corpo is None:
+            return _erro('Ator não encontrado', 404)
+
+        if not aceita(cabecalhos.get(b'accept-encoding', b'').decode('latin-1'), 'gzip'):
+            return Resposta(200, gzip.decompress(corpo))
+
+        resposta = Resposta(200, corpo)
+        _codificar(resposta, 'gzip')
+        resposta.cabecalhos.append((b'cache-control', b'no-cache'))
+        return _condicional(resposta, etag_variante(calcular_etag(corpo), 'gzip'), cabecalhos)
+
+    async def _pagina_inicial(self, parametros, cabecalhos):
+        """Como app.index: a página pré-comprimida na memória"""
+        corpo, codificacao, etag, modificado_em = self.pagina.obter(
+            cabecalhos.get(b'accept-encoding', b'').decode('latin-1')
+        )
+        resposta = Resposta(200, corpo, self.pagina.mimetype)
+        _codificar(resposta, codificacao)
+        resposta.cabecalhos.append((b'cache-control', self.pagina.cache_control))
+        resposta.cabecalhos.append((b'last-modified', formatdate(modificado_em, usegmt=True).encode('ascii')))
+        return _condicional(resposta, etag, cabecalhos)
+
+    async def _atores(self, parametros, cabecalhos):
+        termo = parametros.get('termo', '').strip()
+        if termo and len(termo) >= 2:
+            await self._em_dia(self.autocomplete)
+            atores = self.autocomplete.sugerir(termo)
+            if atores:
+                return _json(atores)
+        resposta = await self.chamadas.executar(('atores', termo), lambda: self._consultar(buscar_atores, termo))
+        # Cópia por requisição: _finalizar acrescenta cabeçalhos e comprime o corpo
+        return Resposta(resposta.status, resposta.corpo)
+
+    async def _indice_atores(self, parametros, cabecalhos):
+        """Como app.indice_atores: o índice de nomes pré-comprimido do autocomplete"""
+        # A primeira exportação de cada carga serializa e comprime todos os nomes
+        entrada = await asyncio.get_running_loop().run_in_executor(self.executor, self.autocomplete.exportar)
+        corpo, codificacao, etag = entrada.variante(
+            negociar(cabecalhos.get(b'accept-encoding', b'').decode('latin-1'))
+        )
+        resposta = Resposta(200, corpo)
+        _codificar(resposta, codificacao)
+        resposta.cabecalhos.append((b'cache-control', CACHE_INDICE_ATORES))
+        return _condicional(resposta, etag, cabecalhos)
+
+    async def _estatisticas(self, parametros, cabecalhos):
+        return await self._em_cache(('estatisticas',), cabecalhos, contar_totais)
+
+    async def _metricas(self, parametros, cabecalhos):
+        registro.definir('novelas_cache_respostas_acertos_total', self.cache.acertos)
+        registro.definir('novelas_cache_respostas_faltas_total', self.cache.faltas)
+        return Resposta(200, registro.exportar().encode('utf-8'), TIPO_METRICAS, [(b'cache-control', b'no-store')])
+
+app = AppConsultas(DB_PATH)
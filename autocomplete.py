@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice em memória para o autocomplete de /api/atores
+
+Guarda um array ordenado com as chaves normalizadas de cada início de palavra
+dos nomes ("lima duarte" gera "lima duarte" e "duarte"), então prefixo de
+nome e prefixo de sobrenome são a mesma busca binária. Os candidatos são
+ordenados pelo número de produções do ator (entradas em elenco), para que os
+nomes conhecidos apareçam antes da ordem alfabética.
+
+exportar() serve o mesmo índice ao navegador (/api/atores/indice): todos os
+nomes já na ordem do ranking, com chaves e pesos, para o autocomplete da
+página responder sem ir ao servidor.
+"""
+
+import bisect
+import heapq
+import json
+from array import array
+
+from cache_respostas import EntradaCache
+from compressao import CODIFICACOES, comprimir
+from conexoes import DerivadoDoBanco, abrir_somente_leitura
+from esquema import normalizar_nome
+
+# Prefixos que cobrem muitas chaves têm o top-k calculado já na carga
+MAXIMO_CANDIDATOS_SOB_DEMANDA = 64
+TAMANHO_MAXIMO_PRECALCULADO = 6
+LIMITE_MAXIMO = 20
+
+# Formato do índice exportado; muda se o navegador tiver de ler diferente
+VERSAO_EXPORTACAO = 1
+
+class _Snapshot:
+    """Dados imutáveis de uma carga do índice (trocados de uma vez na recarga)"""
+
+    def __init__(self, nomes, producoes, chaves, posicoes):
+        self.nomes = nomes            # nome de exibição por posição
+        self.producoes = producoes    # array com o total de produções por posição
+        self.chaves = chaves          # chaves de início de palavra, ordenadas
+        self.posicoes = posicoes      # array: chave -> posição do ator
+        self.top_prefixos = {}
+        self.exportado = None         # EntradaCache de exportar(), feita no primeiro pedido
+
+    def ordenar(self, candidatos, limite):
+        return heapq.nsmallest(
+            limite, candidatos,
+            key=lambda i: (-self.producoes[i], self.nomes[i])
+        )
+
+    def intervalo(self, chave):
+        inicio = bisect.bisect_left(self.chaves, chave)
+        fim = bisect.bisect_left(self.chaves, chave + '\uffff', inicio)
+        return inicio, fim
+
+    def candidatos(self, chave):
+        inicio, fim = self.intervalo(chave)
+        return set(self.posicoes[inicio:fim])
+
+class IndiceAutocomplete(DerivadoDoBanco):
+    """Autocomplete de nomes de atores, recarregado quando o banco muda"""
+
+    def _montar(self):
+        """Lê atores e contagens de produções do banco e monta o índice"""
+        conn = abrir_somente_leitura(self.db_path)
+        try:
+            linhas = conn.execute('''
+                SELECT a.nome, COUNT(e.producao_id)
+                FROM atores a
+                LEFT JOIN elenco e ON e.ator_id = a.id
+                GROUP BY a.id
+            ''').fetchall()
+        finally:
+            conn.close()
+
+        nomes = []
+        producoes = array('i')
+        entradas = []
+        for posicao, (nome, total) in enumerate(linhas):
+            nomes.append(nome)
+            producoes.append(total)
+
+            palavras = normalizar_nome(nome).split(' ')
+            for i in range(len(palavras)):
+                entradas.append((' '.join(palavras[i:]), posicao))
+
+        entradas.sort()
+        snapshot = _Snapshot(
+            nomes, producoes,
+            [chave for chave, _ in entradas],
+            array('i', (posicao for _, posicao in entradas))
+        )
+
+        # Pré-calcula o top-k dos prefixos com muitos candidatos (os mais lentos)
+        for tamanho in range(1, TAMANHO_MAXIMO_PRECALCULADO + 1):
+            for prefixo in {chave[:tamanho] for chave in snapshot.chaves if len(chave) >= tamanho}:
+                inicio, fim = snapshot.intervalo(prefixo)
+                if fim - inicio > MAXIMO_CANDIDATOS_SOB_DEMANDA:
+                    snapshot.top_prefixos[prefixo] = snapshot.ordenar(
+                        snapshot.candidatos(prefixo), LIMITE_MAXIMO
+                    )
+
+        return snapshot
+
+    def exportar(self):
+        """
+        EntradaCache com o índice para o navegador, já comprimida no nível
+        máximo: {"versao", "nomes", "chaves", "pesos"}, em ordem de ranking
+        (mais produções primeiro, depois nome). A chave é null quando é só o
+        nome ASCII em minúsculas, o que o navegador calcula sozinho.
+        """
+        snapshot = self.atual()
+        if snapshot.exportado is not None:
+            return snapshot.exportado
+
+        ordem = sorted(range(len(snapshot.nomes)), key=lambda i: (-snapshot.producoes[i], snapshot.nomes[i]))
+        chaves = []
+        for i in ordem:
+            nome = snapshot.nomes[i]
+            chave = normalizar_nome(nome)
+            chaves.append(None if nome.isascii() and chave == ' '.join(nome.lower().split()) else chave)
+
+        # Mesma serialização das respostas JSON dos apps (ver asgi._json)
+        corpo = json.dumps({
+            'versao': VERSAO_EXPORTACAO,
+            'nomes': [snapshot.nomes[i] for i in ordem],
+            'chaves': chaves,
+            'pesos': [snapshot.producoes[i] for i in ordem],
+        }, sort_keys=True, separators=(',', ':')).encode('utf-8') + b'\n'
+
+        entrada = EntradaCache(corpo, 'application/json', float('inf'))
+        for codificacao in CODIFICACOES:
+            entrada.variantes[codificacao] = comprimir(corpo, codificacao, estatico=True)
+        snapshot.exportado = entrada
+        return entrada
+
+    def sugerir(self, termo, limite=LIMITE_MAXIMO):
+        """
+        Retorna até `limite` nomes cujo nome ou alguma palavra do nome começa
+        com `termo` (sem acentos/caixa), dos mais para os menos frequentes.
+        """
+        snapshot = self.atual()
+
+        chave = normalizar_nome(termo)
+        limite = min(limite, LIMITE_MAXIMO)
+
+        if chave in snapshot.top_prefixos:
+            posicoes = snapshot.top_prefixos[chave][:limite]
+        else:
+            posicoes = snapshot.ordenar(snapshot.candidatos(chave), limite)
+
+        return [snapshot.nomes[i] for i in posicoes]
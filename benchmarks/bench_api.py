@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de carga da API com o cliente de teste do Flask
+
+Reproduz a mistura de chamadas da página: muitas /api/atores (o
+autocomplete dispara enquanto o usuário digita), algumas /api/buscar e
+poucas /api/estatisticas. Os termos saem do próprio banco, com
+popularidade de cauda longa (os atores com mais produções são os mais
+procurados), prefixos de tamanhos variados, sobrenomes, trechos do meio do
+nome e erros de digitação. Mede vazão e latência p50/p95/p99 por rota.
+
+Uso:
+    python benchmarks/bench_api.py [--banco novelas_globo.db] [--requisicoes 5000]
+                                   [--threads 1] [--sem-cache] [--memoria] [--json]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Fração de cada rota na mistura
+MISTURA = (
+    ('/api/atores', 0.60),
+    ('/api/buscar', 0.35),
+    ('/api/estatisticas', 0.05),
+)
+
+def _nome_popular(nomes, rng):
+    """Índice com cauda longa: os primeiros (mais produções) saem muito mais"""
+    return nomes[min(int(rng.paretovariate(1.1)) - 1, len(nomes) - 1)] \
+        if rng.random() < 0.7 else rng.choice(nomes)
+
+def _com_erro(texto, rng):
+    """Troca, remove ou duplica uma letra"""
+    letras = list(texto)
+    i = rng.randrange(len(letras))
+    operacao = rng.randrange(3)
+    if operacao == 0:
+        letras[i] = rng.choice('aeiourstnm')
+    elif operacao == 1 and len(letras) > 3:
+        del letras[i]
+    else:
+        letras.insert(i, letras[i])
+    return ''.join(letras)
+
+def gerar_requisicoes(db_path, quantidade, semente=1):
+    """Lista de (rota, url) com a mistura e os termos descritos no módulo"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        nomes = [nome for (nome,) in conn.execute('''
+            SELECT a.nome FROM atores a
+            JOIN elenco e ON e.ator_id = a.id
+            GROUP BY a.id
+            ORDER BY COUNT(*) DESC, a.nome
+        ''') if len(nome) >= 4]
+    finally:
+        conn.close()
+
+    rng = random.Random(semente)
+    rotas = [rota for rota, _ in MISTURA]
+    pesos = [peso for _, peso in MISTURA]
+    requisicoes = []
+
+    for _ in range(quantidade):
+        rota = rng.choices(rotas, pesos)[0]
+        nome = _nome_popular(nomes, rng).lower()
+        palavras = nome.split()
+
+        if rota == '/api/atores':
+            sorte = rng.random()
+            if sorte < 0.75:
+                # Prefixo do nome ou do sobrenome, como durante a digitação
+                palavra = rng.choice(palavras) if sorte < 0.3 else nome
+                termo = palavra[:rng.randint(2, min(8, max(2, len(palavra))))]
+            else:
+                # Trecho do meio de uma palavra (cai na busca do SQLite)
+                palavra = max(palavras, key=len)
+                inicio = rng.randint(1, max(1, len(palavra) - 3))
+                termo = palavra[inicio:inicio + 4]
+            url = f'/api/atores?termo={quote(termo)}'
+        elif rota == '/api/buscar':
+            sorte = rng.random()
+            if sorte < 0.6:
+                termo = nome
+            elif sorte < 0.9:
+                termo = palavras[-1]
+            else:
+                termo = _com_erro(nome, rng)
+            url = f'/api/buscar?nome={quote(termo)}'
+        else:
+            url = rota
+
+        requisicoes.append((rota, url))
+    return requisicoes
+
+def percentil(valores_ordenados, p):
+    """Percentil pelo método do posto mais próximo"""
+    if not valores_ordenados:
+        return None
+    posicao = max(0, min(len(valores_ordenados) - 1, int(round(p / 100 * len(valores_ordenados))) - 1))
+    return valores_ordenados[posicao]
+
+def resumir(latencias, segundos=None):
+    latencias = sorted(latencias)
+    resumo = {
+        'requisicoes': len(latencias),
+        'media_ms': round(sum(latencias) / len(latencias) * 1000, 3) if latencias else None,
+    }
+    for p in (50, 95, 99):
+        valor = percentil(latencias, p)
+        resumo[f'p{p}_ms'] = round(valor * 1000, 3) if valor is not None else None
+    if segundos:
+        resumo['req_s'] = round(len(latencias) / segundos, 1)
+    return resumo
+
+def medir_api(db_path, requisicoes=5000, threads=1, cache=True, semente=1, memoria=False):
+    """
+    Executa a carga contra o app Flask servindo `db_path` e retorna um dict
+    com vazão e latências (geral e por rota). O app é importado aqui com
+    NOVELAS_DB apontando para o banco (e NOVELAS_MEMORIA, se `memoria`): use
+    um processo por banco e modo.
+    """
+    os.environ['NOVELAS_DB'] = db_path
+    if memoria:
+        os.environ['NOVELAS_MEMORIA'] = '1'
+    inicio_carga = time.perf_counter()
+    servidor = importlib.import_module('app')
+    carga_app = time.perf_counter() - inicio_carga
+
+    if not cache:
+        servidor.cache_respostas.capacidade = 0
+
+    cliente = servidor.app.test_client()
+    lista = gerar_requisicoes(db_path, requisicoes + 200, semente)
+    aquecimento, lista = lista[:200], lista[200:]
+
+    def executar(requisicao):
+        rota, url = requisicao
+        inicio = time.perf_counter()
+        resposta = cliente.get(url)
+        duracao = time.perf_counter() - inicio
+        if resposta.status_code != 200:
+            raise RuntimeError(f'{url}: HTTP {resposta.status_code}')
+        return rota, duracao
+
+    for requisicao in aquecimento:
+        executar(requisicao)
+    servidor.cache_respostas.acertos = servidor.cache_respostas.faltas = 0
+
+    inicio = time.perf_counter()
+    if threads == 1:
+        medidas = [executar(requisicao) for requisicao in lista]
+    else:
+        with ThreadPoolExecutor(threads) as executor:
+            medidas = list(executor.map(executar, lista))
+    segundos = time.perf_counter() - inicio
+
+    por_rota = {}
+    for rota, duracao in medidas:
+        por_rota.setdefault(rota, []).append(duracao)
+
+    return {
+        'banco': os.path.basename(db_path),
+        'threads': threads,
+        'cache': cache,
+        'memoria': memoria,
+        'carga_app_s': round(carga_app, 3),
+        'copia_memoria_s': round(servidor.pool_conexoes.segundos_carga, 3) if memoria else None,
+        'segundos': round(segundos, 3),
+        'geral': resumir([duracao for _, duracao in medidas], segundos),
+        'rotas': {rota: resumir(latencias) for rota, latencias in sorted(por_rota.items())},
+        'cache_respostas': {
+            'acertos': servidor.cache_respostas.acertos,
+            'faltas': servidor.cache_respostas.faltas,
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--banco', default=os.path.join(RAIZ, 'novelas_globo.db'))
+    parser.add_argument('--requisicoes', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--sem-cache', action='store_true', help='desliga o cache de respostas')
+    parser.add_argument('--memoria', action='store_true', help='serve de uma cópia do banco em memória')
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    resultado = medir_api(
+        os.path.abspath(args.banco), args.requisicoes, args.threads,
+        not args.sem_cache, args.semente, args.memoria
+    )
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{resultado['banco']}{' em memória' if args.memoria else ''}: "
+          f"{resultado['geral']['req_s']:.0f} req/s "
+          f"({args.threads} thread(s), carga do app {resultado['carga_app_s']:.2f}s)")
+    print(f"{'rota':<20}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for rota, resumo in list(resultado['rotas'].items()) + [('geral', resultado['geral'])]:
+        print(f"{rota:<20}{resumo['requisicoes']:>7}{resumo['p50_ms']:>10.3f}"
+              f"{resumo['p95_ms']:>10.3f}{resumo['p99_ms']:>10.3f}")
+
+if __name__ == '__main__':
+    main()
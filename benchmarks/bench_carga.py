@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da carga em massa (carga_em_massa.py) x a importação linha a linha
+
+Uso:
+    python benchmarks/bench_carga.py [--escala 100] [--sem-legado]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from carga_em_massa import carregar_producoes  # noqa: E402
+from catalogo_sintetico import gerar_producoes  # noqa: E402
+from esquema import normalizar_nome  # noqa: E402
+from filmografias import materializar  # noqa: E402
+from importar_elencos import criar_banco_limpo  # noqa: E402
+
+def carga_legada(producoes, db_path):
+    """Importação anterior: INSERT OR IGNORE + SELECT por participação, índices ativos"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    total_producoes = 0
+    total_participacoes = 0
+
+    for producao in producoes:
+        cursor.execute('''
+            INSERT INTO producoes (titulo, tipo, ano_inicio, ano_fim, titulo_normalizado)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (producao['titulo'], producao['tipo'],
+              producao.get('ano_inicio'), producao.get('ano_fim'),
+              normalizar_nome(producao['titulo'])))
+        producao_id = cursor.lastrowid
+        total_producoes += 1
+
+        for participacao in producao['elenco']:
+            ator_nome = participacao['ator']
+            cursor.execute('INSERT OR IGNORE INTO atores (nome, nome_normalizado) VALUES (?, ?)',
+                           (ator_nome, normalizar_nome(ator_nome)))
+            cursor.execute('SELECT id FROM atores WHERE nome = ?', (ator_nome,))
+            ator_id = cursor.fetchone()[0]
+            try:
+                cursor.execute('''
+                    INSERT INTO elenco (ator_id, producao_id, personagem)
+                    VALUES (?, ?, ?)
+                ''', (ator_id, producao_id, participacao.get('personagem')))
+                total_participacoes += 1
+            except sqlite3.IntegrityError:
+                pass
+
+    # As duas cargas entregam o banco completo, com as filmografias materializadas
+    materializar(conn)
+    conn.commit()
+    conn.close()
+    return total_producoes, total_participacoes
+
+def conteudo(db_path):
+    """Conteúdo lógico do banco, para conferir que as duas cargas são equivalentes"""
+    conn = sqlite3.connect(db_path)
+    linhas = conn.execute('''
+        SELECT a.nome, a.nome_normalizado, p.titulo, p.titulo_normalizado, p.tipo, p.ano_inicio, p.ano_fim,
+               e.personagem
+        FROM elenco e JOIN atores a ON a.id = e.ator_id JOIN producoes p ON p.id = e.producao_id
+        ORDER BY 1, 3
+    ''').fetchall()
+    fts = conn.execute('SELECT COUNT(*) FROM atores_fts WHERE atores_fts MATCH ?', ('"silva"',)).fetchone()
+    conn.close()
+    return linhas, fts
+
+def medir(carga, producoes, diretorio, nome):
+    db_path = os.path.join(diretorio, f'{nome}.db')
+    criar_banco_limpo(db_path)
+    inicio = time.perf_counter()
+    totais = carga(producoes, db_path)
+    return db_path, time.perf_counter() - inicio, totais
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--escala', type=float, default=100)
+    parser.add_argument('--sem-legado', action='store_true', help='mede só a carga em massa')
+    args = parser.parse_args()
+
+    producoes = gerar_producoes(args.escala)
+    participacoes = sum(len(p['elenco']) for p in producoes)
+    print(f"Catálogo sintético: {len(producoes)} produções, {participacoes} participações")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db_massa, tempo_massa, totais = medir(carregar_producoes, producoes, diretorio, 'massa')
+        print(f"carga em massa : {tempo_massa:8.2f}s  {participacoes / tempo_massa:10.0f} linhas/s  {totais}")
+
+        if not args.sem_legado:
+            db_legado, tempo_legado, totais = medir(carga_legada, producoes, diretorio, 'legado')
+            print(f"linha a linha  : {tempo_legado:8.2f}s  {participacoes / tempo_legado:10.0f} linhas/s  {totais}")
+            print(f"ganho          : {tempo_legado / tempo_massa:8.2f}x")
+            print(f"mesmo conteúdo : {conteudo(db_massa) == conteudo(db_legado)}")
+
+if __name__ == '__main__':
+    main()
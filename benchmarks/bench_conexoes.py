@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: requisições/s com o pool de conexões x uma conexão nova por requisição
+
+Uso:
+    python benchmarks/bench_conexoes.py [--requisicoes 2000] [--threads 1 4]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+import app as servidor  # noqa: E402
+
+URLS = [
+    '/api/buscar?nome=lima duarte',
+    '/api/buscar?nome=fernanda',
+    '/api/estatisticas',
+    '/api/buscar?nome=tony ramos',
+    '/api/atores?termo=rtin',
+]
+
+class ConexaoPorRequisicao:
+    """Comportamento anterior: abre e fecha uma conexão a cada requisição"""
+
+    def obter(self):
+        conn = sqlite3.connect(servidor.DB_PATH)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def devolver(self, conn):
+        conn.close()
+
+def medir(requisicoes, threads):
+    cliente = servidor.app.test_client()
+
+    def executar(i):
+        resposta = cliente.get(URLS[i % len(URLS)])
+        assert resposta.status_code == 200
+
+    inicio = time.perf_counter()
+    if threads == 1:
+        for i in range(requisicoes):
+            executar(i)
+    else:
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(executar, range(requisicoes)))
+    return requisicoes / (time.perf_counter() - inicio)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    pool = servidor.pool_conexoes
+    modos = [('por_requisicao', ConexaoPorRequisicao()), ('pool', pool)]
+
+    print(f"{'modo':<16}{'threads':>8}{'req/s':>12}")
+    for threads in args.threads:
+        resultados = {}
+        for nome, fonte in modos:
+            servidor.pool_conexoes = fonte
+            medir(100, threads)  # aquecimento
+            resultados[nome] = medir(args.requisicoes, threads)
+            print(f"{nome:<16}{threads:>8}{resultados[nome]:>12.0f}")
+        print(f"{'ganho':<16}{threads:>8}{resultados['pool'] / resultados['por_requisicao']:>11.2f}x")
+
+    servidor.pool_conexoes = pool
+
+if __name__ == '__main__':
+    main()
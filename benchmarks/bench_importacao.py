@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da importação: extrair_elencos_completo e importar_para_banco
+
+A extração é medida num RTF sintético com o número de produções da escala
+pedida (mesmo gerador de bench_parser.py, com os três formatos de bloco). A
+carga usa o catálogo de catalogo_sintetico.py, com o número de atores e
+participações do banco real vezes a escala, num banco novo; por fim mede uma
+reimportação incremental sem mudanças (só comparação de hashes).
+
+Uso:
+    python benchmarks/bench_importacao.py [--escala 1] [--json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parser import gerar_rtf  # noqa: E402
+from catalogo_sintetico import PRODUCOES_BASE, gerar_producoes  # noqa: E402
+from importacao_incremental import importar_incremental  # noqa: E402
+from importar_elencos import criar_banco_limpo, extrair_elencos_completo, importar_para_banco  # noqa: E402
+
+def _cronometrar(funcao, *args, **kwargs):
+    """Executa a função calando os prints e retorna (resultado, segundos)"""
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+def medir_importacao(escala=1, diretorio=None):
+    """Retorna um dict com os tempos de cada etapa para a escala pedida"""
+    with tempfile.TemporaryDirectory(dir=diretorio) as temporario:
+        rtf = os.path.join(temporario, 'elencos.rtf')
+        db_path = os.path.join(temporario, 'importacao.db')
+
+        total_producoes = int(PRODUCOES_BASE * escala)
+        _, segundos_rtf = _cronometrar(gerar_rtf, rtf, total_producoes)
+
+        extraidas, segundos_extracao = _cronometrar(extrair_elencos_completo, rtf)
+
+        producoes = gerar_producoes(escala)
+        criar_banco_limpo(db_path)
+        (gravadas, participacoes), segundos_carga = _cronometrar(importar_para_banco, producoes, db_path)
+
+        contagem, segundos_incremental = _cronometrar(
+            importar_incremental, producoes, db_path, criar_banco_limpo
+        )
+
+        return {
+            'escala': escala,
+            'rtf_mb': round(os.path.getsize(rtf) / 2**20, 2),
+            'producoes_extraidas': len(extraidas),
+            'producoes': gravadas,
+            'participacoes': participacoes,
+            'geracao_rtf_s': round(segundos_rtf, 3),
+            'extrair_elencos_completo_s': round(segundos_extracao, 3),
+            'importar_para_banco_s': round(segundos_carga, 3),
+            'reimportacao_sem_mudancas_s': round(segundos_incremental, 3),
+            'participacoes_por_s': round(participacoes / segundos_carga) if segundos_carga else None,
+            'inalteradas': contagem['inalteradas'],
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--escala', type=float, default=1)
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    resultado = medir_importacao(args.escala)
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+        return
+
+    print(f"RTF de {resultado['rtf_mb']} MB ({resultado['producoes_extraidas']} produções); "
+          f"carga de {resultado['producoes']} produções, {resultado['participacoes']} participações")
+    for etapa in ('extrair_elencos_completo_s', 'importar_para_banco_s', 'reimportacao_sem_mudancas_s'):
+        print(f"{etapa:<32}{resultado[etapa]:>10.3f}")
+
+if __name__ == '__main__':
+    main()
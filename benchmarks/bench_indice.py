@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: nomes exatos pelo índice binário x filmografias x SQL de elenco
+
+Mede, por tamanho de lote, buscar_lote lendo as filmografias
+materializadas, o mesmo lote montado de atores/elenco/producoes e o lote
+no índice mapeado (gerado antes, se preciso), além de um nome só pela
+busca exata (filmografia_exata, corpo gzip pronto).
+
+Uso:
+    python benchmarks/bench_indice.py [novelas_globo.db] [--lotes 1 100 1000] [--repeticoes 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from conexoes import abrir_conexao_leitura  # noqa: E402
+from consultas import _lote_por_elenco, buscar_lote  # noqa: E402
+from filmografias import filmografia_exata  # noqa: E402
+from indice_binario import IndiceBinario, caminho_indice, gerar_indice, versao_banco  # noqa: E402
+
+def medir(funcao, repeticoes):
+    """Milissegundos por chamada (a primeira é aquecimento)"""
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db_path', nargs='?', default=os.path.join(RAIZ, 'novelas_globo.db'))
+    parser.add_argument('--lotes', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    indice = IndiceBinario(args.db_path)
+    if not indice.disponivel():
+        gerar_indice(args.db_path)
+        print(f"Índice gerado em {caminho_indice(args.db_path)} (versão {versao_banco(args.db_path)})")
+
+    conn = abrir_conexao_leitura(args.db_path)
+    nomes = [row[0] for row in conn.execute('SELECT nome FROM atores')]
+    aleatorio = random.Random(42)
+
+    print(f"{'nomes':>6}{'filmografias':>14}{'elenco (SQL)':>14}{'índice':>10}   ms por lote")
+    for tamanho in args.lotes:
+        lote = aleatorio.sample(nomes, min(tamanho, len(nomes)))
+        assert indice.buscar_lote(lote) == buscar_lote(conn, lote)
+        tempos = [
+            medir(lambda: buscar_lote(conn, lote), args.repeticoes),
+            medir(lambda: _lote_por_elenco(conn, lote), args.repeticoes),
+            medir(lambda: indice.buscar_lote(lote), args.repeticoes),
+        ]
+        print(f"{len(lote):>6}" + ''.join(f'{tempo:>14.3f}' for tempo in tempos[:2]) + f'{tempos[2]:>10.3f}')
+
+    nome = aleatorio.choice(nomes)
+    print(f"\nBusca exata de um nome (corpo gzip pronto): "
+          f"{medir(lambda: filmografia_exata(conn, nome), args.repeticoes * 50):.3f} ms")
+    conn.close()
+
+if __name__ == '__main__':
+    main()
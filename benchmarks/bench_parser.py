@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark e conferência de saída do parser RTF em streaming (parser_rtf.py)
+contra o parser original (reproduzido aqui como extrair_legado)
+
+Gera um RTF sintético com os três formatos de bloco, escapes \\'xx, \\pard,
+marcadores de fase e produções pequenas (avisos), confere que as duas versões
+produzem exatamente as mesmas produções e avisos (inclusive com pedaços de
+leitura minúsculos, para exercitar as fronteiras) e mede o tempo de cada uma.
+Sai com código 1 se as saídas divergirem.
+
+Uso:
+    python benchmarks/bench_parser.py [--producoes 20000] [--rtf arquivo.rtf]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_sintetico import gerar_nomes  # noqa: E402
+from parser_rtf import iterar_producoes  # noqa: E402
+
+def _decodificar_legado(match):
+    try:
+        return bytes.fromhex(match.group(1)).decode('latin1')
+    except ValueError:
+        return '?'
+
+def _limpar_legado(texto):
+    texto = re.sub(r"\\'([0-9a-fA-F]{2})", _decodificar_legado, texto)
+    texto = re.sub(r'\\[a-z]+\d*\s?', '', texto)
+    texto = re.sub(r'[{}]', '', texto)
+    return texto.strip()
+
+def extrair_legado(arquivo_rtf):
+    """Parser original de importar_elencos.py (sem os prints); retorna (produções, avisos)"""
+    with open(arquivo_rtf, 'r', encoding='latin1', errors='ignore') as f:
+        conteudo = f.read()
+
+    producoes = []
+    erros = []
+    blocos = re.split(r'\\b\s+', conteudo)
+    palavras_credito = {
+        'de', 'direção', 'direcao', 'colaboração', 'colaboracao',
+        'diretor', 'diretores', 'autor', 'autores',
+        'roteiro', 'roteirista', 'roteiristas',
+        'adaptação', 'adaptacao', 'baseado',
+        'supervisão', 'supervisao', 'produtor', 'produtores',
+        'producao', 'produção', 'cenografia', 'figurino',
+        'trilha', 'sonora', 'abertura', 'núcleo', 'nucleo',
+        'coordenação', 'coordenacao', 'assistente', 'assistentes',
+        'e'
+    }
+
+    for i, bloco in enumerate(blocos):
+        if i == 0:
+            continue
+        bloco = bloco.replace('\\b0', '')
+        match_titulo = re.match(r'^([^\r\n]+?)\\par', bloco)
+        if not match_titulo:
+            continue
+        titulo = _limpar_legado(match_titulo.group(1))
+        if not titulo or len(titulo) < 2:
+            continue
+        resto = bloco[match_titulo.end():]
+
+        if resto.strip().startswith('\\b0') or '\\par\\par' in resto[:50]:
+            linhas = re.split(r'\\par', resto)
+            elenco = []
+            for linha in linhas:
+                linha_limpa = _limpar_legado(linha)
+                if not linha_limpa or len(linha_limpa) < 3:
+                    continue
+                if linha_limpa.lower() in palavras_credito:
+                    continue
+                if linha_limpa.lower() in ['1ª fase', '2ª fase', '3ª fase']:
+                    break
+                elenco.append({'ator': linha_limpa, 'personagem': None})
+        else:
+            linhas = re.split(r'\\par', resto)
+            elenco = []
+            modo = 'creditos'
+            linhas_vazias = 0
+            for linha in linhas:
+                linha_limpa = _limpar_legado(linha)
+                if not linha_limpa or len(linha_limpa) < 2:
+                    linhas_vazias += 1
+                    if linhas_vazias >= 1 and modo == 'creditos':
+                        modo = 'elenco'
+                    continue
+                linhas_vazias = 0
+                linha_lower = linha_limpa.lower()
+                if modo == 'creditos':
+                    continue
+                if modo == 'elenco':
+                    if linha_lower in ['1ª fase', '2ª fase', '3ª fase']:
+                        break
+                    elenco.append({'ator': linha_limpa, 'personagem': None})
+
+        if len(elenco) >= 2:
+            producoes.append({
+                'titulo': titulo, 'tipo': 'Novela',
+                'ano_inicio': None, 'ano_fim': None, 'elenco': elenco
+            })
+        elif len(elenco) > 0:
+            erros.append(f"⚠️  {titulo}: apenas {len(elenco)} ator(es)")
+
+    return producoes, erros
+
+def extrair_streaming(arquivo_rtf, tamanho_leitura=None):
+    avisos = []
+    argumentos = {'tamanho_leitura': tamanho_leitura} if tamanho_leitura else {}
+    producoes = list(iterar_producoes(arquivo_rtf, avisos, **argumentos))
+    return producoes, avisos
+
+def _rtf(texto):
+    """Codifica acentos como \\'xx, como o Word faz"""
+    return ''.join(c if ord(c) < 128 else f"\\'{ord(c):02x}" for c in texto)
+
+def gerar_rtf(caminho, total_producoes, semente=7):
+    """Escreve um RTF sintético misturando os três formatos do arquivo real"""
+    rng = random.Random(semente)
+    nomes = gerar_nomes(max(200, total_producoes * 3), rng)
+
+    partes = ['{\\rtf1\\ansi\\ansicpg1252\\deff0{\\fonttbl{\\f0\\fnil Calibri;}}\r\n'
+              '\\viewkind4\\uc1\\pard\\sa200\\sl276\\slmult1\\lang22\\f0\\fs22 ']
+    for i in range(total_producoes):
+        titulo = _rtf(rng.choice(['Vale Tudo', 'Roque Santeiro', 'Pantanal', 'O Bem-Amado',
+                                  'Avenida Brasil', 'Sinhá Moça', 'Tieta', 'Gabriela'])) + f' {i}'
+        elenco = [_rtf(nome) for nome in rng.sample(nomes, rng.choice((1, 2, 5, 20, 40, 60)))]
+        if rng.random() < 0.1:
+            elenco.insert(len(elenco) // 2, '2\\\'aa fase')
+        formato = rng.choice((1, 1, 1, 1, 2, 3))
+        linhas_elenco = '\\par\r\n'.join(elenco)
+
+        if formato == 1:
+            creditos = f"de\\par\r\n{_rtf('Dias Gomes')}\\par\r\n{_rtf('direção')}\\par\r\n{_rtf('Régis Cardoso')}"
+            partes.append(f'\\b {titulo}\\par\r\n\\b0 {creditos}\\par\r\n\\par\r\n{linhas_elenco}\\par\r\n\\par\r\n')
+        elif formato == 2:
+            partes.append(f'\\b {titulo}\\par\r\n\\par\r\n\\b0 {linhas_elenco}\\par\r\n\\pard\\par\r\n')
+        else:
+            partes.append(f'\\b {titulo}\\par\\b0 e\\par\\par\r\n{{\\i {linhas_elenco}}}\\par\r\n')
+    partes.append('}\r\n')
+
+    with open(caminho, 'w', encoding='latin1', newline='') as f:
+        f.write(''.join(partes))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--producoes', type=int, default=20000)
+    parser.add_argument('--rtf', help='usa um RTF existente em vez do sintético')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = args.rtf or os.path.join(diretorio, 'elencos.rtf')
+        if not args.rtf:
+            gerar_rtf(arquivo, args.producoes)
+        print(f"RTF: {arquivo} ({os.path.getsize(arquivo) / 1e6:.1f} MB)")
+
+        legado = extrair_legado(arquivo)
+        equivalente = extrair_streaming(arquivo) == legado
+        fronteiras = all(extrair_streaming(arquivo, tamanho) == legado for tamanho in (1, 7, 4096))
+        print(f"produções: {len(legado[0])}, avisos: {len(legado[1])}")
+        print(f"saída idêntica ao legado : {equivalente}")
+        print(f"idêntica com pedaços 1/7/4096 caracteres: {fronteiras}")
+
+        tempos = {}
+        for nome, funcao in (('legado', extrair_legado), ('streaming', extrair_streaming)):
+            medicoes = []
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                funcao(arquivo)
+                medicoes.append(time.perf_counter() - inicio)
+            tempos[nome] = min(medicoes)
+            print(f"{nome:<10}: {tempos[nome]:.3f}s")
+        print(f"ganho     : {tempos['legado'] / tempos['streaming']:.2f}x")
+
+    if not (equivalente and fronteiras):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: requisições/s do servidor de produção conforme o número de workers
+
+Sobe servidor.py numa porta local para cada número de workers e dispara
+requisições HTTP de vários processos clientes durante alguns segundos. As
+URLs caem no SQLite (substring no meio do nome, sem cache de resposta), então
+o ganho com mais workers só aparece em máquinas com mais de um núcleo.
+
+Uso:
+    python benchmarks/bench_servidor.py [--workers 1 2 4] [--threads 4]
+                                        [--clientes 8] [--duracao 5] [--asgi]
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PORTA = 5099
+
+URLS = [
+    '/api/atores?termo=rtin',
+    '/api/atores?termo=ndes',
+    '/api/atores?termo=ilva',
+    '/api/atores?termo=ereir',
+    '/api/atores?termo=ouza',
+]
+
+def aguardar_servidor(base, prazo=30):
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        try:
+            urllib.request.urlopen(base + '/api/estatisticas', timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.1)
+    raise RuntimeError('servidor não respondeu')
+
+def cliente(base, duracao, deslocamento):
+    """Faz requisições em sequência até o fim da duração; retorna quantas"""
+    total = 0
+    fim = time.monotonic() + duracao
+    while time.monotonic() < fim:
+        urllib.request.urlopen(base + URLS[(total + deslocamento) % len(URLS)]).read()
+        total += 1
+    return total
+
+def medir(workers, threads, clientes, duracao, asgi):
+    comando = [
+        sys.executable, 'servidor.py', '--bind', f'127.0.0.1:{PORTA}',
+        '--workers', str(workers), '--threads', str(threads), '--preload',
+    ]
+    if asgi:
+        comando.append('--asgi')
+
+    processo = subprocess.Popen(comando, cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{PORTA}'
+    try:
+        aguardar_servidor(base)
+        with ProcessPoolExecutor(clientes) as executor:
+            totais = executor.map(cliente, [base] * clientes, [duracao] * clientes, range(clientes))
+            return sum(totais) / duracao
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        processo.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--duracao', type=float, default=5)
+    parser.add_argument('--asgi', action='store_true')
+    args = parser.parse_args()
+
+    print(f"núcleos: {os.cpu_count()}")
+    print(f"{'workers':>8}{'req/s':>12}{'ganho':>10}")
+    base = None
+    for workers in args.workers:
+        taxa = medir(workers, args.threads, args.clientes, args.duracao, args.asgi)
+        base = base or taxa
+        print(f"{workers:>8}{taxa:>12.0f}{taxa / base:>9.2f}x")
+
+if __name__ == '__main__':
+    main()
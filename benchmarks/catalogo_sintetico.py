@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gera catálogos sintéticos (lista de produções no formato de importação)
+com o tamanho do catálogo real multiplicado por uma escala
+
+Os nomes seguem a distribuição do banco real quando ele existe: prenomes e
+sobrenomes sorteados com a frequência com que aparecem em novelas_globo.db
+e o mesmo número de palavras por nome (a maioria com duas, alguns com três
+ou mais). Sem o banco, usa as listas fixas abaixo.
+"""
+
+import os
+import random
+import sqlite3
+from itertools import accumulate
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BANCO_REFERENCIA = os.path.join(RAIZ, 'novelas_globo.db')
+
+# Tamanho do catálogo real (novelas_globo.db)
+PRODUCOES_BASE = 520
+ATORES_BASE = 5876
+PARTICIPACOES_BASE = 24070
+
+PRENOMES = [
+    'ANA', 'ANTÔNIO', 'BEATRIZ', 'CARLOS', 'CLÁUDIA', 'DÉBORA', 'EDUARDO',
+    'FERNANDA', 'GLÓRIA', 'HELENA', 'JOSÉ', 'JÚLIA', 'LUÍS', 'MARCOS',
+    'MARIA', 'NATÁLIA', 'OTÁVIO', 'PAULO', 'REGINA', 'SÉRGIO', 'TÂNIA', 'VERA',
+]
+SOBRENOMES = [
+    'ALMEIDA', 'ARAÚJO', 'BARBOSA', 'CARDOSO', 'CARVALHO', 'DUARTE', 'FAGUNDES',
+    'FERREIRA', 'GOMES', 'LIMA', 'MACHADO', 'MENDONÇA', 'MONTENEGRO', 'PIRES',
+    'RAMOS', 'RIBEIRO', 'SANTOS', 'SILVA', 'SOUZA', 'VASCONCELOS',
+]
+
+def distribuicao_nomes(db_path=BANCO_REFERENCIA):
+    """
+    Retorna (prenomes, sobrenomes, tamanhos), cada um um par (valores, pesos
+    acumulados) para random.choices. Vem dos nomes do banco real (só os em
+    caixa alta: linhas de crédito como "de" e "direção" ficam de fora).
+    """
+    prenomes = {}
+    sobrenomes = {}
+    tamanhos = {}
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            for (nome,) in conn.execute('SELECT nome FROM atores'):
+                palavras = nome.split()
+                if not palavras or nome != nome.upper():
+                    continue
+                tamanhos[len(palavras)] = tamanhos.get(len(palavras), 0) + 1
+                prenomes[palavras[0]] = prenomes.get(palavras[0], 0) + 1
+                for palavra in palavras[1:]:
+                    sobrenomes[palavra] = sobrenomes.get(palavra, 0) + 1
+        finally:
+            conn.close()
+
+    if not prenomes or not sobrenomes:
+        prenomes = dict.fromkeys(PRENOMES, 1)
+        sobrenomes = dict.fromkeys(SOBRENOMES, 1)
+        tamanhos = {2: 2, 3: 1}
+
+    def acumulado(frequencias):
+        valores = sorted(frequencias)
+        return valores, list(accumulate(frequencias[valor] for valor in valores))
+
+    return acumulado(prenomes), acumulado(sobrenomes), acumulado(tamanhos)
+
+def gerar_nomes(quantidade, rng, distribuicao=None):
+    """Nomes únicos no estilo do RTF (caixa alta, com acentos)"""
+    (prenomes, pesos_prenomes), (sobrenomes, pesos_sobrenomes), (tamanhos, pesos_tamanhos) = (
+        distribuicao or distribuicao_nomes()
+    )
+    nomes = set()
+    repetidos = 0
+    while len(nomes) < quantidade:
+        tamanho = max(2, rng.choices(tamanhos, cum_weights=pesos_tamanhos)[0])
+        partes = rng.choices(prenomes, cum_weights=pesos_prenomes)
+        partes += rng.choices(sobrenomes, cum_weights=pesos_sobrenomes, k=tamanho - 1)
+        nome = ' '.join(partes)
+        # Se as combinações estiverem acabando, diferencia com um número
+        if nome in nomes:
+            repetidos += 1
+            if repetidos < 100:
+                continue
+            nome = f'{nome} {len(nomes)}'
+        repetidos = 0
+        nomes.add(nome)
+    return sorted(nomes)
+
+def gerar_producoes(escala=1, semente=42):
+    """
+    Produções com o mesmo formato de extrair_elencos_completo. A escolha do
+    elenco segue uma distribuição de cauda longa: poucos atores aparecem em
+    muitas produções, a maioria em poucas.
+    """
+    rng = random.Random(semente)
+    nomes = gerar_nomes(int(ATORES_BASE * escala), rng)
+    # Os primeiros da lista são os mais escalados (cauda longa abaixo)
+    rng.shuffle(nomes)
+    total_producoes = int(PRODUCOES_BASE * escala)
+    elenco_medio = PARTICIPACOES_BASE // PRODUCOES_BASE
+
+    producoes = []
+    for i in range(total_producoes):
+        tamanho = max(2, int(rng.gauss(elenco_medio, elenco_medio / 3)))
+        escolhidos = set()
+        while len(escolhidos) < min(tamanho, len(nomes)):
+            if rng.random() < 0.3:
+                indice = min(int(rng.paretovariate(1.2)) - 1, len(nomes) - 1)
+            else:
+                indice = rng.randrange(len(nomes))
+            escolhidos.add(nomes[indice])
+        ano = rng.randint(1965, 2024)
+        producoes.append({
+            'titulo': f'Produção {i + 1}',
+            'tipo': rng.choice(('Novela', 'Novela', 'Novela', 'Minissérie', 'Série')),
+            'ano_inicio': ano,
+            'ano_fim': ano + rng.choice((0, 0, 1)),
+            'elenco': [{'ator': nome, 'personagem': None} for nome in sorted(escolhidos)],
+        })
+    return producoes
+
+def criar_banco_sintetico(db_path, escala=1, semente=42):
+    """
+    Cria em `db_path` um banco completo (schema de importar_elencos, carga
+    em massa, índice FTS) com o catálogo sintético na escala pedida.
+    Retorna (total_producoes, total_participacoes).
+    """
+    from carga_em_massa import carregar_producoes
+    from importar_elencos import criar_banco_limpo
+
+    for caminho in (db_path, db_path + '-wal', db_path + '-shm'):
+        if os.path.exists(caminho):
+            os.remove(caminho)
+    criar_banco_limpo(db_path)
+    return carregar_producoes(gerar_producoes(escala, semente), db_path)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suíte de benchmarks: bancos sintéticos, carga da API e importação
+
+Para cada escala (1x, 10x e 100x o catálogo real, por padrão):
+  1. cria um banco sintético (catalogo_sintetico.criar_banco_sintetico);
+  2. roda bench_api.py contra ele num processo separado (o app lê o banco
+     na importação), com e sem o cache de respostas, e sem cache servindo
+     da cópia em memória (NOVELAS_MEMORIA);
+  3. mede extrair_elencos_completo e importar_para_banco (bench_importacao.py).
+
+O resultado vai para um JSON com a versão do código, Python, SQLite e
+máquina, para comparar execuções: --comparar anterior.json imprime a razão
+entre os tempos e vazões das duas.
+
+Uso:
+    python benchmarks/suite.py [--escalas 1 10 100] [--requisicoes 3000]
+                               [--saida resultados.json] [--comparar anterior.json]
+                               [--destino DIRETORIO]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, BENCHMARKS)
+
+from bench_importacao import medir_importacao  # noqa: E402
+from catalogo_sintetico import criar_banco_sintetico  # noqa: E402
+
+def _formatar_escala(escala):
+    return f'{escala:g}x'
+
+def ambiente():
+    """Identifica a máquina e a versão do código da execução"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'nucleos': os.cpu_count(),
+    }
+
+def rodar_bench_api(db_path, requisicoes, cache, memoria=False):
+    comando = [
+        sys.executable, os.path.join(BENCHMARKS, 'bench_api.py'),
+        '--banco', db_path, '--requisicoes', str(requisicoes), '--json',
+    ]
+    if not cache:
+        comando.append('--sem-cache')
+    if memoria:
+        comando.append('--memoria')
+    saida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+    return json.loads(saida)
+
+def medir_escala(escala, requisicoes, destino):
+    db_path = os.path.join(destino, f'novelas_{_formatar_escala(escala)}.db')
+
+    inicio = time.perf_counter()
+    producoes, participacoes = criar_banco_sintetico(db_path, escala)
+    segundos_banco = time.perf_counter() - inicio
+
+    return {
+        'banco': {
+            'producoes': producoes,
+            'participacoes': participacoes,
+            'tamanho_mb': round(os.path.getsize(db_path) / 2**20, 2),
+            'criacao_s': round(segundos_banco, 3),
+        },
+        'api': rodar_bench_api(db_path, requisicoes, cache=True),
+        'api_sem_cache': rodar_bench_api(db_path, requisicoes, cache=False),
+        'api_sem_cache_memoria': rodar_bench_api(db_path, requisicoes, cache=False, memoria=True),
+        'importacao': medir_importacao(escala, diretorio=destino),
+    }
+
+def _metricas(dados, prefixo=''):
+    """Achata o JSON em {caminho: valor} só com as medidas comparáveis"""
+    metricas = {}
+    for chave, valor in dados.items():
+        caminho = f'{prefixo}{chave}'
+        if isinstance(valor, dict):
+            metricas.update(_metricas(valor, caminho + '.'))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool) \
+                and (chave.endswith(('_ms', '_s', '_por_s')) or chave == 'req_s'):
+            metricas[caminho] = valor
+    return metricas
+
+def comparar(anterior, atual):
+    """Imprime a razão atual/anterior de cada medida presente nas duas execuções"""
+    antes = _metricas(anterior['escalas'])
+    depois = _metricas(atual['escalas'])
+    print(f"\nComparação com {anterior['ambiente'].get('commit')} ({anterior['ambiente'].get('data')})")
+    print(f"{'medida':<60}{'antes':>12}{'agora':>12}{'razão':>9}")
+    for caminho in sorted(antes.keys() & depois.keys()):
+        if not antes[caminho]:
+            continue
+        razao = depois[caminho] / antes[caminho]
+        # Tempos: razão > 1 é piora; vazões (req_s, _por_s): razão < 1 é piora
+        maior_melhor = caminho.endswith(('req_s', '_por_s'))
+        piorou = razao < 0.9 if maior_melhor else razao > 1.1
+        print(f"{caminho:<60}{antes[caminho]:>12g}{depois[caminho]:>12g}{razao:>8.2f}x"
+              f"{'  <- pior' if piorou else ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--escalas', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--requisicoes', type=int, default=3000)
+    parser.add_argument('--saida', default='resultados_benchmark.json')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior')
+    parser.add_argument('--destino', help='diretório dos bancos sintéticos (padrão: temporário)')
+    args = parser.parse_args()
+
+    resultado = {'ambiente': ambiente(), 'escalas': {}}
+
+    with tempfile.TemporaryDirectory() as temporario:
+        destino = args.destino or temporario
+        os.makedirs(destino, exist_ok=True)
+        for escala in args.escalas:
+            print(f"Escala {_formatar_escala(escala)}...", flush=True)
+            medidas = medir_escala(escala, args.requisicoes, destino)
+            resultado['escalas'][_formatar_escala(escala)] = medidas
+            print(f"  API {medidas['api']['geral']['req_s']:.0f} req/s "
+                  f"(p99 {medidas['api']['geral']['p99_ms']:.2f} ms), "
+                  f"sem cache {medidas['api_sem_cache']['geral']['req_s']:.0f} req/s "
+                  f"(p99 {medidas['api_sem_cache']['geral']['p99_ms']:.2f} ms), "
+                  f"em memória {medidas['api_sem_cache_memoria']['geral']['req_s']:.0f} req/s "
+                  f"(p99 {medidas['api_sem_cache_memoria']['geral']['p99_ms']:.2f} ms); "
+                  f"importação {medidas['importacao']['importar_para_banco_s']:.2f} s")
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultados em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(json.load(f), resultado)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Busca aproximada de nomes (tolerante a erros de digitação)
+
+Quando a busca por substring não encontra nada, /api/buscar sugere os nomes
+mais próximos do termo. Em vez de calcular a distância de edição contra
+todos os nomes, o índice guarda listas de postagem por trigrama (como o
+pg_trgm: cada palavra com espaços nas bordas) e só os nomes que mais
+compartilham trigramas com o termo passam pela distância de Levenshtein,
+limitada e com saída antecipada.
+
+Nomes importados com '?' no lugar de caracteres que o RTF não decodificou
+casam com qualquer letra nessa posição.
+"""
+
+from array import array
+from collections import Counter
+
+from conexoes import DerivadoDoBanco, abrir_somente_leitura
+from esquema import normalizar_nome
+
+# Nomes (por trigramas em comum) que passam pela distância de edição
+MAXIMO_CANDIDATOS = 50
+
+# Trigramas presentes em mais que essa fração dos nomes não ajudam a separar
+# candidatos e só custam tempo; são ignorados se o termo tiver outros
+FRACAO_TRIGRAMA_COMUM = 0.05
+
+LIMITE_SUGESTOES = 10
+
+CORINGA = '?'
+
+def trigramas(chave):
+    """Trigramas das palavras de um nome normalizado, com espaços nas bordas"""
+    resultado = set()
+    for palavra in chave.split():
+        palavra = f'  {palavra} '
+        for i in range(len(palavra) - 2):
+            resultado.add(palavra[i:i + 3])
+    return resultado
+
+def distancia_maxima(chave):
+    """Erros tolerados conforme o tamanho do termo"""
+    if len(chave) <= 4:
+        return 1
+    if len(chave) <= 8:
+        return 2
+    return 3
+
+def distancia_limitada(termo, nome, limite):
+    """
+    Distância de Levenshtein entre `termo` e `nome`, ou limite + 1 se passar
+    de `limite`. Só a faixa de `limite` casas em torno da diagonal é
+    calculada. Um CORINGA em `nome` casa com qualquer caractere.
+    """
+    n = len(nome)
+    if abs(len(termo) - n) > limite:
+        return limite + 1
+
+    fora = limite + 1
+    anterior = list(range(n + 1))
+    for i, letra in enumerate(termo, 1):
+        inicio = max(1, i - limite)
+        fim = min(n, i + limite)
+        atual = [fora] * (n + 1)
+        atual[0] = i if i <= limite else fora
+        menor = atual[0]
+        for j in range(inicio, fim + 1):
+            outra = nome[j - 1]
+            valor = anterior[j - 1] + (0 if letra == outra or outra == CORINGA else 1)
+            if anterior[j] + 1 < valor:
+                valor = anterior[j] + 1
+            if atual[j - 1] + 1 < valor:
+                valor = atual[j - 1] + 1
+            atual[j] = valor
+            if valor < menor:
+                menor = valor
+        if menor > limite:
+            return fora
+        anterior = atual
+    return min(anterior[n], fora)
+
+def distancia_nome(termo, chave, limite):
+    """
+    Menor distância entre o termo e o nome inteiro ou qualquer sequência de
+    palavras do nome com o mesmo número de palavras do termo ("duartte"
+    acha "lima duarte").
+    """
+    melhor = distancia_limitada(termo, chave, limite)
+    palavras = chave.split(' ')
+    tamanho = termo.count(' ') + 1
+    for i in range(len(palavras) - tamanho + 1):
+        if melhor == 0:
+            break
+        trecho = ' '.join(palavras[i:i + tamanho])
+        melhor = min(melhor, distancia_limitada(termo, trecho, min(melhor, limite)))
+    return melhor
+
+class _Snapshot:
+    """Dados imutáveis de uma carga do índice"""
+
+    def __init__(self, chaves, nomes, producoes, postagens):
+        self.chaves = chaves          # nome normalizado por posição
+        self.nomes = nomes            # nome de exibição por posição
+        self.producoes = producoes    # array com o total de produções por posição
+        self.postagens = postagens    # trigrama -> array de posições
+
+class IndiceAproximado(DerivadoDoBanco):
+    """Índice de trigramas dos nomes de atores, recarregado quando o banco muda"""
+
+    def _montar(self):
+        """Lê os nomes e contagens de produções e monta as postagens"""
+        conn = abrir_somente_leitura(self.db_path)
+        try:
+            linhas = conn.execute('''
+                SELECT a.nome, COUNT(e.producao_id)
+                FROM atores a
+                LEFT JOIN elenco e ON e.ator_id = a.id
+                GROUP BY a.id
+            ''').fetchall()
+        finally:
+            conn.close()
+
+        chaves = []
+        nomes = []
+        producoes = array('i')
+        postagens = {}
+        for posicao, (nome, total) in enumerate(linhas):
+            chave = normalizar_nome(nome)
+            chaves.append(chave)
+            nomes.append(nome)
+            producoes.append(total)
+            for trigrama in trigramas(chave):
+                lista = postagens.get(trigrama)
+                if lista is None:
+                    lista = postagens[trigrama] = array('i')
+                lista.append(posicao)
+
+        return _Snapshot(chaves, nomes, producoes, postagens)
+
+    def sugerir(self, termo, limite=LIMITE_SUGESTOES):
+        """
+        Nomes a uma distância de edição pequena do termo (sem acentos/caixa),
+        dos mais próximos para os mais distantes e, empatados, dos com mais
+        produções.
+        """
+        snapshot = self.atual()
+
+        chave = normalizar_nome(termo)
+        if len(chave) < 2:
+            return []
+
+        listas = [snapshot.postagens[t] for t in trigramas(chave) if t in snapshot.postagens]
+        comuns = len(snapshot.nomes) * FRACAO_TRIGRAMA_COMUM
+        raras = [lista for lista in listas if len(lista) <= comuns]
+        if raras:
+            listas = raras
+
+        em_comum = Counter()
+        for lista in listas:
+            em_comum.update(lista)
+
+        # Cada edição altera no máximo 3 trigramas do termo: quem compartilha
+        # menos que isso não pode estar dentro do limite
+        limite_distancia = distancia_maxima(chave)
+        minimo = len(listas) - 3 * limite_distancia
+        candidatos = [
+            (posicao, total) for posicao, total in em_comum.most_common(MAXIMO_CANDIDATOS)
+            if total >= minimo
+        ]
+
+        encontrados = []
+        for posicao, _ in candidatos:
+            distancia = distancia_nome(chave, snapshot.chaves[posicao], limite_distancia)
+            if distancia <= limite_distancia:
+                encontrados.append((distancia, -snapshot.producoes[posicao], snapshot.nomes[posicao]))
+
+        encontrados.sort()
+        return [nome for _, _, nome in encontrados[:min(limite, LIMITE_SUGESTOES)]]
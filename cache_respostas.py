@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache LRU/TTL de respostas JSON já serializadas
+
+Guarda o corpo pronto (bytes) e um ETag forte de cada resposta, indexados
+pela consulta normalizada. Acertos não tocam no SQLite nem no encoder JSON.
+As variantes comprimidas (compressao.py) são feitas no primeiro pedido de
+cada codificação e guardadas na própria entrada.
+Todo o cache é descartado quando o arquivo do banco muda (inode, mtime ou
+tamanho do arquivo principal ou do -wal).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from compressao import calcular_etag, comprimir, compressivel, etag_variante
+from conexoes import identidade_banco
+from metricas import registro
+
+# Os apps copiam acertos/faltas para estas séries ao servir /metrics
+registro.descrever('novelas_cache_respostas_acertos_total', 'counter', 'Acertos do cache de respostas')
+registro.descrever('novelas_cache_respostas_faltas_total', 'counter', 'Faltas do cache de respostas')
+
+class EntradaCache:
+    """Resposta serializada guardada no cache"""
+    __slots__ = ('corpo', 'etag', 'mimetype', 'expira_em', 'variantes')
+
+    def __init__(self, corpo, mimetype, expira_em):
+        self.corpo = corpo
+        self.etag = calcular_etag(corpo)
+        self.mimetype = mimetype
+        self.expira_em = expira_em
+        self.variantes = {}
+
+    def variante(self, codificacao):
+        """
+        (corpo, codificação ou None, ETag) na codificação pedida; corpos
+        pequenos demais para comprimir vão sempre na identidade
+        """
+        if codificacao is None or not compressivel(self.mimetype, len(self.corpo)):
+            return self.corpo, None, self.etag
+        corpo = self.variantes.get(codificacao)
+        if corpo is None:
+            corpo = self.variantes[codificacao] = comprimir(self.corpo, codificacao)
+        return corpo, codificacao, etag_variante(self.etag, codificacao)
+
+class CacheVersionado:
+    """
+    LRU de valores derivados do banco, limitado por número de entradas e
+    descartado inteiro quando o arquivo do banco muda
+    """
+
+    def __init__(self, db_path, capacidade):
+        self.db_path = db_path
+        self.capacidade = capacidade
+        self._entradas = OrderedDict()
+        self._identidade = None
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def _validar_versao(self):
+        identidade = identidade_banco(self.db_path)
+        if identidade != self._identidade:
+            self._entradas.clear()
+            self._identidade = identidade
+
+    def _valido(self, valor):
+        """Caches com tempo de vida recusam aqui os valores vencidos"""
+        return True
+
+    def obter(self, chave):
+        """Retorna o valor guardado da chave, ou None se ausente/expirado"""
+        with self._lock:
+            self._validar_versao()
+            valor = self._entradas.get(chave)
+            if valor is None or not self._valido(valor):
+                self._entradas.pop(chave, None)
+                self.faltas += 1
+                return None
+
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def versao(self):
+        """Versão atual do banco; passe-a a guardar() para não cachear dados antigos"""
+        return identidade_banco(self.db_path)
+
+    def _guardar(self, chave, valor, versao=None):
+        """
+        Guarda e retorna o valor. Se `versao` (obtida antes de consultar o
+        banco) já não for a atual, o valor é devolvido sem ser guardado.
+        """
+        with self._lock:
+            self._validar_versao()
+            if versao is not None and versao != self._identidade:
+                return valor
+            self._entradas[chave] = valor
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+class CacheRespostas(CacheVersionado):
+    """Cache de EntradaCache limitado por número de entradas e por tempo de vida"""
+
+    def __init__(self, db_path, capacidade=2048, ttl=600):
+        super().__init__(db_path, capacidade)
+        self.ttl = ttl
+
+    def _valido(self, entrada):
+        return entrada.expira_em >= time.monotonic()
+
+    def guardar(self, chave, corpo, mimetype='application/json', versao=None):
+        """Guarda o corpo serializado e retorna a EntradaCache criada (ver _guardar)"""
+        return self._guardar(chave, EntradaCache(corpo, mimetype, time.monotonic() + self.ttl), versao)
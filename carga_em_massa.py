@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga em massa de produções e elencos, usada por importar_para_banco
+(importar_elencos.py) e importar_de_json (criar_banco.py)
+
+Em vez de INSERT OR IGNORE + SELECT por participação, mantém um mapa
+nome -> id em memória, atribui os ids no Python e insere tudo com
+executemany em uma única transação. Durante a carga o journal fica em
+memória, o synchronous desligado, e os índices secundários e triggers
+(inclusive os do FTS) são removidos e recriados no fim, de uma vez. Na mesma
+transação são regravadas as filmografias materializadas (filmografias.py)
+dos atores que receberam produções.
+"""
+
+import sqlite3
+
+from esquema import normalizar_nome
+from filmografias import materializar
+
+TABELAS = ('producoes', 'atores', 'elenco')
+
+def _proximo_id(cursor, tabela):
+    """Próximo id livre, respeitando o sqlite_sequence do AUTOINCREMENT"""
+    maior = cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {tabela}').fetchone()[0]
+    try:
+        sequencia = cursor.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = ?', (tabela,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        sequencia = None
+    return max(maior, sequencia[0] if sequencia else 0) + 1
+
+def _remover_indices(cursor):
+    """
+    Remove índices secundários e triggers das tabelas da carga e retorna o SQL
+    para recriá-los. Índices únicos (de UNIQUE ou CREATE UNIQUE INDEX) ficam,
+    pois fazem a deduplicação.
+    """
+    marcadores = ','.join('?' * len(TABELAS))
+    objetos = cursor.execute(f'''
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+          AND sql NOT LIKE 'CREATE UNIQUE INDEX%'
+          AND tbl_name IN ({marcadores})
+    ''', TABELAS).fetchall()
+
+    for tipo, nome, _ in objetos:
+        cursor.execute(f'DROP {tipo.upper()} IF EXISTS "{nome}"')
+
+    # Índices antes dos triggers, na ordem em que existiam
+    return [sql for tipo, _, sql in objetos if tipo == 'index'] + \
+           [sql for tipo, _, sql in objetos if tipo == 'trigger']
+
+def carregar_producoes(producoes, db_path):
+    """
+    Insere as produções (formato de extrair_elencos_completo / JSON de
+    importação) no banco e retorna (total_producoes, total_participacoes).
+    Atores já existentes são reaproveitados pelo nome.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+
+    journal_original = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+    if journal_original != 'wal':
+        cursor.execute('PRAGMA journal_mode = MEMORY')
+    cursor.execute('PRAGMA synchronous = OFF')
+    cursor.execute('PRAGMA cache_size = -65536')
+    cursor.execute('PRAGMA temp_store = MEMORY')
+
+    total_producoes = 0
+    total_participacoes = 0
+
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        recriar = _remover_indices(cursor)
+
+        ids_atores = dict(cursor.execute('SELECT nome, id FROM atores'))
+        banco_vazio = not ids_atores
+        proximo_ator = _proximo_id(cursor, 'atores')
+        proxima_producao = _proximo_id(cursor, 'producoes')
+
+        linhas_producoes = []
+        linhas_atores = []
+        linhas_elenco = []
+
+        for producao in producoes:
+            if not producao.get('titulo') or not producao.get('tipo'):
+                print(f"❌ Erro ao importar '{producao.get('titulo')}': título e tipo são obrigatórios")
+                continue
+
+            producao_id = proxima_producao
+            proxima_producao += 1
+            linhas_producoes.append((
+                producao_id, producao['titulo'], producao['tipo'],
+                producao.get('ano_inicio'), producao.get('ano_fim'),
+                normalizar_nome(producao['titulo'])
+            ))
+
+            for participacao in producao.get('elenco', []):
+                ator_nome = participacao['ator']
+                ator_id = ids_atores.get(ator_nome)
+                if ator_id is None:
+                    ator_id = proximo_ator
+                    proximo_ator += 1
+                    ids_atores[ator_nome] = ator_id
+                    linhas_atores.append((ator_id, ator_nome, normalizar_nome(ator_nome)))
+
+                linhas_elenco.append((ator_id, producao_id, participacao.get('personagem')))
+
+        cursor.executemany('''
+            INSERT INTO producoes (id, titulo, tipo, ano_inicio, ano_fim, titulo_normalizado)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', linhas_producoes)
+        total_producoes = len(linhas_producoes)
+
+        cursor.executemany(
+            'INSERT INTO atores (id, nome, nome_normalizado) VALUES (?, ?, ?)',
+            linhas_atores
+        )
+
+        # OR IGNORE: em bancos com UNIQUE(ator_id, producao_id) a mesma pessoa
+        # listada duas vezes na produção conta uma vez só. Inserir na ordem
+        # desse índice deixa as páginas da B-tree sempre no fim.
+        linhas_elenco.sort(key=lambda linha: (linha[0], linha[1]))
+        cursor.executemany('''
+            INSERT OR IGNORE INTO elenco (ator_id, producao_id, personagem)
+            VALUES (?, ?, ?)
+        ''', linhas_elenco)
+        total_participacoes = cursor.rowcount
+
+        for sql in recriar:
+            cursor.execute(sql)
+
+        # Os triggers do FTS estavam fora durante a carga: reindexa de uma vez
+        # (o rebuild já grava o índice num único segmento, sem precisar de optimize)
+        for fts in ('atores_fts', 'producoes_fts'):
+            try:
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            except sqlite3.OperationalError:
+                pass
+
+        # Banco vazio: materializa tudo de uma vez, sem filtrar por nome
+        if banco_vazio:
+            materializar(conn)
+        else:
+            ids_carregados = {linha[0] for linha in linhas_elenco}
+            materializar(conn, {
+                normalizar_nome(nome) for nome, ator_id in ids_atores.items()
+                if ator_id in ids_carregados
+            })
+
+        cursor.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            cursor.execute('ROLLBACK')
+        raise
+    finally:
+        cursor.execute('PRAGMA synchronous = FULL')
+        if journal_original != 'wal':
+            cursor.execute(f'PRAGMA journal_mode = {journal_original}')
+        cursor.execute('PRAGMA optimize')
+        conn.close()
+
+    return total_producoes, total_participacoes
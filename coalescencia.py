@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coalescência de consultas idênticas em andamento (single-flight)
+
+Rajadas de requisições iguais (o autocomplete de vários usuários digitando o
+mesmo nome, a mesma busca antes de entrar no cache) rodam a consulta uma vez
+só: a primeira executa, as que chegam enquanto ela roda esperam e recebem o
+mesmo resultado (ou a mesma exceção). Nada fica guardado depois que a
+consulta termina; para isso existe o cache de respostas.
+
+ChamadaUnica é para threads (app Flask) e ChamadaUnicaAsync para o loop de
+eventos (app ASGI).
+"""
+
+import asyncio
+import threading
+
+from metricas import registro
+
+registro.descrever(
+    'novelas_consultas_coalescidas_total', 'counter',
+    'Requisições que aproveitaram uma consulta idêntica já em andamento'
+)
+
+class _Voo:
+    """Uma execução em andamento e quem espera por ela"""
+    __slots__ = ('pronto', 'resultado', 'erro')
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+class ChamadaUnica:
+    """Single-flight entre threads"""
+
+    def __init__(self):
+        self._voos = {}
+        self._lock = threading.Lock()
+
+    def executar(self, chave, funcao):
+        """Resultado de funcao(), executada uma vez para as chamadas simultâneas com a mesma chave"""
+        with self._lock:
+            voo = self._voos.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._voos[chave] = _Voo()
+
+        if not lider:
+            registro.incrementar('novelas_consultas_coalescidas_total')
+            voo.pronto.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+
+        try:
+            voo.resultado = funcao()
+            return voo.resultado
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._voos[chave]
+            voo.pronto.set()
+
+class ChamadaUnicaAsync:
+    """Single-flight entre corrotinas do mesmo loop de eventos"""
+
+    def __init__(self):
+        self._voos = {}
+
+    async def executar(self, chave, fabrica):
+        """
+        Resultado de `await fabrica()`, executada uma vez para as chamadas
+        simultâneas com a mesma chave. Quem espera usa shield: um cliente que
+        desconecta não cancela a consulta dos demais.
+        """
+        tarefa = self._voos.get(chave)
+        if tarefa is not None:
+            registro.incrementar('novelas_consultas_coalescidas_total')
+            return await asyncio.shield(tarefa)
+
+        tarefa = self._voos[chave] = asyncio.ensure_future(fabrica())
+        tarefa.add_done_callback(lambda _: self._voos.pop(chave, None))
+        return await asyncio.shield(tarefa)
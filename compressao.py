@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compressão das respostas: gzip sempre, brotli se o pacote estiver instalado
+
+A codificação sai do Accept-Encoding do cliente (com os pesos q); cada
+variante tem o próprio ETag, o da identidade com o sufixo -gzip ou -br.
+
+- Ativos estáticos (index.html) são comprimidos uma vez, no nível máximo,
+  ao carregar o app, e de novo só se o arquivo mudar.
+- Respostas do cache de respostas guardam as variantes comprimidas junto
+  com a entrada (cache_respostas.py): um acerto não comprime de novo.
+- As demais respostas acima de LIMITE_COMPRESSAO são comprimidas por
+  requisição, com níveis rápidos.
+
+Uso opcional do brotli:
+    pip install brotli
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Abaixo disso (bytes) a compressão não compensa os cabeçalhos e a CPU
+LIMITE_COMPRESSAO = 1024
+
+# Níveis por requisição (rápidos) e dos ativos estáticos (máximos, uma vez só)
+NIVEL_GZIP = 6
+NIVEL_BROTLI = 5
+NIVEL_GZIP_ESTATICO = 9
+NIVEL_BROTLI_ESTATICO = 11
+
+# Em ordem de preferência quando o cliente aceita as duas com o mesmo peso
+CODIFICACOES = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+TIPOS_COMPRIMIVEIS = frozenset((
+    'application/json', 'text/html', 'text/plain', 'text/css', 'text/csv',
+    'application/javascript', 'application/x-ndjson',
+))
+
+def calcular_etag(corpo):
+    """ETag forte (sem aspas) do corpo"""
+    return hashlib.blake2b(corpo, digest_size=16).hexdigest()
+
+def etag_variante(etag, codificacao):
+    """ETag da variante comprimida (None = identidade)"""
+    return f'{etag}-{codificacao}' if codificacao else etag
+
+def pesos_aceitos(accept_encoding):
+    """{codificação: q} do cabeçalho Accept-Encoding"""
+    pesos = {}
+    for parte in (accept_encoding or '').split(','):
+        nome, _, parametros = parte.partition(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        peso = 1.0
+        for parametro in parametros.split(';'):
+            chave, _, valor = parametro.strip().partition('=')
+            if chave.strip().lower() == 'q':
+                try:
+                    peso = float(valor)
+                except ValueError:
+                    peso = 0.0
+        pesos[nome] = peso
+    return pesos
+
+def aceita(accept_encoding, codificacao):
+    """O cliente aceita `codificacao` (peso q maior que zero)?"""
+    pesos = pesos_aceitos(accept_encoding)
+    return pesos.get(codificacao, pesos.get('*', 0)) > 0
+
+def negociar(accept_encoding):
+    """Melhor codificação de CODIFICACOES aceita pelo cliente, ou None (identidade)"""
+    pesos = pesos_aceitos(accept_encoding)
+    melhor, melhor_peso = None, 0
+    for codificacao in CODIFICACOES:
+        peso = pesos.get(codificacao, pesos.get('*', 0))
+        if peso > melhor_peso:
+            melhor, melhor_peso = codificacao, peso
+    return melhor
+
+def comprimir(corpo, codificacao, estatico=False):
+    """Corpo comprimido em 'gzip' ou 'br'; mtime zerado: mesmo corpo, mesmos bytes"""
+    if codificacao == 'br':
+        return brotli.compress(corpo, quality=NIVEL_BROTLI_ESTATICO if estatico else NIVEL_BROTLI)
+    return gzip.compress(corpo, compresslevel=NIVEL_GZIP_ESTATICO if estatico else NIVEL_GZIP, mtime=0)
+
+def compressivel(mimetype, tamanho):
+    return mimetype in TIPOS_COMPRIMIVEIS and tamanho >= LIMITE_COMPRESSAO
+
+class AtivoEstatico:
+    """
+    Arquivo servido da memória, com todas as variantes comprimidas prontas.
+    Cada obter() confere o stat do arquivo e recarrega se ele mudou.
+    """
+
+    def __init__(self, caminho, mimetype, cache_control):
+        self.caminho = caminho
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self._lock = threading.Lock()
+        self._identidade = None
+        self._versao = None     # (variantes, etag, modificado_em), trocado de uma vez
+        self._carregar()
+
+    def _carregar(self):
+        estado = os.stat(self.caminho)
+        identidade = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+        with self._lock:
+            if identidade == self._identidade:
+                return
+            with open(self.caminho, 'rb') as f:
+                corpo = f.read()
+            variantes = {None: corpo}
+            for codificacao in CODIFICACOES:
+                comprimido = comprimir(corpo, codificacao, estatico=True)
+                if len(comprimido) < len(corpo):
+                    variantes[codificacao] = comprimido
+            self._versao = (variantes, calcular_etag(corpo), estado.st_mtime)
+            self._identidade = identidade
+
+    def obter(self, accept_encoding):
+        """
+        (corpo, codificação ou None, ETag, mtime) da melhor variante para o
+        cliente
+        """
+        self._carregar()
+        variantes, etag, modificado_em = self._versao
+        codificacao = negociar(accept_encoding)
+        if codificacao not in variantes:
+            codificacao = None
+        return variantes[codificacao], codificacao, etag_variante(etag, codificacao), modificado_em
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de conexões somente leitura ao SQLite, reaproveitadas entre requisições
+
+Abrir uma conexão por requisição custa abrir o arquivo, reler o schema e
+começar com o cache de páginas vazio. O pool mantém conexões já abertas e
+ajustadas (mode=ro, query_only, cache_size, mmap_size) e descarta todas
+quando o arquivo do banco é substituído (novo inode), por exemplo depois de
+uma reimportação.
+
+No modo memória (NOVELAS_MEMORIA=1 ou PoolConexoes(memoria=True)) o banco é
+copiado com a API de backup para um banco em memória com cache
+compartilhado, onde são criados os índices de INDICES_MEMORIA, e as
+conexões do pool leem dele: nenhuma consulta toca o disco e todas as
+conexões do processo usam as mesmas páginas. Quando o arquivo muda, uma
+nova cópia é carregada e as conexões passam para ela.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from esquema import INDICES_COBERTURA
+from metricas import CursorMedido, contar_passos
+
+# Ajustes das conexões de leitura
+CACHE_SIZE_KIB = 16384          # 16 MiB de cache de páginas por conexão
+MMAP_SIZE = 256 * 1024 * 1024   # o banco inteiro cabe no mmap (limitado ao tamanho do arquivo)
+
+MODO_MEMORIA = os.environ.get('NOVELAS_MEMORIA') == '1'
+
+# Índices garantidos na cópia em memória, mesmo se o arquivo ainda não
+# passou por migracoes.py
+INDICES_MEMORIA = INDICES_COBERTURA
+
+def identidade_banco(db_path):
+    """
+    Identifica a versão do arquivo do banco (inode, mtime e tamanho, incluindo
+    o -wal se existir). Muda quando o arquivo é substituído ou escrito.
+    """
+    identidade = []
+    for caminho in (db_path, db_path + '-wal'):
+        try:
+            st = os.stat(caminho)
+        except FileNotFoundError:
+            identidade.append(None)
+            continue
+        identidade.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(identidade)
+
+def abrir_somente_leitura(db_path, **argumentos):
+    """
+    Conexão sqlite3 simples, mode=ro, ao arquivo `db_path`, para leituras
+    avulsas (carga de índices, verificações). O caminho vai escapado na URI:
+    '?', '#' e '%' no nome não viram parâmetros.
+    """
+    return sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True, **argumentos)
+
+class DerivadoDoBanco:
+    """
+    Base dos índices em memória montados a partir do banco (autocomplete,
+    busca aproximada, grafo, índice binário). A cada uso, atual() compara
+    identidade_banco com a da última carga; se mudou, uma thread remonta o
+    snapshot com _montar() e as demais seguem com o anterior. Só quem não
+    tem snapshot nenhum espera a carga.
+    """
+
+    # Onde rodam as recargas quando já há um snapshot: com um executor (o
+    # app ASGI passa o seu), quem chama segue com o anterior e o índice novo
+    # é montado fora do loop de eventos; None recarrega na própria thread
+    executor = None
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._snapshot = None
+        self._identidade = None
+        self._lock = threading.Lock()
+
+    def _identidade_atual(self):
+        return identidade_banco(self.db_path)
+
+    def _montar(self):
+        """Lê o banco e devolve o snapshot novo (imutável depois de pronto)"""
+        raise NotImplementedError
+
+    def carregar(self):
+        identidade = self._identidade_atual()
+        self._snapshot = self._montar()
+        self._identidade = identidade
+
+    def desatualizado(self):
+        """Ainda sem snapshot, ou o banco mudou desde a última carga?"""
+        return self._snapshot is None or self._identidade_atual() != self._identidade
+
+    def atual(self):
+        """Snapshot do banco atual, recarregado se o arquivo mudou"""
+        snapshot = self._snapshot
+        if snapshot is not None and self._identidade_atual() == self._identidade:
+            return snapshot
+
+        if self._lock.acquire(blocking=snapshot is None):
+            if snapshot is not None and self.executor is not None:
+                try:
+                    self.executor.submit(self._recarregar)
+                except RuntimeError:  # executor já encerrado
+                    self._lock.release()
+            else:
+                self._recarregar()
+        return self._snapshot
+
+    def _recarregar(self):
+        """Recarrega se o banco ainda estiver diferente; libera o lock de atual()"""
+        try:
+            if self.desatualizado():
+                self.carregar()
+        finally:
+            self._lock.release()
+
+def arquivo_banco(db_path):
+    """
+    Identifica o arquivo físico do banco (dispositivo e inode). Escritas no
+    mesmo arquivo são vistas pelas conexões abertas; só uma troca do arquivo
+    (os.replace, remoção e recriação) exige reabrir.
+    """
+    try:
+        st = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+class ConexaoLeitura(sqlite3.Connection):
+    """
+    Conexão do pool, marcada com a geração do arquivo em que foi aberta.
+    Os cursores medem as próprias consultas (ver metricas.py).
+    """
+    geracao = 0
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+def abrir_conexao_leitura(db_path, memoria=None):
+    """
+    Abre uma conexão somente leitura ajustada para servir consultas, ao
+    arquivo `db_path` ou, com `memoria`, ao banco em memória de mesmo nome
+    (ver carregar_em_memoria).
+
+    Bancos em modo WAL precisam do arquivo -shm; se ele não puder ser aberto
+    em mode=ro (diretório sem escrita, -shm ausente), cai numa conexão
+    mode=rw protegida por query_only. Nenhum dos dois cria o arquivo: banco
+    ausente é FileNotFoundError, não um banco vazio.
+    """
+    if memoria:
+        conn = sqlite3.connect(_uri_memoria(memoria), uri=True, check_same_thread=False, factory=ConexaoLeitura)
+    else:
+        if not os.path.isfile(db_path):
+            raise FileNotFoundError(f'Banco de dados não encontrado: {db_path}')
+        uri = Path(db_path).resolve().as_uri()
+        try:
+            conn = sqlite3.connect(uri + '?mode=ro', uri=True, check_same_thread=False, factory=ConexaoLeitura)
+            conn.execute('SELECT 1 FROM sqlite_master LIMIT 1')
+        except sqlite3.OperationalError:
+            conn = sqlite3.connect(uri + '?mode=rw', uri=True, check_same_thread=False, factory=ConexaoLeitura)
+
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA query_only = ON')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    contar_passos(conn)
+    return conn
+
+def _uri_memoria(nome):
+    return f'file:{nome}?mode=memory&cache=shared'
+
+def carregar_em_memoria(db_path, nome):
+    """
+    Copia `db_path` para o banco em memória compartilhado `nome` (API de
+    backup) e cria nele os INDICES_MEMORIA. Retorna a conexão que mantém o
+    banco vivo: ele existe enquanto houver alguma conexão aberta a ele.
+    """
+    fonte = abrir_somente_leitura(db_path)
+    ancora = sqlite3.connect(_uri_memoria(nome), uri=True, check_same_thread=False)
+    try:
+        fonte.backup(ancora)
+        for sql in INDICES_MEMORIA:
+            ancora.execute(sql)
+        ancora.execute('ANALYZE')
+        ancora.commit()
+    except BaseException:
+        ancora.close()
+        raise
+    finally:
+        fonte.close()
+    return ancora
+
+class PoolConexoes:
+    """
+    Pool de conexões de leitura. Cada conexão é usada por uma requisição de
+    cada vez (obter/devolver), então pode circular entre threads.
+    """
+
+    def __init__(self, db_path, tamanho=8, intervalo_verificacao=1.0, memoria=None):
+        self.db_path = db_path
+        self.tamanho = tamanho
+        self.intervalo_verificacao = intervalo_verificacao
+        self.memoria = MODO_MEMORIA if memoria is None else memoria
+        self._livres = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._arquivo = None
+        self._geracao = 0
+        self._ultima_verificacao = 0.0
+        self._ancora = None
+        self._ancora_anterior = None
+        self._memoria_atual = (0, None)
+        self.segundos_carga = None
+
+    def _verificar_troca(self):
+        agora = time.monotonic()
+        if agora - self._ultima_verificacao < self.intervalo_verificacao:
+            return
+        self._ultima_verificacao = agora
+
+        if self.memoria:
+            self._verificar_memoria()
+            return
+
+        arquivo = arquivo_banco(self.db_path)
+        if arquivo == self._arquivo:
+            return
+
+        with self._lock:
+            if arquivo != self._arquivo:
+                self._arquivo = arquivo
+                self._geracao += 1
+                self._descartar_livres()
+
+    def _verificar_memoria(self):
+        """
+        No modo memória, qualquer mudança no arquivo (troca ou escrita) gera
+        uma nova cópia. Só uma thread copia; as demais seguem na cópia
+        anterior até a nova ficar pronta.
+        """
+        identidade = identidade_banco(self.db_path)
+        if identidade == self._arquivo:
+            return
+
+        if self._lock.acquire(blocking=self._ancora is None):
+            try:
+                if identidade_banco(self.db_path) != self._arquivo:
+                    self._carregar_memoria()
+            finally:
+                self._lock.release()
+
+    def _carregar_memoria(self):
+        identidade = identidade_banco(self.db_path)
+        geracao = self._geracao + 1
+        nome = f'novelas_{os.getpid()}_{id(self)}_{geracao}'
+
+        inicio = time.perf_counter()
+        ancora = carregar_em_memoria(self.db_path, nome)
+        self.segundos_carga = time.perf_counter() - inicio
+
+        # A cópia anterior fica viva até a próxima troca: quem leu o nome
+        # dela logo antes da troca ainda consegue abrir uma conexão (as já
+        # abertas a mantêm viva de qualquer forma)
+        if self._ancora_anterior is not None:
+            self._ancora_anterior.close()
+        self._ancora_anterior = self._ancora
+        self._ancora, self._arquivo = ancora, identidade
+        self._memoria_atual = (geracao, nome)
+        self._geracao = geracao
+        self._descartar_livres()
+
+    def _descartar_livres(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def iniciar(self):
+        """Deixa uma conexão pronta antes da primeira requisição (no modo memória, copia o banco)"""
+        self.devolver(self.obter())
+
+    def obter(self):
+        """Retorna uma conexão livre do pool (ou abre uma nova)"""
+        self._verificar_troca()
+        try:
+            conn = self._livres.get_nowait()
+            if conn.geracao == self._geracao:
+                return conn
+            conn.close()
+        except queue.Empty:
+            pass
+
+        return self.abrir()
+
+    def abrir(self):
+        """Conexão nova, fora do pool, à versão atual do banco (para quem a segura por mais tempo)"""
+        self._verificar_troca()
+        if self.memoria:
+            geracao, nome = self._memoria_atual
+        else:
+            geracao, nome = self._geracao, None
+        conn = abrir_conexao_leitura(self.db_path, nome)
+        conn.geracao = geracao
+        return conn
+
+    def devolver(self, conn):
+        """Devolve a conexão ao pool; conexões de um arquivo antigo são fechadas"""
+        if conn.in_transaction:
+            conn.rollback()
+
+        if conn.geracao != self._geracao or self._livres.qsize() >= self.tamanho:
+            conn.close()
+        else:
+            self._livres.put(conn)
+
+    def fechar(self):
+        """Fecha as conexões livres (as emprestadas são fechadas ao voltar)"""
+        with self._lock:
+            self._geracao += 1
+            self._descartar_livres()
+            for ancora in (self._ancora, self._ancora_anterior):
+                if ancora is not None:
+                    ancora.close()
+            self._ancora = self._ancora_anterior = None
+            self._memoria_atual = (self._geracao, None)
+            self._arquivo = None
+            self._ultima_verificacao = 0.0
+
+    def reiniciar(self):
+        """
+        Depois de um fork: fecha o que veio do processo pai e, se o banco
+        existe, deixa uma conexão pronta. No modo memória isso carrega a
+        cópia do próprio processo (a do pai não é visível aqui).
+        """
+        self.fechar()
+        if os.path.exists(self.db_path):
+            self.iniciar()
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Consultas da API, independentes do framework web
+
+Cada função recebe uma conexão de leitura (sqlite3.Row como row_factory) e
+os parâmetros já extraídos da requisição, e retorna o objeto a serializar
+em JSON. Parâmetros inválidos levantam ParametroInvalido, que as rotas
+convertem em HTTP 400. Usadas pelo app Flask (app.py) e pelo app ASGI
+(asgi.py).
+"""
+
+import base64
+import gzip
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from esquema import frase_fts, normalizar_nome
+
+# Máximo de produções por página de /api/buscar
+LIMITE_PAGINA = 100
+
+# Máximo de nomes em /api/atores
+LIMITE_ATORES = 20
+
+# Máximo de nomes por chamada de /api/buscar/lote
+LIMITE_LOTE = 1000
+
+# Máximo de produções em /api/producoes
+LIMITE_TITULOS = 50
+
+# Máximo de atores por página de /api/producao/<id>
+LIMITE_ELENCO = 100
+
+# Tempo máximo das buscas por substring antes de serem interrompidas
+PRAZO_BUSCA = float(os.environ.get('NOVELAS_PRAZO_BUSCA_MS', 500)) / 1000
+
+# Filtros por substring do nome do ator (tabela atores sempre com alias "a")
+FILTRO_NOME_FTS = 'a.id IN (SELECT rowid FROM atores_fts WHERE atores_fts MATCH ?)'
+FILTRO_NOME_NORMALIZADO = 'a.nome_normalizado LIKE ?'
+FILTRO_NOME_LIKE = 'a.nome LIKE ?'
+
+# Idem para o título da produção (tabela producoes sempre com alias "p")
+FILTRO_TITULO_FTS = 'p.id IN (SELECT rowid FROM producoes_fts WHERE producoes_fts MATCH ?)'
+FILTRO_TITULO_NORMALIZADO = 'p.titulo_normalizado LIKE ?'
+FILTRO_TITULO_LIKE = 'p.titulo LIKE ?'
+
+class ParametroInvalido(ValueError):
+    """Parâmetro de consulta inválido; a mensagem vai no campo 'erro' do 400"""
+
+class BuscaAmpla(ParametroInvalido):
+    """A busca passou de PRAZO_BUSCA e foi interrompida; o cliente deve refinar o termo"""
+
+class ProducaoNaoEncontrada(LookupError):
+    """Id de produção inexistente; as rotas respondem 404"""
+
+def _interrompida(erro):
+    return 'interrupted' in str(erro)
+
+@contextmanager
+def prazo_busca(conn, segundos=PRAZO_BUSCA):
+    """
+    Interrompe as consultas do bloco que passarem de `segundos` (pelo
+    progress handler de metricas.contar_passos) e levanta BuscaAmpla.
+    Conexões sem o handler (fora do pool) rodam sem prazo.
+    """
+    if not hasattr(conn, 'prazo'):
+        yield
+        return
+
+    conn.prazo = time.monotonic() + segundos
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if not _interrompida(e):
+            raise
+        raise BuscaAmpla('Busca ampla demais: refine o termo') from e
+    finally:
+        conn.prazo = None
+
+def executar_busca_nome(cursor, query, termo, parametros=()):
+    """
+    Executa `query` substituindo {filtro} pelo filtro de substring do nome.
+    O {filtro} deve vir antes dos demais `parametros` na query.
+
+    O termo é normalizado como atores.nome_normalizado (sem acentos, casefold),
+    então "antonio" encontra "ANTÔNIO". Usa o índice FTS5 trigram (atores_fts)
+    quando possível e cai no LIKE sobre a coluna normalizada quando o termo
+    tem menos de 3 caracteres (o trigram não indexa menos que isso) ou quando
+    o SQLite não foi compilado com FTS5. Bancos antigos, sem a coluna
+    normalizada, ainda são atendidos com LIKE sobre atores.nome.
+    """
+    return _executar_busca(
+        cursor, query, termo, parametros,
+        FILTRO_NOME_FTS, FILTRO_NOME_NORMALIZADO, FILTRO_NOME_LIKE
+    )
+
+def executar_busca_titulo(cursor, query, termo, parametros=()):
+    """Como executar_busca_nome, sobre producoes.titulo_normalizado (producoes_fts)"""
+    return _executar_busca(
+        cursor, query, termo, parametros,
+        FILTRO_TITULO_FTS, FILTRO_TITULO_NORMALIZADO, FILTRO_TITULO_LIKE
+    )
+
+def _executar_busca(cursor, query, termo, parametros, filtro_fts, filtro_normalizado, filtro_like):
+    chave = normalizar_nome(termo)
+    tentativas = [
+        (filtro_normalizado, f'%{chave}%'),
+        (filtro_like, f'%{termo}%'),
+    ]
+    if len(chave) >= 3:
+        tentativas.insert(0, (filtro_fts, frase_fts(chave)))
+
+    for filtro, parametro in tentativas[:-1]:
+        try:
+            return cursor.execute(query.format(filtro=filtro), (parametro,) + parametros)
+        except sqlite3.OperationalError as e:
+            # Estourou o prazo (prazo_busca): não adianta tentar um filtro mais lento
+            if _interrompida(e):
+                raise
+
+    filtro, parametro = tentativas[-1]
+    return cursor.execute(query.format(filtro=filtro), (parametro,) + parametros)
+
+def formatar_anos(row):
+    """'1985' ou '1985-1986' a partir de ano_inicio/ano_fim"""
+    anos = f"{row['ano_inicio']}"
+    if row['ano_fim'] and row['ano_fim'] != row['ano_inicio']:
+        anos += f"-{row['ano_fim']}"
+    return anos
+
+def formatar_producao(row):
+    """Converte uma linha de produção do elenco no formato da API"""
+    return {
+        'titulo': row['titulo'],
+        'tipo': row['tipo'],
+        'anos': formatar_anos(row),
+        'personagem': row['personagem'] or 'Não especificado'
+    }
+
+def codificar_cursor(posicao):
+    """Serializa a chave da última linha de uma página num cursor opaco"""
+    dados = json.dumps(posicao, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(dados).decode('ascii').rstrip('=')
+
+# Tipos dos campos do cursor de cada rota, na ordem da chave (keyset)
+CAMPOS_CURSOR_BUSCA = (str, int, int, str, int)     # a.nome, a.id, -ano_inicio, p.titulo, p.id
+CAMPOS_CURSOR_ELENCO = (str, int)                   # a.nome, a.id
+
+def decodificar_cursor(cursor, tipos=CAMPOS_CURSOR_BUSCA):
+    """
+    Inverso de codificar_cursor; levanta ValueError se o cursor for inválido
+    (ou se os campos não forem os `tipos` da chave da rota)
+    """
+    if not cursor:
+        return None
+    try:
+        dados = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        posicao = json.loads(dados)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('cursor inválido') from e
+    if not isinstance(posicao, list) or len(posicao) != len(tipos) or not all(
+        isinstance(valor, tipo) and not isinstance(valor, bool) for valor, tipo in zip(posicao, tipos)
+    ):
+        raise ValueError('cursor inválido')
+    return posicao
+
+def chave_busca(nome, cursor, limite):
+    """
+    Chave de cache de /api/buscar. Usa o nome como digitado (sem os espaços
+    das pontas), não o normalizado: a resposta repete o 'termo' do cliente
+    """
+    return ('buscar', (nome or '').strip(), cursor or '', limite or '')
+
+def buscar_producoes(conn, nome, cursor=None, limite=None, aproximado=None):
+    """
+    Produções dos atores cujo nome contém `nome`, agrupadas por ator.
+    `cursor` é o proximo_cursor da página anterior e `limite` (texto ou
+    número, máx. LIMITE_PAGINA) o número de produções por página.
+    Se nada for encontrado, `aproximado` (um IndiceAproximado) preenche
+    'sugestoes' com os nomes mais parecidos.
+    """
+    nome = (nome or '').strip()
+
+    if not nome or len(nome) < 2:
+        raise ParametroInvalido('Digite pelo menos 2 caracteres para buscar')
+
+    try:
+        limite = min(int(limite or LIMITE_PAGINA), LIMITE_PAGINA)
+        posicao = decodificar_cursor(cursor)
+    except ValueError:
+        raise ParametroInvalido('Parâmetros de paginação inválidos')
+
+    if limite < 1:
+        raise ParametroInvalido('Parâmetros de paginação inválidos')
+
+    # Busca por substring (FTS5 trigram, com LIKE como alternativa), em
+    # ordem de ator e, dentro de cada ator, ano_inicio DESC, titulo. A chave
+    # da ordem vira o cursor (keyset): a próxima página continua de onde
+    # esta parou sem OFFSET, e nunca são lidas mais que limite + 1 linhas.
+    query = '''
+        SELECT
+            a.id as ator_id,
+            a.nome as ator,
+            p.id as producao_id,
+            p.titulo,
+            p.tipo,
+            p.ano_inicio,
+            p.ano_fim,
+            e.personagem
+        FROM atores a
+        JOIN elenco e ON a.id = e.ator_id
+        JOIN producoes p ON e.producao_id = p.id
+        WHERE {filtro}
+    '''
+    parametros = ()
+    if posicao:
+        query += '''
+          AND (a.nome, a.id, -COALESCE(p.ano_inicio, -1), p.titulo, p.id) > (?, ?, ?, ?, ?)
+        '''
+        parametros = tuple(posicao)
+    query += '''
+        ORDER BY a.nome, a.id, -COALESCE(p.ano_inicio, -1), p.titulo, p.id
+        LIMIT ?
+    '''
+
+    cursor_sql = conn.cursor()
+    with prazo_busca(conn):
+        executar_busca_nome(cursor_sql, query, nome, parametros + (limite + 1,))
+        resultados = cursor_sql.fetchall()
+
+    proximo_cursor = None
+    if len(resultados) > limite:
+        resultados = resultados[:limite]
+        ultimo = resultados[-1]
+        proximo_cursor = codificar_cursor([
+            ultimo['ator'], ultimo['ator_id'],
+            -(ultimo['ano_inicio'] if ultimo['ano_inicio'] is not None else -1),
+            ultimo['titulo'], ultimo['producao_id'],
+        ])
+
+    # Agrupa as linhas consecutivas de cada ator
+    atores = []
+    for row in resultados:
+        if not atores or atores[-1]['id'] != row['ator_id']:
+            atores.append({'id': row['ator_id'], 'ator': row['ator'], 'producoes': []})
+        atores[-1]['producoes'].append(formatar_producao(row))
+
+    for grupo in atores:
+        del grupo['id']
+
+    resultado = {
+        'termo': nome,
+        'total': len(resultados),
+        'atores': atores,
+        'proximo_cursor': proximo_cursor
+    }
+    if not resultados and not posicao and aproximado is not None:
+        resultado['sugestoes'] = aproximado.sugerir(nome)
+    return resultado
+
+def buscar_lote(conn, nomes):
+    """
+    Resolve uma lista de nomes exatos (como numa ficha de elenco) numa única
+    consulta: os nomes normalizados entram como json_each e cada um é uma
+    leitura pela chave primária de filmografias (o mesmo corpo da busca
+    exata, já ordenado). O custo cresce com o número de nomes encontrados.
+
+    Retorna um resultado por nome, na ordem recebida, inclusive os não
+    encontrados (atores vazio). Bancos sem a tabela materializada montam os
+    atores com _lote_por_elenco.
+    """
+    if not isinstance(nomes, list) or not all(isinstance(nome, str) for nome in nomes):
+        raise ParametroInvalido('Envie {"nomes": [...]} com uma lista de nomes')
+    if len(nomes) > LIMITE_LOTE:
+        raise ParametroInvalido(f'Máximo de {LIMITE_LOTE} nomes por lote')
+
+    chave = normalizar_nome
+    try:
+        cursor = conn.execute(
+            'SELECT c.value, f.corpo FROM json_each(?) c '
+            'JOIN filmografias f ON f.nome_normalizado = c.value',
+            (json.dumps(sorted({chave(nome) for nome in nomes})),)
+        )
+        por_chave = {valor: json.loads(gzip.decompress(corpo))['atores'] for valor, corpo in cursor}
+    except sqlite3.OperationalError:
+        chave, por_chave = _lote_por_elenco(conn, nomes)
+
+    resultados = []
+    for nome in nomes:
+        atores = por_chave.get(chave(nome), [])
+        resultados.append({'nome': nome, 'encontrado': bool(atores), 'atores': atores})
+
+    return {
+        'total': len(resultados),
+        'encontrados': sum(resultado['encontrado'] for resultado in resultados),
+        'resultados': resultados
+    }
+
+def _lote_por_elenco(conn, nomes):
+    """
+    (função de chave, atores por chave) de buscar_lote direto de
+    atores/elenco/producoes, para bancos sem filmografias (ou sem a coluna
+    normalizada, quando o nome é comparado exato)
+    """
+    query = '''
+        SELECT
+            c.value as chave,
+            a.id as ator_id,
+            a.nome as ator,
+            p.id as producao_id,
+            p.titulo,
+            p.tipo,
+            p.ano_inicio,
+            p.ano_fim,
+            e.personagem
+        FROM json_each(?) c
+        JOIN atores a ON {coluna} = c.value
+        JOIN elenco e ON a.id = e.ator_id
+        JOIN producoes p ON e.producao_id = p.id
+        ORDER BY a.nome, a.id, -COALESCE(p.ano_inicio, -1), p.titulo, p.id
+    '''
+    try:
+        chave = normalizar_nome
+        cursor = conn.execute(
+            query.format(coluna='a.nome_normalizado'),
+            (json.dumps(sorted({chave(nome) for nome in nomes})),)
+        )
+    except sqlite3.OperationalError:
+        chave = str.strip
+        cursor = conn.execute(
+            query.format(coluna='a.nome'),
+            (json.dumps(sorted({chave(nome) for nome in nomes})),)
+        )
+
+    # Atores de cada chave, com as linhas consecutivas de cada ator agrupadas
+    por_chave = {}
+    for row in cursor:
+        atores = por_chave.setdefault(row['chave'], [])
+        if not atores or atores[-1]['id'] != row['ator_id']:
+            atores.append({'id': row['ator_id'], 'ator': row['ator'], 'producoes': []})
+        atores[-1]['producoes'].append(formatar_producao(row))
+
+    for atores in por_chave.values():
+        for grupo in atores:
+            del grupo['id']
+    return chave, por_chave
+
+def buscar_titulos(conn, titulo):
+    """
+    Produções cujo título contém `titulo` (sem diferenciar acentos/caixa),
+    em ordem de título e ano, com o tamanho do elenco de cada uma
+    """
+    titulo = (titulo or '').strip()
+    if len(titulo) < 2:
+        raise ParametroInvalido('Digite pelo menos 2 caracteres para buscar')
+
+    cursor = conn.cursor()
+    with prazo_busca(conn):
+        executar_busca_titulo(cursor, f'''
+            SELECT
+                p.id,
+                p.titulo,
+                p.tipo,
+                p.ano_inicio,
+                p.ano_fim,
+                (SELECT COUNT(*) FROM elenco e WHERE e.producao_id = p.id) as total_elenco
+            FROM producoes p
+            WHERE {{filtro}}
+            ORDER BY p.titulo, p.ano_inicio, p.id
+            LIMIT {LIMITE_TITULOS}
+        ''', titulo)
+        linhas = cursor.fetchall()
+
+    producoes = [{
+        'id': row['id'],
+        'titulo': row['titulo'],
+        'tipo': row['tipo'],
+        'anos': formatar_anos(row),
+        'total_elenco': row['total_elenco'],
+    } for row in linhas]
+
+    return {'termo': titulo, 'total': len(producoes), 'producoes': producoes}
+
+def elenco_producao(conn, producao_id, cursor=None, limite=None, cache=None):
+    """
+    Dados da produção e uma página do elenco, em ordem de nome do ator.
+    `cursor` é o proximo_cursor da página anterior (keyset sobre nome e id
+    do ator) e `limite` o número de atores por página (máx. LIMITE_ELENCO).
+    Com `cache` (um CacheElencos), elencos grandes saem da memória.
+    """
+    try:
+        limite = min(int(limite or LIMITE_ELENCO), LIMITE_ELENCO)
+        posicao = decodificar_cursor(cursor, CAMPOS_CURSOR_ELENCO)
+    except ValueError:
+        raise ParametroInvalido('Parâmetros de paginação inválidos')
+
+    if limite < 1:
+        raise ParametroInvalido('Parâmetros de paginação inválidos')
+
+    completo = cache.obter(producao_id) if cache is not None else None
+    if completo is None:
+        versao = cache.versao() if cache is not None else None
+        producao = _dados_producao(conn, producao_id)
+        if cache is not None and producao['total_elenco'] >= cache.minimo:
+            completo = cache.guardar(
+                producao_id, producao, _linhas_elenco(conn, producao_id), versao
+            )
+
+    if completo is not None:
+        producao, linhas = completo.producao, completo.pagina(posicao, limite + 1)
+    else:
+        linhas = _linhas_elenco(conn, producao_id, posicao, limite + 1)
+
+    proximo_cursor = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo_cursor = codificar_cursor(list(linhas[-1][:2]))
+
+    return dict(
+        producao,
+        elenco=[
+            {'ator': ator, 'personagem': personagem or 'Não especificado'}
+            for ator, _, personagem in linhas
+        ],
+        proximo_cursor=proximo_cursor
+    )
+
+def _linhas_elenco(conn, producao_id, posicao=None, limite=None):
+    """(ator, ator_id, personagem) do elenco em ordem de nome, depois de `posicao`"""
+    query = '''
+        SELECT a.nome as ator, a.id as ator_id, e.personagem
+        FROM elenco e
+        JOIN atores a ON a.id = e.ator_id
+        WHERE e.producao_id = ?
+    '''
+    parametros = (producao_id,)
+    if posicao:
+        query += ' AND (a.nome, a.id) > (?, ?)'
+        parametros += tuple(posicao)
+    query += ' ORDER BY a.nome, a.id'
+    if limite is not None:
+        query += ' LIMIT ?'
+        parametros += (limite,)
+    return [tuple(row) for row in conn.execute(query, parametros)]
+
+def _dados_producao(conn, producao_id):
+    """Título, tipo, anos e tamanho do elenco; ProducaoNaoEncontrada se não existir"""
+    row = conn.execute('''
+        SELECT
+            p.id,
+            p.titulo,
+            p.tipo,
+            p.ano_inicio,
+            p.ano_fim,
+            (SELECT COUNT(*) FROM elenco e WHERE e.producao_id = p.id) as total_elenco
+        FROM producoes p
+        WHERE p.id = ?
+    ''', (producao_id,)).fetchone()
+    if row is None:
+        raise ProducaoNaoEncontrada(f'Produção não encontrada: {producao_id}')
+
+    return {
+        'id': row['id'],
+        'titulo': row['titulo'],
+        'tipo': row['tipo'],
+        'anos': formatar_anos(row),
+        'total_elenco': row['total_elenco'],
+    }
+
+def buscar_atores(conn, termo):
+    """Nomes de atores que contêm `termo` (ou os primeiros, sem termo)"""
+    termo = (termo or '').strip()
+    cursor = conn.cursor()
+
+    with prazo_busca(conn):
+        if termo and len(termo) >= 2:
+            executar_busca_nome(cursor, f'''
+                SELECT a.nome FROM atores a
+                WHERE {{filtro}}
+                ORDER BY a.nome
+                LIMIT {LIMITE_ATORES}
+            ''', termo)
+        else:
+            cursor.execute(f'SELECT nome FROM atores ORDER BY nome LIMIT {LIMITE_ATORES}')
+        linhas = cursor.fetchall()
+
+    return [row['nome'] for row in linhas]
+
+def contar_totais(conn):
+    """Estatísticas gerais do banco"""
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT COUNT(*) as total FROM atores')
+    total_atores = cursor.fetchone()['total']
+
+    cursor.execute('SELECT COUNT(*) as total FROM producoes')
+    total_producoes = cursor.fetchone()['total']
+
+    return {
+        'total_atores': total_atores,
+        'total_producoes': total_producoes
+    }
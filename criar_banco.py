@@ -7,6 +7,14 @@ Script para criar e popular o banco de dados de novelas/minisséries da Globo
 import sqlite3
 import json
 
+from carga_em_massa import carregar_producoes
+from esquema import (
+    adicionar_nome_normalizado, adicionar_titulo_normalizado, criar_indice_nomes,
+    criar_indice_titulos, criar_indices_cobertura, normalizar_nome
+)
+from filmografias import materializar
+from migracoes import migrar
+
 def criar_banco():
     """Cria as tabelas do banco de dados"""
     conn = sqlite3.connect('novelas_globo.db')
@@ -19,18 +27,26 @@ def criar_banco():
             titulo TEXT NOT NULL,
             tipo TEXT NOT NULL,
             ano_inicio INTEGER,
-            ano_fim INTEGER
+            ano_fim INTEGER,
+            titulo_normalizado TEXT
         )
     ''')
     
+    # Bancos criados antes da coluna normalizada recebem a coluna e o índice
+    adicionar_titulo_normalizado(conn)
+    
     # Tabela de atores
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS atores (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL UNIQUE
+            nome TEXT NOT NULL UNIQUE,
+            nome_normalizado TEXT
         )
     ''')
     
+    # Bancos criados antes da coluna normalizada recebem a coluna e o índice
+    adicionar_nome_normalizado(conn)
+    
     # Tabela de relacionamento (elenco)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS elenco (
@@ -45,8 +61,11 @@ def criar_banco():
     
     # Índices para melhorar performance de busca
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_atores_nome ON atores(nome)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_elenco_ator ON elenco(ator_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_elenco_producao ON elenco(producao_id)')
+    criar_indices_cobertura(conn)
+    
+    # Índices FTS5 trigram sobre nome e título normalizados (sincronizados por triggers)
+    if not (criar_indice_nomes(conn) and criar_indice_titulos(conn)):
+        print("⚠️  SQLite sem FTS5 - busca por nome e título usará LIKE")
     
     conn.commit()
     conn.close()
@@ -120,9 +139,10 @@ def importar_dados_exemplo():
     for producao in dados_exemplo:
         # Insere a produção
         cursor.execute('''
-            INSERT INTO producoes (titulo, tipo, ano_inicio, ano_fim)
-            VALUES (?, ?, ?, ?)
-        ''', (producao['titulo'], producao['tipo'], producao['ano_inicio'], producao['ano_fim']))
+            INSERT INTO producoes (titulo, tipo, ano_inicio, ano_fim, titulo_normalizado)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (producao['titulo'], producao['tipo'], producao['ano_inicio'], producao['ano_fim'],
+              normalizar_nome(producao['titulo'])))
         
         producao_id = cursor.lastrowid
         
@@ -130,8 +150,8 @@ def importar_dados_exemplo():
         for participacao in producao['elenco']:
             # Tenta inserir o ator (ou ignora se já existe)
             cursor.execute('''
-                INSERT OR IGNORE INTO atores (nome) VALUES (?)
-            ''', (participacao['ator'],))
+                INSERT OR IGNORE INTO atores (nome, nome_normalizado) VALUES (?, ?)
+            ''', (participacao['ator'], normalizar_nome(participacao['ator'])))
             
             # Busca o ID do ator
             cursor.execute('SELECT id FROM atores WHERE nome = ?', (participacao['ator'],))
@@ -143,7 +163,13 @@ def importar_dados_exemplo():
                 VALUES (?, ?, ?)
             ''', (ator_id, producao_id, participacao.get('personagem')))
     
+    # Respostas prontas da busca exata (ver filmografias.py)
+    materializar(conn)
+    
     conn.commit()
+    
+    # Versão do schema (user_version) e estatísticas do planejador
+    migrar(conn)
     conn.close()
     print("✓ Dados de exemplo importados com sucesso!")
 
@@ -170,35 +196,8 @@ def importar_de_json(arquivo_json):
         with open(arquivo_json, 'r', encoding='utf-8') as f:
             dados = json.load(f)
         
-        conn = sqlite3.connect('novelas_globo.db')
-        cursor = conn.cursor()
-        
-        for producao in dados:
-            # Insere a produção
-            cursor.execute('''
-                INSERT INTO producoes (titulo, tipo, ano_inicio, ano_fim)
-                VALUES (?, ?, ?, ?)
-            ''', (producao['titulo'], producao['tipo'], 
-                  producao.get('ano_inicio'), producao.get('ano_fim')))
-            
-            producao_id = cursor.lastrowid
-            
-            # Insere os atores e relacionamentos
-            for participacao in producao.get('elenco', []):
-                cursor.execute('''
-                    INSERT OR IGNORE INTO atores (nome) VALUES (?)
-                ''', (participacao['ator'],))
-                
-                cursor.execute('SELECT id FROM atores WHERE nome = ?', (participacao['ator'],))
-                ator_id = cursor.fetchone()[0]
-                
-                cursor.execute('''
-                    INSERT INTO elenco (ator_id, producao_id, personagem)
-                    VALUES (?, ?, ?)
-                ''', (ator_id, producao_id, participacao.get('personagem')))
-        
-        conn.commit()
-        conn.close()
+        total_producoes, total_participacoes = carregar_producoes(dados, 'novelas_globo.db')
+        print(f"  {total_producoes} produções • {total_participacoes} participações")
         print(f"✓ Dados importados de {arquivo_json} com sucesso!")
         
     except FileNotFoundError:
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache dos elencos grandes de /api/producao/<id>
+
+Produções com pelo menos `minimo` atores têm o elenco inteiro, já em ordem
+de nome, guardado na memória (LRU de `capacidade` produções); as páginas
+saem de uma busca binária pela chave do cursor, sem tocar no SQLite.
+Elencos pequenos continuam indo ao banco, onde a página é uma leitura curta
+do índice de elenco. Tudo é descartado quando o arquivo do banco muda.
+"""
+
+from bisect import bisect_right
+
+from cache_respostas import CacheVersionado
+from metricas import registro
+
+# O app copia acertos/faltas para estas séries ao servir /metrics
+registro.descrever('novelas_cache_elencos_acertos_total', 'counter', 'Acertos do cache de elencos')
+registro.descrever('novelas_cache_elencos_faltas_total', 'counter', 'Faltas do cache de elencos')
+
+class ElencoCompleto:
+    """Dados da produção e o elenco inteiro como (ator, ator_id, personagem)"""
+    __slots__ = ('producao', 'linhas', '_chaves')
+
+    def __init__(self, producao, linhas):
+        self.producao = producao
+        self.linhas = linhas
+        self._chaves = [(ator, ator_id) for ator, ator_id, _ in linhas]
+
+    def pagina(self, posicao, quantidade):
+        """Até `quantidade` linhas depois da chave (ator, ator_id) do cursor"""
+        inicio = bisect_right(self._chaves, tuple(posicao)) if posicao else 0
+        return self.linhas[inicio:inicio + quantidade]
+
+class CacheElencos(CacheVersionado):
+    """LRU de ElencoCompleto por id de produção"""
+
+    def __init__(self, db_path, capacidade=256, minimo=50):
+        super().__init__(db_path, capacidade)
+        self.minimo = minimo
+
+    def guardar(self, producao_id, producao, linhas, versao=None):
+        """Guarda o elenco e retorna o ElencoCompleto (só retorna se `versao` ficou velha)"""
+        return self._guardar(producao_id, ElencoCompleto(producao, linhas), versao)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estruturas de busca compartilhadas por criar_banco.py, importar_elencos.py e app.py
+
+Nomes de atores e títulos de produções têm cada um uma coluna normalizada
+(atores.nome_normalizado, producoes.titulo_normalizado) com índice B-tree e
+um índice FTS5 trigram para busca por substring. O elenco tem índices de
+cobertura nas duas direções (INDICES_COBERTURA).
+
+Uso avulso (atualiza um banco já existente com as colunas normalizadas e os índices):
+    python esquema.py [novelas_globo.db]
+"""
+
+import sqlite3
+import sys
+import unicodedata
+
+# Elenco nas duas direções sem voltar à tabela: ator -> produções
+# (filmografias, lote) e produção -> atores (elencos, total_elenco).
+# Substituem idx_elenco_ator e idx_elenco_producao, que são prefixos deles.
+INDICES_COBERTURA = (
+    'CREATE INDEX IF NOT EXISTS idx_elenco_ator_cobertura ON elenco(ator_id, producao_id, personagem)',
+    'CREATE INDEX IF NOT EXISTS idx_elenco_producao_cobertura ON elenco(producao_id, ator_id, personagem)',
+)
+INDICES_SUBSTITUIDOS = ('idx_elenco_ator', 'idx_elenco_producao')
+
+def normalizar_nome(texto):
+    """
+    Chave de busca de um nome: sem acentos, casefold e espaços colapsados.
+    'ANTÔNIO  FAGUNDES' -> 'antonio fagundes'
+    """
+    if not texto.isascii():
+        decomposto = unicodedata.normalize('NFKD', texto)
+        texto = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(texto.casefold().split())
+
+def adicionar_nome_normalizado(conn):
+    """
+    Garante a coluna atores.nome_normalizado (e seu índice) em bancos criados
+    antes dela, preenchendo as linhas que ainda não têm a chave.
+    """
+    cursor = conn.cursor()
+    colunas = [row[1] for row in cursor.execute('PRAGMA table_info(atores)')]
+    if 'nome_normalizado' not in colunas:
+        cursor.execute('ALTER TABLE atores ADD COLUMN nome_normalizado TEXT')
+
+    pendentes = cursor.execute(
+        'SELECT id, nome FROM atores WHERE nome_normalizado IS NULL'
+    ).fetchall()
+    cursor.executemany(
+        'UPDATE atores SET nome_normalizado = ? WHERE id = ?',
+        [(normalizar_nome(nome), ator_id) for ator_id, nome in pendentes]
+    )
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_atores_nome_normalizado ON atores(nome_normalizado)')
+
+def adicionar_titulo_normalizado(conn):
+    """Como adicionar_nome_normalizado, para producoes.titulo_normalizado"""
+    cursor = conn.cursor()
+    colunas = [row[1] for row in cursor.execute('PRAGMA table_info(producoes)')]
+    if 'titulo_normalizado' not in colunas:
+        cursor.execute('ALTER TABLE producoes ADD COLUMN titulo_normalizado TEXT')
+
+    pendentes = cursor.execute(
+        'SELECT id, titulo FROM producoes WHERE titulo_normalizado IS NULL'
+    ).fetchall()
+    cursor.executemany(
+        'UPDATE producoes SET titulo_normalizado = ? WHERE id = ?',
+        [(normalizar_nome(titulo), producao_id) for producao_id, titulo in pendentes]
+    )
+
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_producoes_titulo_normalizado ON producoes(titulo_normalizado)'
+    )
+
+def criar_indices_cobertura(conn):
+    """Cria INDICES_COBERTURA e remove os índices de uma coluna que eles substituem"""
+    for sql in INDICES_COBERTURA:
+        conn.execute(sql)
+    for nome in INDICES_SUBSTITUIDOS:
+        conn.execute(f'DROP INDEX IF EXISTS {nome}')
+
+def fts5_disponivel(conn):
+    """Verifica se o SQLite em uso tem FTS5 com o tokenizer trigram"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.teste_fts5 USING fts5(x, tokenize='trigram')")
+        conn.execute('DROP TABLE temp.teste_fts5')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def criar_indice_nomes(conn):
+    """
+    Cria a tabela FTS5 (trigram) sobre atores.nome_normalizado e os triggers
+    que a mantêm sincronizada com a tabela atores. Reconstrói o índice a partir
+    dos dados existentes, então pode ser chamada em bancos já populados.
+
+    Retorna False (sem alterar nada) se o SQLite não tiver FTS5; nesse caso o
+    app continua funcionando com LIKE.
+    """
+    if not fts5_disponivel(conn):
+        return False
+
+    cursor = conn.cursor()
+
+    # Índices criados antes da coluna normalizada indexavam atores.nome
+    definicao = cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'atores_fts'"
+    ).fetchone()
+    if definicao and 'nome_normalizado' not in definicao[0]:
+        for trigger in ('atores_fts_ai', 'atores_fts_ad', 'atores_fts_au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute('DROP TABLE atores_fts')
+
+    _criar_indice_fts(cursor, 'atores', 'nome_normalizado')
+    return True
+
+def criar_indice_titulos(conn):
+    """
+    Como criar_indice_nomes, para producoes.titulo_normalizado (producoes_fts).
+    Retorna False se o SQLite não tiver FTS5.
+    """
+    if not fts5_disponivel(conn):
+        return False
+
+    _criar_indice_fts(conn.cursor(), 'producoes', 'titulo_normalizado')
+    return True
+
+def _criar_indice_fts(cursor, tabela, coluna):
+    """Tabela FTS5 trigram <tabela>_fts sobre a coluna, triggers e rebuild"""
+    fts = f'{tabela}_fts'
+
+    # Tabela de conteúdo externo: o texto fica só na tabela, o FTS guarda os trigramas
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {coluna},
+            content='{tabela}',
+            content_rowid='id',
+            tokenize='trigram'
+        )
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabela} BEGIN
+            INSERT INTO {fts}(rowid, {coluna}) VALUES (new.id, new.{coluna});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabela} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {coluna})
+            VALUES ('delete', old.id, old.{coluna});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabela} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {coluna})
+            VALUES ('delete', old.id, old.{coluna});
+            INSERT INTO {fts}(rowid, {coluna}) VALUES (new.id, new.{coluna});
+        END
+    ''')
+
+    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+def otimizar_indice_nomes(conn):
+    """Compacta os segmentos dos índices FTS depois de uma importação grande"""
+    for fts in ('atores_fts', 'producoes_fts'):
+        try:
+            conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+        except sqlite3.OperationalError:
+            pass
+
+def frase_fts(termo):
+    """
+    Converte o termo (já normalizado) em uma frase FTS5 literal. Com o tokenizer
+    trigram, uma frase casa com qualquer nome que contenha o termo como
+    substring (equivalente a LIKE '%termo%', mas usando o índice).
+    """
+    return '"' + termo.replace('"', '""') + '"'
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'novelas_globo.db'
+
+    conn = sqlite3.connect(db_path)
+    adicionar_nome_normalizado(conn)
+    adicionar_titulo_normalizado(conn)
+    print(f"✓ Colunas nome_normalizado e titulo_normalizado preenchidas em {db_path}")
+
+    if criar_indice_nomes(conn) and criar_indice_titulos(conn):
+        print(f"✓ Índices FTS5 de nomes e títulos criados em {db_path}")
+    else:
+        print("⚠️  SQLite sem suporte a FTS5 - buscas continuarão usando LIKE")
+
+    conn.commit()
+    conn.close()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportação em streaming do mapeamento ator -> produção (NDJSON ou CSV)
+
+As linhas são lidas de um cursor do SQLite em lotes e entregues por um
+gerador, então a resposta começa imediatamente e a memória não cresce com
+o tamanho do banco. A consulta percorre elenco por um índice que começa
+em ator_id (o UNIQUE(ator_id, producao_id) ou idx_elenco_ator_cobertura,
+ver esquema.INDICES_COBERTURA), o que dá a ordem por ator sem precisar
+ordenar tudo antes da primeira linha.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from conexoes import abrir_conexao_leitura
+
+FORMATOS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+COLUNAS = ['ator_id', 'ator', 'producao_id', 'titulo', 'tipo', 'ano_inicio', 'ano_fim', 'personagem']
+
+TAMANHO_LOTE = 1000
+
+def montar_consulta(tipo=None, ano_de=None, ano_ate=None):
+    """Retorna (sql, parâmetros) da exportação com os filtros informados"""
+    condicoes = []
+    parametros = []
+
+    if tipo:
+        condicoes.append('p.tipo = ?')
+        parametros.append(tipo)
+    if ano_de is not None:
+        condicoes.append('p.ano_inicio >= ?')
+        parametros.append(ano_de)
+    if ano_ate is not None:
+        condicoes.append('p.ano_inicio <= ?')
+        parametros.append(ano_ate)
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+    sql = f'''
+        SELECT
+            a.id AS ator_id,
+            a.nome AS ator,
+            p.id AS producao_id,
+            p.titulo,
+            p.tipo,
+            p.ano_inicio,
+            p.ano_fim,
+            e.personagem
+        FROM elenco e
+        JOIN atores a ON a.id = e.ator_id
+        JOIN producoes p ON p.id = e.producao_id
+        {where}
+        ORDER BY e.ator_id
+    '''
+    return sql, parametros
+
+def _linhas_ndjson(lote):
+    return ''.join(
+        json.dumps(dict(zip(COLUNAS, row)), ensure_ascii=False) + '\n'
+        for row in lote
+    )
+
+def _linhas_csv(lote, cabecalho=False):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    if cabecalho:
+        escritor.writerow(COLUNAS)
+    escritor.writerows(lote)
+    return buffer.getvalue()
+
+def gerar_exportacao(db_path, formato='ndjson', gzip=False, abrir_conexao=None, **filtros):
+    """
+    Gerador de blocos de bytes com a exportação completa.
+
+    Abre uma conexão própria (a resposta continua depois do fim da
+    requisição que a criou) e a fecha ao terminar ou se o cliente desistir.
+    `abrir_conexao` (ex.: PoolConexoes.abrir, para ler da cópia em memória)
+    substitui a conexão direta ao arquivo.
+    """
+    sql, parametros = montar_consulta(**filtros)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    conn = abrir_conexao() if abrir_conexao else abrir_conexao_leitura(db_path)
+    conn.row_factory = None
+    try:
+        cursor = conn.execute(sql, parametros)
+
+        if formato == 'csv':
+            blocos = [_linhas_csv([], cabecalho=True)]
+            formatar = _linhas_csv
+        else:
+            blocos = []
+            formatar = _linhas_ndjson
+
+        while True:
+            lote = cursor.fetchmany(TAMANHO_LOTE)
+            if not lote:
+                break
+            blocos.append(formatar(lote))
+
+            dados = ''.join(blocos).encode('utf-8')
+            blocos = []
+            if compressor:
+                dados = compressor.compress(dados)
+            if dados:
+                yield dados
+
+        dados = ''.join(blocos).encode('utf-8')
+        if compressor:
+            dados = compressor.compress(dados) + compressor.flush()
+        if dados:
+            yield dados
+    finally:
+        conn.close()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Filmografias materializadas: a resposta de /api/buscar?exato=1 já pronta
+
+A importação grava na tabela filmografias, para cada nome normalizado, o
+JSON de todos os atores com esse nome (produções já ordenadas e formatadas,
+serializadas como o jsonify), comprimido com gzip. A busca exata é uma
+leitura pela chave primária: os bytes vão direto para a resposta com
+Content-Encoding: gzip, ou só descomprimidos se o cliente não aceita gzip.
+O lote (consultas.buscar_lote) lê as mesmas linhas e usa os atores do corpo.
+
+A tabela é derivada de atores/elenco/producoes: carga_em_massa.py e
+importacao_incremental.py chamam materializar() com os nomes afetados.
+
+Uso avulso (materializa num banco já existente):
+    python filmografias.py [novelas_globo.db]
+"""
+
+import gzip
+import json
+import sqlite3
+import sys
+
+from consultas import formatar_producao
+from esquema import normalizar_nome
+
+CONSULTA_FILMOGRAFIAS = '''
+    SELECT
+        a.nome_normalizado as chave,
+        a.id as ator_id,
+        a.nome as ator,
+        p.titulo,
+        p.tipo,
+        p.ano_inicio,
+        p.ano_fim,
+        e.personagem
+    FROM atores a
+    JOIN elenco e ON a.id = e.ator_id
+    JOIN producoes p ON e.producao_id = p.id
+    {filtro}
+    ORDER BY a.nome_normalizado, a.nome, a.id, -COALESCE(p.ano_inicio, -1), p.titulo, p.id
+'''
+
+def criar_tabela(conn):
+    """Tabela chave -> corpo gzip; sem rowid, a chave primária é a própria B-tree"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS filmografias (
+            nome_normalizado TEXT PRIMARY KEY,
+            corpo BLOB NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+def serializar(chave, atores, nivel=9):
+    """
+    Corpo gzip da resposta de /api/buscar?exato=1 para a chave. Mesma
+    serialização do jsonify (chaves ordenadas, sem espaços, \\n no fim) e
+    mtime zerado no gzip, então o mesmo conteúdo dá sempre os mesmos bytes.
+    """
+    corpo = json.dumps({
+        'termo': chave,
+        'total': sum(len(grupo['producoes']) for grupo in atores),
+        'atores': atores,
+        'proximo_cursor': None,
+    }, sort_keys=True, separators=(',', ':')).encode('utf-8') + b'\n'
+    return gzip.compress(corpo, compresslevel=nivel, mtime=0)
+
+def _agrupar(linhas):
+    """Gera (chave, atores) a partir das linhas de CONSULTA_FILMOGRAFIAS"""
+    chave = None
+    atores = []
+    for row in linhas:
+        if row['chave'] != chave:
+            if atores:
+                yield chave, atores
+            chave, atores = row['chave'], []
+        if not atores or atores[-1]['id'] != row['ator_id']:
+            atores.append({'id': row['ator_id'], 'ator': row['ator'], 'producoes': []})
+        atores[-1]['producoes'].append(formatar_producao(row))
+    if atores:
+        yield chave, atores
+
+def _filmografias(conn, chaves=None, nivel=9):
+    """(chave, corpo gzip) de cada nome em `chaves` que tem produções (ou de todos)"""
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    if chaves is None:
+        cursor.execute(CONSULTA_FILMOGRAFIAS.format(filtro=''))
+    else:
+        cursor.execute(
+            CONSULTA_FILMOGRAFIAS.format(
+                filtro='WHERE a.nome_normalizado IN (SELECT value FROM json_each(?))'
+            ),
+            (json.dumps(sorted(chaves)),)
+        )
+    for chave, atores in _agrupar(cursor):
+        for grupo in atores:
+            del grupo['id']
+        yield chave, serializar(chave, atores, nivel)
+
+def materializar(conn, chaves=None):
+    """
+    Regrava as filmografias dos nomes normalizados em `chaves` (todas, se
+    None) dentro da transação de `conn`. Nomes que ficaram sem produções
+    saem da tabela. Num banco que ainda não tinha a tabela, materializa
+    todas. Retorna o número de linhas gravadas.
+    """
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'filmografias'").fetchone():
+        chaves = None
+    criar_tabela(conn)
+    if chaves is None:
+        conn.execute('DELETE FROM filmografias')
+    else:
+        chaves = set(chaves)
+        conn.executemany(
+            'DELETE FROM filmografias WHERE nome_normalizado = ?',
+            [(chave,) for chave in chaves]
+        )
+
+    cursor = conn.cursor()
+    cursor.executemany(
+        'INSERT INTO filmografias (nome_normalizado, corpo) VALUES (?, ?)',
+        _filmografias(conn, chaves)
+    )
+    return cursor.rowcount
+
+def filmografia_exata(conn, nome):
+    """
+    Corpo gzip da filmografia de quem tem exatamente `nome` (sem diferenciar
+    acentos/caixa), ou None se não houver ninguém. Bancos sem a tabela
+    materializada montam o mesmo corpo na hora.
+    """
+    chave = normalizar_nome(nome or '')
+    if not chave:
+        return None
+    try:
+        row = conn.execute(
+            'SELECT corpo FROM filmografias WHERE nome_normalizado = ?', (chave,)
+        ).fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        return next((corpo for _, corpo in _filmografias(conn, [chave], nivel=1)), None)
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'novelas_globo.db'
+
+    conn = sqlite3.connect(db_path)
+    total = materializar(conn)
+    conn.commit()
+    conn.close()
+    print(f"✓ {total} filmografias materializadas em {db_path}")
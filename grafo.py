@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grafo em memória de atores e produções (quem trabalhou com quem)
+
+A tabela elenco é um grafo bipartido ator-produção. Na carga ele vira duas
+listas de adjacência compactas em formato CSR (arrays de inteiros):
+
+    producoes_do_ator[inicio_ator[a]:inicio_ator[a + 1]]
+    atores_da_producao[inicio_producao[p]:inicio_producao[p + 1]]
+
+com atores e produções renumerados de 0 em diante. As consultas percorrem
+só esses arrays, sem SQL: colegas de elenco de um ator contam as produções
+em comum, e a distância entre dois atores é uma busca em largura pelos
+dois lados ao mesmo tempo.
+"""
+
+import heapq
+from array import array
+from collections import Counter
+
+from conexoes import DerivadoDoBanco, abrir_somente_leitura
+from esquema import normalizar_nome
+
+# Caminhos com mais atores intermediários que isso não são procurados
+MAXIMO_GRAUS = 12
+
+LIMITE_COESTRELAS = 100
+
+class AtorNaoEncontrado(LookupError):
+    """Nenhum ator com esse nome no grafo"""
+
+class _Snapshot:
+    """Arrays de uma carga do grafo (trocados de uma vez na recarga)"""
+
+    def __init__(self, nomes, titulos, inicio_ator, producoes_do_ator,
+                 inicio_producao, atores_da_producao, por_chave):
+        self.nomes = nomes                            # nome por posição do ator
+        self.titulos = titulos                        # título por posição da produção
+        self.inicio_ator = inicio_ator
+        self.producoes_do_ator = producoes_do_ator
+        self.inicio_producao = inicio_producao
+        self.atores_da_producao = atores_da_producao
+        self.por_chave = por_chave                    # nome normalizado -> posição
+
+    def producoes(self, ator):
+        return self.producoes_do_ator[self.inicio_ator[ator]:self.inicio_ator[ator + 1]]
+
+    def atores(self, producao):
+        return self.atores_da_producao[self.inicio_producao[producao]:self.inicio_producao[producao + 1]]
+
+class GrafoElenco(DerivadoDoBanco):
+    """Grafo de coestrelas, recarregado quando o banco muda"""
+
+    def _montar(self):
+        """Lê atores, produções e elenco do banco e monta os arrays CSR"""
+        conn = abrir_somente_leitura(self.db_path)
+        try:
+            atores = conn.execute('SELECT id, nome FROM atores ORDER BY id').fetchall()
+            producoes = conn.execute('SELECT id, titulo FROM producoes ORDER BY id').fetchall()
+            # Na ordem do índice UNIQUE(ator_id, producao_id): já agrupado por ator
+            arestas = conn.execute(
+                'SELECT ator_id, producao_id FROM elenco ORDER BY ator_id, producao_id'
+            ).fetchall()
+        finally:
+            conn.close()
+
+        posicao_ator = {ator_id: i for i, (ator_id, _) in enumerate(atores)}
+        posicao_producao = {producao_id: i for i, (producao_id, _) in enumerate(producoes)}
+
+        # ator -> produções: as arestas vêm ordenadas por ator
+        inicio_ator = array('i', [0]) * (len(atores) + 1)
+        producoes_do_ator = array('i')
+        contagem_producao = array('i', [0]) * (len(producoes) + 1)
+        for ator_id, producao_id in arestas:
+            ator = posicao_ator.get(ator_id)
+            producao = posicao_producao.get(producao_id)
+            if ator is None or producao is None:
+                continue
+            inicio_ator[ator + 1] += 1
+            producoes_do_ator.append(producao)
+            contagem_producao[producao + 1] += 1
+
+        for i in range(len(atores)):
+            inicio_ator[i + 1] += inicio_ator[i]
+
+        # produção -> atores: ordenação por contagem a partir da lista acima
+        inicio_producao = contagem_producao
+        for i in range(len(producoes)):
+            inicio_producao[i + 1] += inicio_producao[i]
+        proxima = array('i', inicio_producao)
+        atores_da_producao = array('i', [0]) * len(producoes_do_ator)
+        for ator in range(len(atores)):
+            for producao in producoes_do_ator[inicio_ator[ator]:inicio_ator[ator + 1]]:
+                atores_da_producao[proxima[producao]] = ator
+                proxima[producao] += 1
+
+        # Nomes que normalizam igual ficam com o ator de mais produções
+        por_chave = {}
+        for ator, (_, nome) in enumerate(atores):
+            chave = normalizar_nome(nome)
+            anterior = por_chave.get(chave)
+            grau = inicio_ator[ator + 1] - inicio_ator[ator]
+            if anterior is None or grau > inicio_ator[anterior + 1] - inicio_ator[anterior]:
+                por_chave[chave] = ator
+
+        return _Snapshot(
+            [nome for _, nome in atores], [titulo for _, titulo in producoes],
+            inicio_ator, producoes_do_ator, inicio_producao, atores_da_producao,
+            por_chave
+        )
+
+    def _localizar(self, snapshot, nome):
+        ator = snapshot.por_chave.get(normalizar_nome(nome or ''))
+        if ator is None:
+            raise AtorNaoEncontrado(f'Ator não encontrado: {nome}')
+        return ator
+
+    def coestrelas(self, nome, limite=20):
+        """
+        Atores que trabalharam com `nome` (nome exato, sem acentos/caixa),
+        dos com mais para os com menos produções em comum.
+        """
+        snapshot = self.atual()
+        ator = self._localizar(snapshot, nome)
+
+        em_comum = Counter()
+        for producao in snapshot.producoes(ator):
+            em_comum.update(snapshot.atores(producao))
+        del em_comum[ator]
+
+        melhores = heapq.nsmallest(
+            min(limite, LIMITE_COESTRELAS), em_comum.items(),
+            key=lambda item: (-item[1], snapshot.nomes[item[0]])
+        )
+        return {
+            'ator': snapshot.nomes[ator],
+            'total': len(em_comum),
+            'coestrelas': [
+                {'ator': snapshot.nomes[outro], 'producoes_em_comum': total}
+                for outro, total in melhores
+            ]
+        }
+
+    def caminho(self, origem, destino):
+        """
+        Menor cadeia de atores ligando `origem` a `destino`, cada par
+        consecutivo por uma produção em comum. graus é o número de produções
+        no caminho (None se não houver caminho com até MAXIMO_GRAUS).
+        """
+        snapshot = self.atual()
+        inicio = self._localizar(snapshot, origem)
+        fim = self._localizar(snapshot, destino)
+
+        resposta = {'de': snapshot.nomes[inicio], 'para': snapshot.nomes[fim],
+                    'graus': None, 'atores': [], 'producoes': []}
+
+        encontro = _busca_bidirecional(snapshot, inicio, fim)
+        if encontro is None:
+            return resposta
+
+        atores, producoes = encontro
+        resposta['graus'] = len(producoes)
+        resposta['atores'] = [snapshot.nomes[a] for a in atores]
+        resposta['producoes'] = [snapshot.titulos[p] for p in producoes]
+        return resposta
+
+def _busca_bidirecional(snapshot, inicio, fim):
+    """
+    Busca em largura alternando os lados (sempre o de fronteira menor), por
+    níveis inteiros. Cada lado expande uma produção no máximo uma vez. Retorna
+    (atores, produções) do caminho ou None.
+    """
+    if inicio == fim:
+        return [inicio], []
+
+    # pais[lado][ator] = (ator anterior, produção que os liga, distância)
+    pais = ({inicio: (None, None, 0)}, {fim: (None, None, 0)})
+    expandidas = (set(), set())
+    fronteiras = ([inicio], [fim])
+    graus = 0
+
+    while fronteiras[0] and fronteiras[1] and graus < MAXIMO_GRAUS:
+        lado = 0 if len(fronteiras[0]) <= len(fronteiras[1]) else 1
+        meus, outros = pais[lado], pais[1 - lado]
+        proxima = []
+        encontros = []
+
+        for ator in fronteiras[lado]:
+            distancia = meus[ator][2] + 1
+            for producao in snapshot.producoes(ator):
+                if producao in expandidas[lado]:
+                    continue
+                expandidas[lado].add(producao)
+                for vizinho in snapshot.atores(producao):
+                    if vizinho in meus:
+                        continue
+                    meus[vizinho] = (ator, producao, distancia)
+                    if vizinho in outros:
+                        encontros.append(vizinho)
+                    proxima.append(vizinho)
+
+        if encontros:
+            meio = min(encontros, key=lambda a: pais[0][a][2] + pais[1][a][2])
+            return _montar_caminho(pais, meio)
+
+        fronteiras = (proxima, fronteiras[1]) if lado == 0 else (fronteiras[0], proxima)
+        graus += 1
+
+    return None
+
+def _montar_caminho(pais, meio):
+    atores = [meio]
+    producoes = []
+    ator = meio
+    while pais[0][ator][0] is not None:
+        ator, producao, _ = pais[0][ator]
+        atores.insert(0, ator)
+        producoes.insert(0, producao)
+
+    ator = meio
+    while pais[1][ator][0] is not None:
+        ator, producao, _ = pais[1][ator]
+        atores.append(ator)
+        producoes.append(producao)
+
+    return atores, producoes
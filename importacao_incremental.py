@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reimportação incremental com hash por produção e troca atômica do banco
+
+Cada produção extraída recebe uma chave (título, tipo, ano e ocorrência) e
+um hash do conteúdo. A importação compara com os hashes gravados na última
+vez e só mexe no que mudou: produções novas são inseridas, alteradas têm o
+elenco regravado e as que sumiram do arquivo são removidas (junto com atores
+que ficaram sem nenhuma produção). As filmografias materializadas
+(filmografias.py) são regravadas só para os atores envolvidos.
+
+Tudo é feito numa cópia do banco (<banco>.novo), migrada para a versão
+atual do schema (migracoes.py), que depois substitui o original com
+os.replace. Quem já está lendo continua no arquivo antigo até
+reabrir; o app nunca vê um banco pela metade.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+from esquema import adicionar_titulo_normalizado, normalizar_nome
+from filmografias import materializar
+from migracoes import migrar
+
+SUFIXO_NOVO = '.novo'
+
+def chave_producao(producao, ocorrencia):
+    """Identidade estável da produção entre importações"""
+    return json.dumps(
+        [producao['titulo'], producao['tipo'], producao.get('ano_inicio'), ocorrencia],
+        ensure_ascii=False
+    )
+
+def _elenco_canonico(elenco):
+    """Elenco sem repetições (fica a primeira), em ordem de nome: a ordem não é gravada no banco"""
+    vistos = {}
+    for participacao in elenco:
+        vistos.setdefault(participacao['ator'], participacao.get('personagem'))
+    return sorted(vistos.items())
+
+def hash_producao(producao):
+    """Hash do conteúdo que o banco guarda de uma produção"""
+    conteudo = json.dumps([
+        producao['titulo'], producao['tipo'],
+        producao.get('ano_inicio'), producao.get('ano_fim'),
+        _elenco_canonico(producao.get('elenco', [])),
+    ], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def chaves_e_hashes(producoes):
+    """Gera (chave, hash, produção) numerando títulos repetidos na ordem do arquivo"""
+    ocorrencias = {}
+    for producao in producoes:
+        identidade = (producao['titulo'], producao['tipo'], producao.get('ano_inicio'))
+        ocorrencia = ocorrencias.get(identidade, 0)
+        ocorrencias[identidade] = ocorrencia + 1
+        yield chave_producao(producao, ocorrencia), hash_producao(producao), producao
+
+def _criar_tabela_hashes(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS importacao_hashes (
+            chave TEXT PRIMARY KEY,
+            producao_id INTEGER NOT NULL,
+            hash TEXT NOT NULL
+        )
+    ''')
+
+def _estado_gravado(cursor):
+    """
+    {chave: (producao_id, hash)} da última importação. Num banco que ainda
+    não tem hashes (criado pela importação completa), calcula-os uma vez a
+    partir do conteúdo atual.
+    """
+    estado = {
+        chave: (producao_id, hash_gravado)
+        for chave, producao_id, hash_gravado
+        in cursor.execute('SELECT chave, producao_id, hash FROM importacao_hashes')
+    }
+    if estado or not cursor.execute('SELECT 1 FROM producoes LIMIT 1').fetchone():
+        return estado
+
+    elencos = {}
+    for producao_id, ator, personagem in cursor.execute('''
+        SELECT e.producao_id, a.nome, e.personagem
+        FROM elenco e JOIN atores a ON a.id = e.ator_id
+        ORDER BY e.id
+    '''):
+        elencos.setdefault(producao_id, []).append({'ator': ator, 'personagem': personagem})
+
+    producoes = []
+    ids = []
+    for producao_id, titulo, tipo, ano_inicio, ano_fim in cursor.execute(
+        'SELECT id, titulo, tipo, ano_inicio, ano_fim FROM producoes ORDER BY id'
+    ).fetchall():
+        ids.append(producao_id)
+        producoes.append({
+            'titulo': titulo, 'tipo': tipo, 'ano_inicio': ano_inicio, 'ano_fim': ano_fim,
+            'elenco': elencos.get(producao_id, [])
+        })
+
+    for producao_id, (chave, hash_atual, _) in zip(ids, chaves_e_hashes(producoes)):
+        estado[chave] = (producao_id, hash_atual)
+
+    cursor.executemany(
+        'INSERT INTO importacao_hashes (chave, producao_id, hash) VALUES (?, ?, ?)',
+        [(chave, producao_id, hash_atual) for chave, (producao_id, hash_atual) in estado.items()]
+    )
+    return estado
+
+def _id_ator(cursor, nome):
+    cursor.execute('INSERT OR IGNORE INTO atores (nome, nome_normalizado) VALUES (?, ?)',
+                   (nome, normalizar_nome(nome)))
+    return cursor.execute('SELECT id FROM atores WHERE nome = ?', (nome,)).fetchone()[0]
+
+def _gravar_elenco(cursor, producao_id, producao):
+    for participacao in producao.get('elenco', []):
+        cursor.execute('''
+            INSERT OR IGNORE INTO elenco (ator_id, producao_id, personagem)
+            VALUES (?, ?, ?)
+        ''', (_id_ator(cursor, participacao['ator']), producao_id, participacao.get('personagem')))
+
+def _remover_elenco(cursor, producao_id):
+    """Apaga o elenco da produção e retorna os ids dos atores afetados"""
+    atores = [row[0] for row in cursor.execute(
+        'SELECT ator_id FROM elenco WHERE producao_id = ?', (producao_id,)
+    )]
+    cursor.execute('DELETE FROM elenco WHERE producao_id = ?', (producao_id,))
+    return atores
+
+def aplicar_diferencas(conn, producoes):
+    """
+    Atualiza o banco aberto em `conn` para refletir `producoes`, tocando só
+    nas produções que mudaram. Retorna a contagem de cada tipo de mudança.
+    """
+    cursor = conn.cursor()
+    _criar_tabela_hashes(cursor)
+    # Bancos anteriores ao título normalizado ganham a coluna antes da importação
+    adicionar_titulo_normalizado(conn)
+    gravado = _estado_gravado(cursor)
+
+    contagem = {'novas': 0, 'alteradas': 0, 'removidas': 0, 'inalteradas': 0}
+    atores_afetados = set()
+    nomes_afetados = set()
+    vistas = set()
+
+    for chave, hash_atual, producao in chaves_e_hashes(producoes):
+        vistas.add(chave)
+        anterior = gravado.get(chave)
+
+        if anterior and anterior[1] == hash_atual:
+            contagem['inalteradas'] += 1
+            continue
+
+        if anterior:
+            producao_id = anterior[0]
+            cursor.execute('''
+                UPDATE producoes SET titulo = ?, tipo = ?, ano_inicio = ?, ano_fim = ?,
+                                     titulo_normalizado = ?
+                WHERE id = ?
+            ''', (producao['titulo'], producao['tipo'],
+                  producao.get('ano_inicio'), producao.get('ano_fim'),
+                  normalizar_nome(producao['titulo']), producao_id))
+            atores_afetados.update(_remover_elenco(cursor, producao_id))
+            contagem['alteradas'] += 1
+        else:
+            cursor.execute('''
+                INSERT INTO producoes (titulo, tipo, ano_inicio, ano_fim, titulo_normalizado)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (producao['titulo'], producao['tipo'],
+                  producao.get('ano_inicio'), producao.get('ano_fim'),
+                  normalizar_nome(producao['titulo'])))
+            producao_id = cursor.lastrowid
+            contagem['novas'] += 1
+
+        _gravar_elenco(cursor, producao_id, producao)
+        nomes_afetados.update(participacao['ator'] for participacao in producao.get('elenco', []))
+        cursor.execute('''
+            INSERT OR REPLACE INTO importacao_hashes (chave, producao_id, hash)
+            VALUES (?, ?, ?)
+        ''', (chave, producao_id, hash_atual))
+
+    for chave, (producao_id, _) in gravado.items():
+        if chave in vistas:
+            continue
+        atores_afetados.update(_remover_elenco(cursor, producao_id))
+        cursor.execute('DELETE FROM producoes WHERE id = ?', (producao_id,))
+        cursor.execute('DELETE FROM importacao_hashes WHERE chave = ?', (chave,))
+        contagem['removidas'] += 1
+
+    chaves = {normalizar_nome(nome) for nome in nomes_afetados}
+    chaves.update(
+        chave for (chave,) in cursor.execute(
+            'SELECT nome_normalizado FROM atores WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps(sorted(atores_afetados)),)
+        )
+    )
+
+    # Atores que ficaram sem nenhuma produção
+    cursor.executemany('''
+        DELETE FROM atores
+        WHERE id = ? AND NOT EXISTS (SELECT 1 FROM elenco WHERE ator_id = atores.id)
+    ''', [(ator_id,) for ator_id in atores_afetados])
+
+    materializar(conn, chaves)
+    return contagem
+
+def copiar_banco(origem, destino):
+    """Copia um banco (mesmo em uso) com a API de backup do SQLite"""
+    if os.path.exists(destino):
+        os.remove(destino)
+    fonte = sqlite3.connect(origem)
+    copia = sqlite3.connect(destino)
+    try:
+        fonte.backup(copia)
+    finally:
+        fonte.close()
+        copia.close()
+
+def trocar_banco(novo, db_path):
+    """
+    Substitui o banco em uso pelo arquivo `novo`, atomicamente. O novo arquivo
+    fica em journal DELETE (sem -wal) e é sincronizado em disco antes da troca.
+    """
+    conn = sqlite3.connect(novo)
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.close()
+
+    fd = os.open(novo, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    os.replace(novo, db_path)
+
+def importar_incremental(producoes, db_path, criar_banco_vazio=None):
+    """
+    Aplica `producoes` ao banco `db_path` numa cópia e troca o arquivo no fim.
+    `criar_banco_vazio(caminho)` cria o schema quando o banco ainda não existe
+    (ex.: importar_elencos.criar_banco_limpo); sem ela, o banco tem de existir.
+    """
+    novo = db_path + SUFIXO_NOVO
+    if os.path.exists(db_path):
+        copiar_banco(db_path, novo)
+    elif criar_banco_vazio is None:
+        raise ValueError(f'{db_path} não existe: passe criar_banco_vazio para criar o schema')
+    else:
+        criar_banco_vazio(novo)
+
+    conn = sqlite3.connect(novo)
+    try:
+        contagem = aplicar_diferencas(conn, list(producoes))
+        conn.commit()
+        # Como na importação completa: o banco trocado já sai na versão atual
+        # do schema (e com ANALYZE, se nunca teve)
+        migrar(conn)
+    except BaseException:
+        conn.close()
+        os.remove(novo)
+        raise
+    conn.close()
+
+    trocar_banco(novo, db_path)
+    return contagem
@@ -4,22 +4,16 @@
 PARSER FINAL COMPLETO - Detecta TODOS os formatos do RTF
 """
 
-import re
 import sqlite3
 import os
+import sys
 
-def decodificar_rtf_char(match):
-    codigo = match.group(1)
-    try:
-        return bytes.fromhex(codigo).decode('latin1')
-    except:
-        return '?'
-
-def limpar_texto_rtf(texto):
-    texto = re.sub(r"\\'([0-9a-fA-F]{2})", decodificar_rtf_char, texto)
-    texto = re.sub(r'\\[a-z]+\d*\s?', '', texto)
-    texto = re.sub(r'[{}]', '', texto)
-    return texto.strip()
+from carga_em_massa import carregar_producoes
+from esquema import criar_indice_nomes, criar_indice_titulos, criar_indices_cobertura
+from importacao_incremental import SUFIXO_NOVO, importar_incremental, trocar_banco
+from indice_binario import caminho_indice, gerar_indice
+from migracoes import migrar
+from parser_rtf import iterar_producoes, limpar_texto_rtf  # noqa: F401 (limpar_texto_rtf: compatibilidade)
 
 def extrair_elencos_completo(arquivo_rtf):
     """
@@ -28,114 +22,17 @@ def extrair_elencos_completo(arquivo_rtf):
     FORMATO 1 (maioria): \\b TITULO\\par ... de/direção ... \\par\\par ELENCO
     FORMATO 2 (raros): \\b TITULO\\par\\par\\b0 ELENCO  
     FORMATO 3 (sem créditos): \\b TITULO\\par\\b0 ELENCO
-    """
     
-    with open(arquivo_rtf, 'r', encoding='latin1', errors='ignore') as f:
-        conteudo = f.read()
+    O arquivo é lido em streaming por parser_rtf.iterar_producoes; para
+    processar produções sem montar a lista inteira, use o gerador direto.
+    """
     
     producoes = []
     erros = []
     
-    blocos = re.split(r'\\b\s+', conteudo)
-    
-    palavras_credito = {
-        'de', 'direção', 'direcao', 'colaboração', 'colaboracao',
-        'diretor', 'diretores', 'autor', 'autores',
-        'roteiro', 'roteirista', 'roteiristas',
-        'adaptação', 'adaptacao', 'baseado',
-        'supervisão', 'supervisao', 'produtor', 'produtores',
-        'producao', 'produção', 'cenografia', 'figurino',
-        'trilha', 'sonora', 'abertura', 'núcleo', 'nucleo',
-        'coordenação', 'coordenacao', 'assistente', 'assistentes',
-        'e'  # palavra "e" sozinha entre créditos
-    }
-    
-    for i, bloco in enumerate(blocos):
-        if i == 0:
-            continue
-        
-        bloco = bloco.replace('\\b0', '')
-        
-        # Captura título: qualquer coisa exceto quebra de linha até \par
-        # Isso permite códigos RTF como \'e3 (ã), \'e7 (ç), etc
-        match_titulo = re.match(r'^([^\r\n]+?)\\par', bloco)
-        if not match_titulo:
-            continue
-        
-        titulo_raw = match_titulo.group(1)
-        titulo = limpar_texto_rtf(titulo_raw)
-        
-        if not titulo or len(titulo) < 2:
-            continue
-        
-        resto = bloco[match_titulo.end():]
-        
-        # DETECTA FORMATO
-        # Formato 2/3: Tem \\b0 logo após o título (sem créditos ou créditos mínimos)
-        if resto.strip().startswith('\\b0') or '\\par\\par' in resto[:50]:
-            # Formato simplificado - pega tudo após primeira linha vazia
-            linhas = re.split(r'\\par', resto)
-            elenco = []
-            
-            for linha in linhas:
-                linha_limpa = limpar_texto_rtf(linha)
-                
-                if not linha_limpa or len(linha_limpa) < 3:
-                    continue
-                
-                # Pula palavras de crédito
-                if linha_limpa.lower() in palavras_credito:
-                    continue
-                
-                # Para em marcadores de fase
-                if linha_limpa.lower() in ['1ª fase', '2ª fase', '3ª fase']:
-                    break
-                
-                elenco.append({'ator': linha_limpa, 'personagem': None})
-        
-        else:
-            # Formato 1: Tem créditos (de/direção) seguidos de linha vazia dupla
-            linhas = re.split(r'\\par', resto)
-            elenco = []
-            modo = 'creditos'
-            linhas_vazias = 0
-            
-            for linha in linhas:
-                linha_limpa = limpar_texto_rtf(linha)
-                
-                if not linha_limpa or len(linha_limpa) < 2:
-                    linhas_vazias += 1
-                    if linhas_vazias >= 1 and modo == 'creditos':
-                        modo = 'elenco'
-                    continue
-                
-                linhas_vazias = 0
-                linha_lower = linha_limpa.lower()
-                
-                if modo == 'creditos':
-                    if linha_lower in palavras_credito:
-                        continue
-                    continue
-                
-                if modo == 'elenco':
-                    if linha_lower in ['1ª fase', '2ª fase', '3ª fase']:
-                        break
-                    
-                    elenco.append({'ator': linha_limpa, 'personagem': None})
-        
-        # Valida elenco  
-        # Mínimo 2 atores (algumas produções pequenas têm mesmo poucos)
-        if len(elenco) >= 2:
-            producoes.append({
-                'titulo': titulo,
-                'tipo': 'Novela',
-                'ano_inicio': None,
-                'ano_fim': None,
-                'elenco': elenco
-            })
-            print(f"✓ {titulo}: {len(elenco)} atores")
-        elif len(elenco) > 0:
-            erros.append(f"⚠️  {titulo}: apenas {len(elenco)} ator(es)")
+    for producao in iterar_producoes(arquivo_rtf, erros):
+        producoes.append(producao)
+        print(f"✓ {producao['titulo']}: {len(producao['elenco'])} atores")
     
     if erros:
         print("\n" + "="*70)
@@ -158,14 +55,16 @@ def criar_banco_limpo(db_path):
             titulo TEXT NOT NULL,
             tipo TEXT NOT NULL,
             ano_inicio INTEGER,
-            ano_fim INTEGER
+            ano_fim INTEGER,
+            titulo_normalizado TEXT
         )
     ''')
     
     cursor.execute('''
         CREATE TABLE atores (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL UNIQUE
+            nome TEXT NOT NULL UNIQUE,
+            nome_normalizado TEXT
         )
     ''')
     
@@ -182,55 +81,21 @@ def criar_banco_limpo(db_path):
     ''')
     
     cursor.execute('CREATE INDEX idx_atores_nome ON atores(nome)')
-    cursor.execute('CREATE INDEX idx_elenco_ator ON elenco(ator_id)')
-    cursor.execute('CREATE INDEX idx_elenco_producao ON elenco(producao_id)')
+    cursor.execute('CREATE INDEX idx_atores_nome_normalizado ON atores(nome_normalizado)')
+    cursor.execute('CREATE INDEX idx_producoes_titulo_normalizado ON producoes(titulo_normalizado)')
+    criar_indices_cobertura(conn)
+    
+    # Índices FTS5 trigram sobre atores.nome_normalizado e producoes.titulo_normalizado,
+    # mantidos pelos triggers durante a importação
+    if not (criar_indice_nomes(conn) and criar_indice_titulos(conn)):
+        print("⚠️  SQLite sem FTS5 - busca por nome e título usará LIKE")
     
     conn.commit()
     conn.close()
 
 def importar_para_banco(producoes, db_path):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    total_producoes = 0
-    total_participacoes = 0
-    
-    for producao in producoes:
-        try:
-            cursor.execute('''
-                INSERT INTO producoes (titulo, tipo, ano_inicio, ano_fim)
-                VALUES (?, ?, ?, ?)
-            ''', (producao['titulo'], producao['tipo'],
-                  producao.get('ano_inicio'), producao.get('ano_fim')))
-            
-            producao_id = cursor.lastrowid
-            total_producoes += 1
-            
-            for participacao in producao['elenco']:
-                ator_nome = participacao['ator']
-                
-                cursor.execute('INSERT OR IGNORE INTO atores (nome) VALUES (?)', (ator_nome,))
-                cursor.execute('SELECT id FROM atores WHERE nome = ?', (ator_nome,))
-                result = cursor.fetchone()
-                
-                if result:
-                    ator_id = result[0]
-                    try:
-                        cursor.execute('''
-                            INSERT INTO elenco (ator_id, producao_id, personagem)
-                            VALUES (?, ?, ?)
-                        ''', (ator_id, producao_id, participacao.get('personagem')))
-                        total_participacoes += 1
-                    except sqlite3.IntegrityError:
-                        pass
-        
-        except Exception as e:
-            print(f"❌ Erro ao importar '{producao['titulo']}': {e}")
-    
-    conn.commit()
-    conn.close()
-    
-    return total_producoes, total_participacoes
+    """Importa as produções extraídas usando a carga em massa (ver carga_em_massa.py)"""
+    return carregar_producoes(producoes, db_path)
 
 def verificar_dados(db_path):
     conn = sqlite3.connect(db_path)
@@ -282,22 +147,49 @@ def verificar_dados(db_path):
     conn.close()
 
 if __name__ == '__main__':
+    # Uso: python importar_elencos.py [--incremental]
+    incremental = '--incremental' in sys.argv[1:]
+    
     print("="*70)
     print("PARSER FINAL COMPLETO - TODOS OS FORMATOS")
     print("="*70)
     
     db_path = 'novelas_globo.db'
+    arquivo_rtf = '/mnt/user-data/uploads/elencos.rtf'
     
-    print("\n1️⃣ Criando banco limpo...")
-    criar_banco_limpo(db_path)
-    
-    print("\n2️⃣ Extraindo elencos (TODOS os formatos)...")
-    producoes = extrair_elencos_completo('/mnt/user-data/uploads/elencos.rtf')
-    
-    print(f"\n3️⃣ Importando {len(producoes)} produções...")
-    total_prod, total_part = importar_para_banco(producoes, db_path)
+    if incremental:
+        print("\n1️⃣ Extraindo elencos (TODOS os formatos)...")
+        producoes = extrair_elencos_completo(arquivo_rtf)
+        
+        print(f"\n2️⃣ Aplicando mudanças de {len(producoes)} produções (cópia + troca atômica)...")
+        contagem = importar_incremental(producoes, db_path, criar_banco_limpo)
+        
+        print(f"\n✅ {contagem['novas']} novas • {contagem['alteradas']} alteradas • "
+              f"{contagem['removidas']} removidas • {contagem['inalteradas']} inalteradas")
+    else:
+        # Monta o banco ao lado e troca no fim: o app nunca vê o banco pela metade
+        db_novo = db_path + SUFIXO_NOVO
+        
+        print("\n1️⃣ Criando banco limpo...")
+        criar_banco_limpo(db_novo)
+        
+        print("\n2️⃣ Extraindo elencos (TODOS os formatos)...")
+        producoes = extrair_elencos_completo(arquivo_rtf)
+        
+        print(f"\n3️⃣ Importando {len(producoes)} produções...")
+        total_prod, total_part = importar_para_banco(producoes, db_novo)
+        
+        # Registra a versão do schema (user_version) e roda ANALYZE e VACUUM
+        conn = sqlite3.connect(db_novo)
+        migrar(conn)
+        conn.close()
+        trocar_banco(db_novo, db_path)
+        
+        print(f"\n✅ {total_prod} produções • {total_part} participações")
     
-    print(f"\n✅ {total_prod} produções • {total_part} participações")
+    # Snapshot binário (mmap) para as consultas por nome exato do app
+    print(f"\n🗂️  Gerando índice binário ({caminho_indice(db_path)})...")
+    gerar_indice(db_path)
     
     verificar_dados(db_path)
     
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice binário somente leitura dos nomes, para consultas sem SQLite
+
+Um único arquivo (novelas_globo.idx ao lado do banco), mapeado com mmap por
+todos os workers: o sistema operacional mantém uma cópia só no page cache,
+e as consultas são buscas binárias direto nos bytes mapeados, sem parsear
+SQL nem montar linhas.
+
+Formato (little-endian, todos os offsets em bytes desde o início):
+    cabeçalho    CABECALHO: assinatura, versão do banco de origem, contagens
+                 e o offset de cada seção
+    chaves       REGISTRO_CHAVE por nome normalizado, em ordem dos bytes UTF-8:
+                 (texto, primeiro ator, número de atores)
+    atores       REGISTRO_ATOR em ordem de nome e id dentro de cada chave:
+                 (nome de exibição, primeira participação, número de participações)
+    participações REGISTRO_PARTICIPACAO na ordem da filmografia (ano_inicio
+                 DESC, título, id): (produção, personagem)
+    produções    REGISTRO_PRODUCAO: (id, ano_inicio, ano_fim, título, tipo)
+    textos       UTF-8 de todos os textos acima, referenciados por (offset, tamanho)
+
+A versão do banco são o contador de alterações e o número de páginas do
+cabeçalho do SQLite: o índice só é usado enquanto o banco tiver a mesma
+versão, senão as rotas voltam para o SQL. Como o contador só é confiável
+fora do modo WAL, bancos em WAL não usam o índice (os gerados pela
+importação ficam em journal DELETE, ver trocar_banco).
+
+Só /api/buscar/lote usa o índice, onde ele ganha do SQL: 1000 nomes em
+21 ms, contra 26 ms das filmografias materializadas e 31 ms do SQL de
+elenco (benchmarks/bench_indice.py, banco distribuído). A busca exata de um
+nome (?exato=1) lê o corpo gzip já pronto de filmografias em 0,016 ms; pelo
+índice ainda seria preciso serializar e comprimir. Coestrelas e caminho
+(grafo.py) precisam dos atores de cada produção, que o índice não guarda.
+O arquivo não vai para o git; é gerado pela importação ou pelo uso avulso
+abaixo.
+
+Uso avulso (gera o índice de um banco já existente):
+    python indice_binario.py [novelas_globo.db]
+"""
+
+import mmap
+import os
+import struct
+import sys
+
+from conexoes import DerivadoDoBanco, abrir_somente_leitura
+from consultas import LIMITE_LOTE, ParametroInvalido, formatar_producao
+from esquema import normalizar_nome
+
+ASSINATURA = b'NVIDX001'
+CABECALHO = struct.Struct('<8sIIIIIQQQQQ')
+REGISTRO_CHAVE = struct.Struct('<IIII')
+REGISTRO_ATOR = struct.Struct('<IIII')
+REGISTRO_PARTICIPACAO = struct.Struct('<III')
+REGISTRO_PRODUCAO = struct.Struct('<IiiIIII')
+
+# Textos NULL (personagem, tipo) e anos NULL
+SEM_TEXTO = 0xFFFFFFFF
+SEM_ANO = -2**31
+
+def caminho_indice(db_path):
+    """Arquivo do índice de `db_path` (mesmo nome, extensão .idx)"""
+    return os.path.splitext(db_path)[0] + '.idx'
+
+def versao_banco(db_path):
+    """
+    (contador de alterações, número de páginas) do cabeçalho do SQLite, ou
+    None se o banco não existe ou está em modo WAL (lá o contador não muda a
+    cada transação)
+    """
+    try:
+        with open(db_path, 'rb') as f:
+            cabecalho = f.read(100)
+    except FileNotFoundError:
+        return None
+    if len(cabecalho) < 100 or cabecalho[18] == 2:
+        return None
+    return struct.unpack_from('>I', cabecalho, 24)[0], struct.unpack_from('>I', cabecalho, 28)[0]
+
+class _Textos:
+    """Acumula os textos em UTF-8 e devolve (offset, tamanho), sem repetir iguais"""
+
+    def __init__(self):
+        self.partes = []
+        self.tamanho = 0
+        self._vistos = {}
+
+    def adicionar(self, texto):
+        if texto is None:
+            return SEM_TEXTO, 0
+        posicao = self._vistos.get(texto)
+        if posicao is None:
+            dados = texto.encode('utf-8')
+            posicao = self._vistos[texto] = (self.tamanho, len(dados))
+            self.partes.append(dados)
+            self.tamanho += len(dados)
+        return posicao
+
+def gerar_indice(db_path, destino=None):
+    """
+    Gera o índice binário de `db_path` (em caminho_indice(db_path), se
+    `destino` não for dado). O arquivo é escrito ao lado e trocado de uma vez:
+    os workers com o índice antigo mapeado continuam lendo o antigo.
+    Retorna o número de chaves.
+    """
+    destino = destino or caminho_indice(db_path)
+    versao = versao_banco(db_path)
+    if versao is None:
+        raise RuntimeError(f'Banco {db_path} inexistente ou em modo WAL')
+
+    conn = abrir_somente_leitura(db_path)
+    try:
+        producoes = conn.execute(
+            'SELECT id, ano_inicio, ano_fim, titulo, tipo FROM producoes ORDER BY id'
+        ).fetchall()
+        linhas = conn.execute('''
+            SELECT a.nome_normalizado, a.id, a.nome, e.producao_id, e.personagem
+            FROM atores a
+            JOIN elenco e ON a.id = e.ator_id
+            JOIN producoes p ON e.producao_id = p.id
+            ORDER BY a.nome_normalizado, a.nome, a.id, -COALESCE(p.ano_inicio, -1), p.titulo, p.id
+        ''').fetchall()
+    finally:
+        conn.close()
+
+    textos = _Textos()
+
+    posicao_producao = {}
+    registros_producoes = bytearray()
+    for posicao, (producao_id, ano_inicio, ano_fim, titulo, tipo) in enumerate(producoes):
+        posicao_producao[producao_id] = posicao
+        registros_producoes += REGISTRO_PRODUCAO.pack(
+            producao_id,
+            SEM_ANO if ano_inicio is None else ano_inicio,
+            SEM_ANO if ano_fim is None else ano_fim,
+            *textos.adicionar(titulo), *textos.adicionar(tipo)
+        )
+
+    # Agrupa por chave e ator; a busca binária compara bytes UTF-8, então
+    # as chaves são ordenadas pelos bytes (a ordem do SQL é só dentro da chave)
+    chaves = {}
+    for chave, ator_id, nome, producao_id, personagem in linhas:
+        atores = chaves.setdefault(chave, [])
+        if not atores or atores[-1][0] != ator_id:
+            atores.append((ator_id, nome, []))
+        atores[-1][2].append((posicao_producao[producao_id], personagem))
+
+    registros_chaves = bytearray()
+    registros_atores = bytearray()
+    registros_participacoes = bytearray()
+    total_atores = total_participacoes = 0
+    for chave in sorted(chaves, key=lambda chave: chave.encode('utf-8')):
+        atores = chaves[chave]
+        registros_chaves += REGISTRO_CHAVE.pack(*textos.adicionar(chave), total_atores, len(atores))
+        for _, nome, participacoes in atores:
+            registros_atores += REGISTRO_ATOR.pack(
+                *textos.adicionar(nome), total_participacoes, len(participacoes)
+            )
+            for posicao, personagem in participacoes:
+                registros_participacoes += REGISTRO_PARTICIPACAO.pack(posicao, *textos.adicionar(personagem))
+            total_participacoes += len(participacoes)
+        total_atores += len(atores)
+
+    secoes = [registros_chaves, registros_atores, registros_participacoes, registros_producoes]
+    offsets = []
+    posicao = CABECALHO.size
+    for secao in secoes:
+        offsets.append(posicao)
+        posicao += len(secao)
+    offsets.append(posicao)
+
+    temporario = destino + '.novo'
+    with open(temporario, 'wb') as f:
+        f.write(CABECALHO.pack(
+            ASSINATURA, *versao,
+            len(chaves), total_atores, len(producoes),
+            *offsets
+        ))
+        for secao in secoes:
+            f.write(secao)
+        for parte in textos.partes:
+            f.write(parte)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, destino)
+    return len(chaves)
+
+# Snapshot de quando o arquivo falta, não abre ou é de outra versão do banco
+INDISPONIVEL = object()
+
+def _identidade_arquivo(estado):
+    return estado.st_ino, estado.st_mtime_ns, estado.st_size
+
+class _Mapa:
+    """Um arquivo de índice mapeado (trocado de uma vez na recarga)"""
+
+    def __init__(self, caminho):
+        with open(caminho, 'rb') as f:
+            self.identidade = _identidade_arquivo(os.fstat(f.fileno()))
+            self.dados = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (assinatura, contador, paginas, self.total_chaves, _, _,
+         self.inicio_chaves, self.inicio_atores, self.inicio_participacoes,
+         self.inicio_producoes, self.inicio_textos) = \
+            CABECALHO.unpack_from(self.dados, 0)
+        if assinatura != ASSINATURA:
+            raise ValueError(f'{caminho} não é um índice binário')
+        self.versao = (contador, paginas)
+
+    def texto(self, offset, tamanho):
+        if offset == SEM_TEXTO:
+            return None
+        inicio = self.inicio_textos + offset
+        return self.dados[inicio:inicio + tamanho].decode('utf-8')
+
+    def procurar(self, chave):
+        """Posição da chave (bytes UTF-8) na seção de chaves, ou None"""
+        dados, inicio_chaves, inicio_textos = self.dados, self.inicio_chaves, self.inicio_textos
+        baixo, alto = 0, self.total_chaves
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            offset, tamanho, _, _ = REGISTRO_CHAVE.unpack_from(dados, inicio_chaves + meio * REGISTRO_CHAVE.size)
+            inicio = inicio_textos + offset
+            atual = dados[inicio:inicio + tamanho]
+            if atual < chave:
+                baixo = meio + 1
+            elif atual > chave:
+                alto = meio
+            else:
+                return meio
+        return None
+
+    def atores(self, chave):
+        """[{'ator', 'producoes'}] de quem tem o nome normalizado `chave`"""
+        posicao = self.procurar(chave.encode('utf-8'))
+        if posicao is None:
+            return []
+        _, _, primeiro, quantidade = REGISTRO_CHAVE.unpack_from(
+            self.dados, self.inicio_chaves + posicao * REGISTRO_CHAVE.size
+        )
+        atores = []
+        for i in range(primeiro, primeiro + quantidade):
+            nome_offset, nome_tamanho, inicio, total = REGISTRO_ATOR.unpack_from(
+                self.dados, self.inicio_atores + i * REGISTRO_ATOR.size
+            )
+            atores.append({
+                'ator': self.texto(nome_offset, nome_tamanho),
+                'producoes': [self._producao(j) for j in range(inicio, inicio + total)],
+            })
+        return atores
+
+    def _producao(self, participacao):
+        producao, personagem_offset, personagem_tamanho = REGISTRO_PARTICIPACAO.unpack_from(
+            self.dados, self.inicio_participacoes + participacao * REGISTRO_PARTICIPACAO.size
+        )
+        _, ano_inicio, ano_fim, titulo_offset, titulo_tamanho, tipo_offset, tipo_tamanho = \
+            REGISTRO_PRODUCAO.unpack_from(self.dados, self.inicio_producoes + producao * REGISTRO_PRODUCAO.size)
+        return formatar_producao({
+            'titulo': self.texto(titulo_offset, titulo_tamanho),
+            'tipo': self.texto(tipo_offset, tipo_tamanho),
+            'ano_inicio': None if ano_inicio == SEM_ANO else ano_inicio,
+            'ano_fim': None if ano_fim == SEM_ANO else ano_fim,
+            'personagem': self.texto(personagem_offset, personagem_tamanho),
+        })
+
+class IndiceBinario(DerivadoDoBanco):
+    """
+    Consultas por nome exato no índice mapeado de `db_path`. Sem o arquivo,
+    ou se ele não corresponde ao banco atual, as consultas retornam None e a
+    rota usa o SQL. Banco e arquivo do índice são conferidos a cada consulta.
+    """
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.caminho = caminho_indice(db_path)
+
+    def _identidade_atual(self):
+        try:
+            arquivo = _identidade_arquivo(os.stat(self.caminho))
+        except FileNotFoundError:
+            arquivo = None
+        return super()._identidade_atual(), arquivo
+
+    def _montar(self):
+        """O _Mapa do arquivo, se ele corresponde à versão atual do banco"""
+        try:
+            mapa = _Mapa(self.caminho)
+        except (OSError, ValueError, struct.error):
+            return INDISPONIVEL
+        # O mmap anterior é fechado pelo coletor quando ninguém mais o usa
+        return mapa if mapa.versao == versao_banco(self.db_path) else INDISPONIVEL
+
+    def disponivel(self):
+        return self.atual() is not INDISPONIVEL
+
+    def buscar_lote(self, nomes):
+        """Mesmo resultado de consultas.buscar_lote lido do índice, ou None se indisponível"""
+        mapa = self.atual()
+        if mapa is INDISPONIVEL:
+            return None
+
+        if not isinstance(nomes, list) or not all(isinstance(nome, str) for nome in nomes):
+            raise ParametroInvalido('Envie {"nomes": [...]} com uma lista de nomes')
+        if len(nomes) > LIMITE_LOTE:
+            raise ParametroInvalido(f'Máximo de {LIMITE_LOTE} nomes por lote')
+
+        por_chave = {}
+        resultados = []
+        for nome in nomes:
+            chave = normalizar_nome(nome)
+            if chave not in por_chave:
+                por_chave[chave] = mapa.atores(chave)
+            atores = por_chave[chave]
+            resultados.append({'nome': nome, 'encontrado': bool(atores), 'atores': atores})
+
+        return {
+            'total': len(resultados),
+            'encontrados': sum(resultado['encontrado'] for resultado in resultados),
+            'resultados': resultados
+        }
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'novelas_globo.db'
+
+    total = gerar_indice(db_path)
+    print(f"✓ Índice binário com {total} nomes em {caminho_indice(db_path)}")
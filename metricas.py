@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas de requisições e consultas SQL, no formato texto do Prometheus
+
+Cada requisição mede o tempo total e quanto dele foi:
+    sql      executando consultas (cursor.execute: plano e primeiro passo)
+    leitura  buscando as linhas (fetch*: passos seguintes e objetos Row)
+    json     serializando a resposta
+    python   o resto (montar dicts, agrupar, cache, framework)
+
+Cada consulta (identificada por um hash do SQL sem espaços extras) tem
+histograma de duração, linhas retornadas e instruções executadas pela VM do
+SQLite, contadas pelo progress handler das conexões de leitura (uma chamada
+a cada PASSOS_POR_CHAMADA instruções), que aproximam o trabalho de varredura.
+O mesmo handler interrompe a consulta quando a conexão tem um prazo
+(conn.prazo, ver consultas.prazo_busca) e ele passou.
+Consultas acima de LIMITE_CONSULTA_LENTA vão para o log
+'novelas.consultas_lentas' com o EXPLAIN QUERY PLAN.
+
+Os valores ficam na memória do processo: com vários workers, cada um expõe
+os seus.
+"""
+
+import bisect
+import contextvars
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Limites dos histogramas de duração, em segundos
+LIMITES_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Limites do histograma de linhas por requisição
+LIMITES_LINHAS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+# Instruções da VM entre duas chamadas do progress handler
+PASSOS_POR_CHAMADA = 1000
+
+LIMITE_CONSULTA_LENTA = float(os.environ.get('NOVELAS_CONSULTA_LENTA_MS', 100)) / 1000
+
+FASES = ('sql', 'leitura', 'json', 'python')
+
+log_consultas_lentas = logging.getLogger('novelas.consultas_lentas')
+
+class Histograma:
+    """Contagens cumulativas por limite, soma e total de observações"""
+    __slots__ = ('limites', 'contagens', 'soma', 'total')
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = limites
+        self.contagens = [0] * len(limites)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        posicao = bisect.bisect_left(self.limites, valor)
+        if posicao < len(self.contagens):
+            self.contagens[posicao] += 1
+        self.soma += valor
+        self.total += 1
+
+def _rotulos(rotulos, extra=None):
+    pares = list(rotulos)
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ''
+    texto = ','.join(
+        '{}="{}"'.format(nome, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' '))
+        for nome, valor in pares
+    )
+    return '{' + texto + '}'
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class Registro:
+    """Conjunto de métricas (histogramas, contadores e valores) de um processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._descricoes = {}   # nome -> (tipo, ajuda)
+        self._limites = {}      # nome -> limites do histograma
+        self._series = {}       # nome -> {rótulos ordenados: valor ou Histograma}
+
+    def descrever(self, nome, tipo, ajuda, limites=LIMITES_SEGUNDOS):
+        self._descricoes[nome] = (tipo, ajuda)
+        self._limites[nome] = limites
+        self._series.setdefault(nome, {})
+
+    def observar(self, nome, valor, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            series = self._series.setdefault(nome, {})
+            histograma = series.get(chave)
+            if histograma is None:
+                histograma = series[chave] = Histograma(self._limites.get(nome, LIMITES_SEGUNDOS))
+            histograma.observar(valor)
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            series = self._series.setdefault(nome, {})
+            series[chave] = series.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        with self._lock:
+            self._series.setdefault(nome, {})[tuple(sorted(rotulos.items()))] = valor
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        linhas = []
+        with self._lock:
+            for nome in sorted(self._series):
+                tipo, ajuda = self._descricoes.get(nome, ('untyped', ''))
+                if ajuda:
+                    linhas.append(f'# HELP {nome} {ajuda}')
+                linhas.append(f'# TYPE {nome} {tipo}')
+                for rotulos, valor in sorted(self._series[nome].items()):
+                    if isinstance(valor, Histograma):
+                        acumulado = 0
+                        for limite, contagem in zip(valor.limites, valor.contagens):
+                            acumulado += contagem
+                            linhas.append(f'{nome}_bucket{_rotulos(rotulos, ("le", limite))} {acumulado}')
+                        linhas.append(f'{nome}_bucket{_rotulos(rotulos, ("le", "+Inf"))} {valor.total}')
+                        linhas.append(f'{nome}_sum{_rotulos(rotulos)} {_numero(valor.soma)}')
+                        linhas.append(f'{nome}_count{_rotulos(rotulos)} {valor.total}')
+                    else:
+                        linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+        return '\n'.join(linhas) + '\n'
+
+registro = Registro()
+registro.descrever('novelas_requisicao_segundos', 'histogram',
+                   'Duração das requisições por rota e status')
+registro.descrever('novelas_requisicao_fase_segundos', 'histogram',
+                   'Tempo das requisições por fase (sql, leitura, json, python)')
+registro.descrever('novelas_requisicao_linhas', 'histogram', 'Linhas lidas do SQLite por requisição',
+                   LIMITES_LINHAS)
+registro.descrever('novelas_sql_segundos', 'histogram', 'Duração de cada consulta (execute + fetch)')
+registro.descrever('novelas_sql_linhas_retornadas_total', 'counter', 'Linhas retornadas pelas consultas')
+registro.descrever('novelas_sql_passos_vm_total', 'counter',
+                   f'Instruções da VM do SQLite (múltiplos de {PASSOS_POR_CHAMADA})')
+registro.descrever('novelas_sql_lentas_total', 'counter',
+                   'Consultas acima do limite do log de consultas lentas')
+registro.descrever('novelas_sql_consulta_info', 'gauge', 'Texto do SQL de cada identificador de consulta')
+
+class Medicao:
+    """Tempos e contagens acumulados durante uma requisição"""
+    __slots__ = ('inicio', 'fases', 'linhas', 'cursores')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases = dict.fromkeys(FASES, 0.0)
+        self.linhas = 0
+        self.cursores = []
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+def iniciar_medicao():
+    """Começa a medir a requisição atual; retorna o token para encerrar_medicao"""
+    return _medicao_atual.set(Medicao())
+
+def encerrar_medicao(token, rota, status):
+    """Registra os tempos da requisição medida desde iniciar_medicao"""
+    medicao = _medicao_atual.get()
+    _medicao_atual.reset(token)
+    if medicao is None:
+        return
+
+    for cursor in medicao.cursores:
+        cursor.finalizar_medicao()
+
+    total = time.perf_counter() - medicao.inicio
+    medicao.fases['python'] = max(0.0, total - sum(medicao.fases.values()))
+
+    registro.observar('novelas_requisicao_segundos', total, rota=rota, status=status)
+    for fase, segundos in medicao.fases.items():
+        registro.observar('novelas_requisicao_fase_segundos', segundos, rota=rota, fase=fase)
+    registro.observar('novelas_requisicao_linhas', medicao.linhas, rota=rota)
+
+def somar_fase(fase, segundos):
+    """Acrescenta tempo a uma fase da requisição em medição (se houver)"""
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        medicao.fases[fase] += segundos
+
+@functools.lru_cache(maxsize=1024)
+def identificar_consulta(sql):
+    """Identificador curto e estável do texto da consulta"""
+    compacto = ' '.join(sql.split())
+    consulta = hashlib.blake2b(compacto.encode('utf-8'), digest_size=4).hexdigest()
+    registro.definir('novelas_sql_consulta_info', 1, consulta=consulta, sql=compacto[:300])
+    return consulta, compacto
+
+def contar_passos(conn):
+    """
+    Progress handler das conexões de leitura: soma as instruções executadas
+    e, se conn.prazo (time.monotonic) passou, interrompe a consulta
+    """
+    def contar():
+        conn.passos_vm += 1
+        prazo = conn.prazo
+        return prazo is not None and time.monotonic() > prazo
+    conn.passos_vm = 0
+    conn.prazo = None
+    conn.set_progress_handler(contar, PASSOS_POR_CHAMADA)
+
+class CursorMedido(sqlite3.Cursor):
+    """
+    Cursor que mede o tempo de execute e dos fetch*, conta as linhas e, ao
+    terminar a consulta (cursor esgotado, nova consulta ou fim da
+    requisição), registra as métricas dela.
+    """
+
+    def __init__(self, conexao):
+        super().__init__(conexao)
+        self._sql = None
+
+    def execute(self, sql, parametros=()):
+        self.finalizar_medicao()
+        self._sql = sql
+        self._parametros = parametros
+        self._segundos = 0.0
+        self._linhas = 0
+        self._passos_inicio = self._passos_fim = getattr(self.connection, 'passos_vm', 0)
+
+        medicao = _medicao_atual.get()
+        if medicao is not None:
+            medicao.cursores.append(self)
+
+        inicio = time.perf_counter()
+        try:
+            super().execute(sql, parametros)
+        finally:
+            segundos = time.perf_counter() - inicio
+            self._segundos += segundos
+            self._passos_fim = getattr(self.connection, 'passos_vm', 0)
+            somar_fase('sql', segundos)
+        if self.description is None:
+            # PRAGMA/DDL sem linhas: não há fetch para esperar
+            self.finalizar_medicao()
+        return self
+
+    def _ler(self, metodo, *args):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            segundos = time.perf_counter() - inicio
+            self._segundos += segundos
+            self._passos_fim = getattr(self.connection, 'passos_vm', 0)
+            somar_fase('leitura', segundos)
+
+    def _contar(self, linhas):
+        self._linhas += linhas
+        medicao = _medicao_atual.get()
+        if medicao is not None:
+            medicao.linhas += linhas
+
+    def fetchone(self):
+        linha = self._ler(super().fetchone)
+        if linha is None:
+            self.finalizar_medicao()
+        else:
+            self._contar(1)
+        return linha
+
+    def fetchmany(self, size=None):
+        tamanho = self.arraysize if size is None else size
+        linhas = self._ler(super().fetchmany, tamanho)
+        self._contar(len(linhas))
+        if len(linhas) < tamanho:
+            self.finalizar_medicao()
+        return linhas
+
+    def fetchall(self):
+        linhas = self._ler(super().fetchall)
+        self._contar(len(linhas))
+        self.finalizar_medicao()
+        return linhas
+
+    def __next__(self):
+        try:
+            linha = self._ler(super().__next__)
+        except StopIteration:
+            self.finalizar_medicao()
+            raise
+        self._contar(1)
+        return linha
+
+    def finalizar_medicao(self):
+        """Registra as métricas da consulta atual (uma vez só)"""
+        sql = self._sql
+        if sql is None:
+            return
+        self._sql = None
+
+        consulta, compacto = identificar_consulta(sql)
+        passos = (self._passos_fim - self._passos_inicio) * PASSOS_POR_CHAMADA
+
+        registro.observar('novelas_sql_segundos', self._segundos, consulta=consulta)
+        registro.incrementar('novelas_sql_linhas_retornadas_total', self._linhas, consulta=consulta)
+        registro.incrementar('novelas_sql_passos_vm_total', passos, consulta=consulta)
+
+        if self._segundos >= LIMITE_CONSULTA_LENTA:
+            registro.incrementar('novelas_sql_lentas_total', consulta=consulta)
+            self._registrar_lenta(compacto, consulta, passos)
+
+    def _registrar_lenta(self, compacto, consulta, passos):
+        try:
+            plano = sqlite3.Cursor(self.connection).execute(
+                'EXPLAIN QUERY PLAN ' + compacto, self._parametros
+            ).fetchall()
+            plano = '\n'.join(f'    {linha[3]}' for linha in plano) or '    (sem plano)'
+        except sqlite3.Error as e:
+            plano = f'    (EXPLAIN QUERY PLAN falhou: {e})'
+
+        log_consultas_lentas.warning(
+            'Consulta lenta %s: %.1f ms, %d linhas, ~%d instruções\n  SQL: %s\n  Parâmetros: %r\n  Plano:\n%s',
+            consulta, self._segundos * 1000, self._linhas, passos, compacto, self._parametros, plano
+        )
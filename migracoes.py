@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migrações versionadas do schema (PRAGMA user_version)
+
+Leva qualquer banco, criado por criar_banco.py, por importar_elencos.py ou
+por versões anteriores deles, ao schema de serviço atual. Cada migração de
+MIGRACOES é idempotente e roda só se o user_version do banco for menor que
+o número dela; o user_version é gravado depois de cada uma, então uma
+migração interrompida recomeça de onde parou. No fim, ANALYZE e VACUUM.
+
+verificar_planos() roda as consultas quentes da API e confere o EXPLAIN
+QUERY PLAN de cada comando: falha se alguma tabela for varrida inteira ou
+se aparecer uma ordenação em B-tree temporária além das fixadas para cada
+consulta em _consultas_quentes.
+
+Uso:
+    python migracoes.py [novelas_globo.db]             # migra e verifica
+    python migracoes.py [novelas_globo.db] --verificar # só verifica (sai com 1 se regrediu)
+"""
+
+import os
+import sqlite3
+import sys
+from collections import Counter
+
+from conexoes import abrir_somente_leitura
+from consultas import (
+    buscar_atores, buscar_lote, buscar_producoes, buscar_titulos, contar_totais, elenco_producao
+)
+from esquema import (
+    adicionar_nome_normalizado, adicionar_titulo_normalizado, criar_indice_nomes,
+    criar_indice_titulos, criar_indices_cobertura
+)
+from filmografias import filmografia_exata, materializar
+from indice_binario import caminho_indice, gerar_indice, versao_banco
+
+# Abaixo disso (participações) o planejador, guiado pelo ANALYZE, prefere
+# varrer as tabelas, que cabem em poucas páginas: esses bancos são
+# verificados numa cópia em memória com as estatísticas do ANALYZE escaladas
+# para esse tamanho
+MINIMO_VERIFICACAO = 10000
+
+# Única ordenação temporária que as consultas quentes podem usar
+ORDENACAO = 'USE TEMP B-TREE FOR ORDER BY'
+
+def _colunas(conn, tabela):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({tabela})')}
+
+def _tabelas(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def _elenco_unico(conn):
+    """Há um índice único exatamente em elenco(ator_id, producao_id)?"""
+    for _, nome, unico, *_ in conn.execute('PRAGMA index_list(elenco)'):
+        colunas = [row[2] for row in conn.execute(f'PRAGMA index_info("{nome}")')]
+        if unico and colunas == ['ator_id', 'producao_id']:
+            return True
+    return False
+
+def detectar_esquema(conn):
+    """Versão e características do schema de um banco"""
+    tabelas = _tabelas(conn)
+    unico = 'elenco' in tabelas and _elenco_unico(conn)
+    indices = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    return {
+        'versao': conn.execute('PRAGMA user_version').fetchone()[0],
+        # Só importar_elencos.py cria o elenco com UNIQUE(ator_id, producao_id)
+        'origem': 'importar_elencos.py' if unico else 'criar_banco.py' if 'elenco' in tabelas else None,
+        'elenco_unico': unico,
+        'nome_normalizado': 'atores' in tabelas and 'nome_normalizado' in _colunas(conn, 'atores'),
+        'titulo_normalizado': 'producoes' in tabelas and 'titulo_normalizado' in _colunas(conn, 'producoes'),
+        'fts': sorted(tabela for tabela in tabelas if tabela in ('atores_fts', 'producoes_fts')),
+        'indices_cobertura': {'idx_elenco_ator_cobertura', 'idx_elenco_producao_cobertura'} <= indices,
+        'filmografias': 'filmografias' in tabelas,
+    }
+
+def _colunas_normalizadas(conn):
+    adicionar_nome_normalizado(conn)
+    adicionar_titulo_normalizado(conn)
+
+def _indices_fts(conn):
+    if not (criar_indice_nomes(conn) and criar_indice_titulos(conn)):
+        print("⚠️  SQLite sem FTS5 - busca por nome e título usará LIKE")
+
+def _unicidade_elenco(conn):
+    """
+    Bancos de criar_banco.py não têm UNIQUE(ator_id, producao_id): remove as
+    participações repetidas (fica a primeira, como no INSERT OR IGNORE da
+    carga) e cria o índice único
+    """
+    if _elenco_unico(conn):
+        return
+    removidas = conn.execute('''
+        DELETE FROM elenco WHERE id NOT IN (
+            SELECT MIN(id) FROM elenco GROUP BY ator_id, producao_id
+        )
+    ''').rowcount
+    conn.execute('CREATE UNIQUE INDEX idx_elenco_unico ON elenco(ator_id, producao_id)')
+    if removidas and 'filmografias' in _tabelas(conn):
+        materializar(conn)
+
+def _filmografias(conn):
+    if 'filmografias' not in _tabelas(conn):
+        materializar(conn)
+
+# (versão, descrição, função); novas migrações entram sempre no fim
+MIGRACOES = (
+    (1, 'colunas nome_normalizado e titulo_normalizado', _colunas_normalizadas),
+    (2, 'índices FTS5 de nomes e títulos', _indices_fts),
+    (3, 'UNIQUE(ator_id, producao_id) no elenco', _unicidade_elenco),
+    (4, 'índices de cobertura do elenco', criar_indices_cobertura),
+    (5, 'filmografias materializadas', _filmografias),
+)
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+def migrar(conn, otimizar=True):
+    """
+    Aplica as migrações pendentes, cada uma na sua transação, e retorna as
+    versões aplicadas. Com `otimizar`, roda ANALYZE e VACUUM no fim (se
+    alguma migração rodou ou se o banco nunca passou por ANALYZE).
+    """
+    versao = conn.execute('PRAGMA user_version').fetchone()[0]
+    aplicadas = []
+    for numero, descricao, funcao in MIGRACOES:
+        if numero <= versao:
+            continue
+        try:
+            funcao(conn)
+            conn.execute(f'PRAGMA user_version = {numero}')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        aplicadas.append(numero)
+
+    if otimizar and (aplicadas or 'sqlite_stat1' not in _tabelas(conn)):
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.execute('VACUUM')
+    return aplicadas
+
+class _CursorRegistrado(sqlite3.Cursor):
+    """Cursor que guarda (sql, parâmetros) de cada execute"""
+
+    def execute(self, sql, parametros=()):
+        self.connection.comandos.append((sql, parametros))
+        return super().execute(sql, parametros)
+
+class _ConexaoRegistrada(sqlite3.Connection):
+    def cursor(self, factory=_CursorRegistrado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+def _consultas_quentes(conn):
+    """
+    (nome, função(conn), ordenações temporárias esperadas, varredura
+    permitida) das consultas das rotas. As ordenações são fixadas por
+    consulta: qualquer outra (ou mais uma) é regressão. Varredura só é
+    aceita por índice: os primeiros nomes em ordem (LIMIT sobre o índice de
+    nomes) e contar_totais, que conta linhas.
+    """
+    # O ator com mais participações: nome real, com palavras de 3+ letras
+    # para o caminho FTS5 das buscas por substring
+    ator, producao_id = conn.execute('''
+        SELECT a.nome, MAX(e.producao_id) FROM elenco e JOIN atores a ON a.id = e.ator_id
+        GROUP BY e.ator_id ORDER BY COUNT(*) DESC LIMIT 1
+    ''').fetchone() or ('', 0)
+    trecho = max(ator.split(), key=len, default='') if ator else ''
+    trecho = trecho if len(trecho) >= 3 else 'silva'
+    return (
+        # Uma linha pela chave primária, já na ordem
+        ('filmografia_exata', lambda c: filmografia_exata(c, ator), (), False),
+        # Uma linha de filmografias por nome pedido, pela chave primária
+        ('buscar_lote', lambda c: buscar_lote(c, [ator]), (), False),
+        # ORDER BY ator e depois produção mistura duas tabelas e os atores
+        # vêm do FTS5 em ordem de rowid: nenhum índice entrega essa ordem sem
+        # varrer o de nomes. Ordena as participações dos atores achados; no
+        # banco distribuído o pior trigrama ('mar') dá 2731 linhas, 3,4 ms
+        ('buscar_producoes', lambda c: buscar_producoes(c, trecho), (ORDENACAO,), False),
+        # Os nomes achados pelo FTS5 vêm em ordem de rowid; ordena só eles
+        # (no máximo 603 nomes num trigrama, 0,5 ms)
+        ('buscar_atores (substring)', lambda c: buscar_atores(c, trecho), (ORDENACAO,), False),
+        ('buscar_atores (início)', lambda c: buscar_atores(c, ''), (), True),
+        # Idem para os títulos (no máximo 65 num trigrama)
+        ('buscar_titulos', lambda c: buscar_titulos(c, 'amor'), (ORDENACAO,), False),
+        # O elenco de uma produção sai do índice de cobertura em ordem de
+        # ator_id; a página é em ordem de nome. Ordena um elenco só (o maior
+        # tem 244 atores; com CacheElencos, só os com menos de 50 chegam aqui)
+        ('elenco_producao', lambda c: elenco_producao(c, producao_id), (ORDENACAO,), False),
+        ('contar_totais', contar_totais, (), True),
+    )
+
+def _abrir_para_verificar(db_path):
+    """
+    Conexão registrada ao banco: o próprio arquivo (somente leitura) ou,
+    se ele for pequeno, uma cópia em memória com ANALYZE escalado
+    """
+    conn = abrir_somente_leitura(db_path, factory=_ConexaoRegistrada)
+    conn.comandos = []
+    participacoes = conn.execute('SELECT COUNT(*) FROM elenco').fetchone()[0]
+    if participacoes >= MINIMO_VERIFICACAO:
+        return conn
+
+    copia = sqlite3.connect(':memory:', factory=_ConexaoRegistrada)
+    copia.comandos = []
+    conn.backup(copia)
+    conn.close()
+
+    # O total de linhas de cada estatística é multiplicado até o elenco
+    # chegar a MINIMO_VERIFICACAO; as médias por chave (a seletividade
+    # medida no banco pequeno) ficam como estão
+    copia.execute('ANALYZE')
+    fator = -(-MINIMO_VERIFICACAO // max(participacoes, 1))
+    for rowid, stat in copia.execute('SELECT rowid, stat FROM sqlite_stat1').fetchall():
+        total, *medias = stat.split(' ')
+        copia.execute(
+            'UPDATE sqlite_stat1 SET stat = ? WHERE rowid = ?',
+            (' '.join([str(int(total) * fator)] + medias), rowid)
+        )
+    copia.commit()
+    copia.execute('ANALYZE sqlite_schema')  # recarrega as estatísticas escaladas
+    return copia
+
+def verificar_planos(db_path):
+    """
+    Roda as consultas quentes num banco e retorna a lista de problemas
+    encontrados no EXPLAIN QUERY PLAN (vazia se nenhum regrediu)
+    """
+    conn = _abrir_para_verificar(db_path)
+    conn.row_factory = sqlite3.Row
+    problemas = []
+    try:
+        for nome, funcao, ordenacoes, varredura_permitida in _consultas_quentes(conn):
+            conn.comandos = []
+            funcao(conn)
+            encontradas = Counter()
+            for sql, parametros in conn.comandos:
+                plano = [row[3] for row in sqlite3.Cursor(conn).execute('EXPLAIN QUERY PLAN ' + sql, parametros)]
+                for passo in plano:
+                    varredura = passo.startswith('SCAN ') and 'VIRTUAL TABLE' not in passo \
+                        and not passo.startswith('SCAN CONSTANT ROW')
+                    if varredura and not (varredura_permitida and ' INDEX ' in passo):
+                        problemas.append(f'{nome}: varredura ({passo})\n    {" ".join(sql.split())}')
+                    if 'TEMP B-TREE' in passo:
+                        encontradas[passo] += 1
+                        if encontradas[passo] > ordenacoes.count(passo):
+                            problemas.append(f'{nome}: ordenação temporária ({passo})\n    {" ".join(sql.split())}')
+    finally:
+        conn.close()
+    return problemas
+
+if __name__ == '__main__':
+    argumentos = [argumento for argumento in sys.argv[1:] if not argumento.startswith('--')]
+    db_path = argumentos[0] if argumentos else 'novelas_globo.db'
+
+    if '--verificar' not in sys.argv:
+        versao_arquivo = versao_banco(db_path)
+        conn = sqlite3.connect(db_path)
+        antes = detectar_esquema(conn)
+        print(f"Schema de {antes['origem'] or 'banco vazio'}, versão {antes['versao']}")
+        aplicadas = migrar(conn)
+        conn.close()
+        for numero, descricao, _ in MIGRACOES:
+            if numero in aplicadas:
+                print(f"  ✓ {numero}: {descricao}")
+        print(f"✓ {db_path} na versão {VERSAO_ATUAL}" + (" (ANALYZE e VACUUM feitos)" if aplicadas else ""))
+
+        # O índice binário é da versão anterior do arquivo: gera de novo
+        if versao_banco(db_path) != versao_arquivo and os.path.exists(caminho_indice(db_path)):
+            gerar_indice(db_path)
+            print(f"✓ Índice binário atualizado ({caminho_indice(db_path)})")
+
+    problemas = verificar_planos(db_path)
+    for problema in problemas:
+        print(f"✗ {problema}")
+    if problemas:
+        sys.exit(1)
+    print("✓ Planos das consultas quentes sem varreduras nem ordenações inesperadas")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parser em streaming do RTF de elencos
+
+Lê o arquivo em pedaços, separa os blocos de produção nas marcas de título
+(\\b seguido de espaço) à medida que chegam e entrega as produções uma a uma
+por um gerador, com memória constante independente do tamanho do arquivo.
+
+A saída é idêntica à do parser original de importar_elencos.py para os três
+formatos de bloco:
+
+    FORMATO 1 (maioria): \\b TITULO\\par ... de/direção ... \\par\\par ELENCO
+    FORMATO 2 (raros): \\b TITULO\\par\\par\\b0 ELENCO
+    FORMATO 3 (sem créditos): \\b TITULO\\par\\b0 ELENCO
+"""
+
+import re
+
+TAMANHO_LEITURA = 1 << 20
+
+# Separador de blocos: a marca de negrito que abre cada título
+_SEPARADOR = re.compile(r'\\b\s+')
+
+_TITULO = re.compile(r'([^\r\n]+?)\\par')
+
+# Palavras de controle e chaves de grupo, removidas numa única passada.
+# Equivale às duas passadas originais (controle, depois chaves) porque uma
+# chave nunca faz parte de uma palavra de controle.
+_CONTROLE_E_GRUPOS = re.compile(r'\\[a-z]+\d*\s?|[{}]')
+
+_HEX = re.compile(r"\\'([0-9a-fA-F]{2})")
+
+# \'xx -> caractere latin-1, sem bytes.fromhex/decode por ocorrência
+_CARACTERES_HEX = {
+    alto + baixo: chr(int(alto + baixo, 16))
+    for alto in '0123456789abcdefABCDEF'
+    for baixo in '0123456789abcdefABCDEF'
+}
+
+PALAVRAS_CREDITO = {
+    'de', 'direção', 'direcao', 'colaboração', 'colaboracao',
+    'diretor', 'diretores', 'autor', 'autores',
+    'roteiro', 'roteirista', 'roteiristas',
+    'adaptação', 'adaptacao', 'baseado',
+    'supervisão', 'supervisao', 'produtor', 'produtores',
+    'producao', 'produção', 'cenografia', 'figurino',
+    'trilha', 'sonora', 'abertura', 'núcleo', 'nucleo',
+    'coordenação', 'coordenacao', 'assistente', 'assistentes',
+    'e'  # palavra "e" sozinha entre créditos
+}
+
+MARCADORES_FASE = {'1ª fase', '2ª fase', '3ª fase'}
+
+def _decodificar_hex(match):
+    return _CARACTERES_HEX[match.group(1)]
+
+def limpar_texto_rtf(texto):
+    """Decodifica \\'xx, remove palavras de controle e chaves e apara espaços"""
+    # Os escapes são decodificados antes: um \\'xx que vira letra/dígito
+    # logo após uma palavra de controle passa a fazer parte dela, como antes
+    if "\\'" in texto:
+        texto = _HEX.sub(_decodificar_hex, texto)
+    return _CONTROLE_E_GRUPOS.sub('', texto).strip()
+
+def iterar_blocos(arquivo_rtf, tamanho_leitura=TAMANHO_LEITURA):
+    """
+    Gera os trechos brutos entre marcas de título, lendo o arquivo em pedaços.
+    O primeiro trecho é o cabeçalho do RTF (antes do primeiro título).
+    """
+    with open(arquivo_rtf, 'r', encoding='latin1', errors='ignore') as f:
+        pendente = ''
+        while True:
+            pedaco = f.read(tamanho_leitura)
+            fim_arquivo = not pedaco
+            pendente += pedaco
+
+            inicio = 0
+            for separador in _SEPARADOR.finditer(pendente):
+                # Os espaços do separador podem continuar no próximo pedaço
+                if not fim_arquivo and separador.end() == len(pendente):
+                    break
+                yield pendente[inicio:separador.start()]
+                inicio = separador.end()
+            pendente = pendente[inicio:]
+
+            if fim_arquivo:
+                yield pendente
+                return
+
+def _elenco_simplificado(linhas):
+    """Formatos 2 e 3: toda linha com texto (exceto créditos) é um ator"""
+    elenco = []
+    for linha in linhas:
+        linha_limpa = limpar_texto_rtf(linha)
+
+        if not linha_limpa or len(linha_limpa) < 3:
+            continue
+
+        linha_lower = linha_limpa.lower()
+        if linha_lower in PALAVRAS_CREDITO:
+            continue
+        if linha_lower in MARCADORES_FASE:
+            break
+
+        elenco.append({'ator': linha_limpa, 'personagem': None})
+    return elenco
+
+def _elenco_com_creditos(linhas):
+    """Formato 1: pula os créditos até a primeira linha vazia; depois, elenco"""
+    elenco = []
+    lendo_elenco = False
+    for linha in linhas:
+        linha_limpa = limpar_texto_rtf(linha)
+
+        if not linha_limpa or len(linha_limpa) < 2:
+            lendo_elenco = True
+            continue
+
+        if not lendo_elenco:
+            continue
+
+        if linha_limpa.lower() in MARCADORES_FASE:
+            break
+
+        elenco.append({'ator': linha_limpa, 'personagem': None})
+    return elenco
+
+def processar_bloco(bloco, avisos=None):
+    """
+    Converte um bloco bruto (texto após a marca de título) em uma produção.
+    Retorna None se o bloco não tiver título ou tiver menos de 2 atores;
+    blocos com só 1 ator geram um aviso em `avisos`.
+    """
+    bloco = bloco.replace('\\b0', '')
+
+    # Título: qualquer coisa exceto quebra de linha até \par (inclui \'xx)
+    match_titulo = _TITULO.match(bloco)
+    if not match_titulo:
+        return None
+
+    titulo = limpar_texto_rtf(match_titulo.group(1))
+    if not titulo or len(titulo) < 2:
+        return None
+
+    resto = bloco[match_titulo.end():]
+    linhas = resto.split('\\par')
+
+    if resto.strip().startswith('\\b0') or '\\par\\par' in resto[:50]:
+        elenco = _elenco_simplificado(linhas)
+    else:
+        elenco = _elenco_com_creditos(linhas)
+
+    # Mínimo 2 atores (algumas produções pequenas têm mesmo poucos)
+    if len(elenco) >= 2:
+        return {
+            'titulo': titulo,
+            'tipo': 'Novela',
+            'ano_inicio': None,
+            'ano_fim': None,
+            'elenco': elenco
+        }
+
+    if elenco and avisos is not None:
+        avisos.append(f"⚠️  {titulo}: apenas {len(elenco)} ator(es)")
+    return None
+
+def iterar_producoes(arquivo_rtf, avisos=None, tamanho_leitura=TAMANHO_LEITURA):
+    """
+    Gera as produções do RTF uma a uma, na ordem do arquivo. Avisos de
+    produções muito pequenas são acrescentados à lista `avisos`, se dada.
+    """
+    blocos = iterar_blocos(arquivo_rtf, tamanho_leitura)
+    next(blocos, None)  # cabeçalho do RTF
+
+    for bloco in blocos:
+        producao = processar_bloco(bloco, avisos)
+        if producao is not None:
+            yield producao
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor de produção do buscador (app.py é só para desenvolvimento)
+
+    python servidor.py [--workers N] [--threads T] [--bind HOST:PORTA]
+                       [--preload] [--asgi] [--tempo-encerramento S]
+
+WSGI (padrão): N processos, cada um com T threads, aceitando no mesmo
+socket. Usa o gunicorn (workers gthread) quando instalado; sem ele, um
+servidor pre-fork equivalente feito com a biblioteca padrão.
+
+ASGI (--asgi): asgi.app no uvicorn, com N processos e T threads de
+consulta ao SQLite por processo.
+
+--preload lê o banco inteiro (fica no cache de páginas do sistema,
+compartilhado pelos processos) e, no modo WSGI, importa o app antes do
+fork: o índice de autocomplete é montado uma vez e herdado pelos workers.
+
+SIGTERM ou Ctrl+C param de aceitar conexões, terminam as requisições em
+andamento (até --tempo-encerramento segundos) e encerram os workers.
+"""
+
+import argparse
+import importlib.util
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+DB_PATH = os.environ.get('NOVELAS_DB', 'novelas_globo.db')
+
+TAMANHO_LEITURA = 1 << 20
+
+def precarregar_banco(db_path):
+    """Lê o arquivo do banco (e o -wal) para deixá-lo no cache de páginas do sistema"""
+    total = 0
+    for caminho in (db_path, db_path + '-wal'):
+        if not os.path.exists(caminho):
+            continue
+        with open(caminho, 'rb', buffering=0) as f:
+            while True:
+                lido = len(f.read(TAMANHO_LEITURA))
+                if not lido:
+                    break
+                total += lido
+    return total
+
+def carregar_app():
+    """Importa o app Flask (monta o índice de autocomplete)"""
+    from app import app
+    return app
+
+def _reiniciar_conexoes():
+    """
+    Após o fork: conexões SQLite não podem ser herdadas do processo pai, e
+    no modo memória cada worker carrega a sua cópia do banco
+    """
+    modulo = sys.modules.get('app')
+    if modulo is not None:
+        modulo.pool_conexoes.reiniciar()
+
+class ServidorWSGI(WSGIServer):
+    """
+    WSGIServer sobre um socket já aberto (compartilhado entre processos),
+    atendendo cada conexão num pool fixo de threads. Com todas as threads
+    ocupadas o processo para de aceitar, e as conexões ficam para os outros
+    workers.
+    """
+
+    def __init__(self, sock, app, threads):
+        super().__init__(sock.getsockname()[:2], WSGIRequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_address = sock.getsockname()
+        host, self.server_port = self.server_address[:2]
+        self.server_name = socket.getfqdn(host)
+        self.setup_environ()
+        self.set_app(app)
+        self._vagas = threading.BoundedSemaphore(threads)
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix='requisicao')
+
+    def process_request(self, request, client_address):
+        self._vagas.acquire()
+        self._executor.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._vagas.release()
+
+    def server_close(self):
+        # Espera as requisições em andamento
+        self._executor.shutdown(wait=True)
+        super().server_close()
+
+def _executar_worker(sock, app, threads):
+    """Corpo de um processo worker; retorna ao receber SIGTERM"""
+    servidor = ServidorWSGI(sock, app, threads)
+
+    def encerrar(sinal, quadro):
+        threading.Thread(target=servidor.shutdown).start()
+
+    signal.signal(signal.SIGTERM, encerrar)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
+
+def servir_prefork(host, porta, workers, threads, preload, tempo_encerramento):
+    """Servidor pre-fork com a biblioteca padrão (quando o gunicorn não está instalado)"""
+    sock = socket.create_server((host, porta), backlog=1024)
+    app = carregar_app() if preload else None
+
+    if not hasattr(os, 'fork'):
+        print("fork indisponível: usando um único processo")
+        _executar_worker(sock, app or carregar_app(), threads)
+        return
+
+    filhos = set()
+    encerrando = threading.Event()
+
+    def iniciar_worker():
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                _reiniciar_conexoes()
+                _executar_worker(sock, app or carregar_app(), threads)
+            except BaseException:
+                codigo = 1
+                import traceback
+                traceback.print_exc()
+            finally:
+                os._exit(codigo)
+        filhos.add(pid)
+
+    def pedir_encerramento(sinal, quadro):
+        if encerrando.is_set():
+            return
+        encerrando.set()
+        print("Encerrando: aguardando as requisições em andamento...")
+        for pid in filhos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, pedir_encerramento)
+    signal.signal(signal.SIGINT, pedir_encerramento)
+
+    for _ in range(workers):
+        iniciar_worker()
+    print(f"Servindo em http://{host}:{porta} ({workers} processos x {threads} threads)")
+
+    prazo = None
+    while filhos:
+        if encerrando.is_set() and prazo is None:
+            prazo = time.monotonic() + tempo_encerramento
+        if prazo is not None and time.monotonic() > prazo:
+            for pid in filhos:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            prazo = float('inf')
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.1)
+            continue
+
+        filhos.discard(pid)
+        if not encerrando.is_set():
+            print(f"Worker {pid} terminou inesperadamente (status {status}); reiniciando")
+            iniciar_worker()
+
+    sock.close()
+
+def disponivel(modulo):
+    """Indica se uma dependência opcional está instalada"""
+    return importlib.util.find_spec(modulo) is not None
+
+def servir_gunicorn(host, porta, workers, threads, preload, tempo_encerramento):
+    from gunicorn.app.base import BaseApplication
+
+    class AppGunicorn(BaseApplication):
+        def load_config(self):
+            opcoes = {
+                'bind': f'{host}:{porta}',
+                'workers': workers,
+                'threads': threads,
+                'worker_class': 'gthread',
+                'preload_app': preload,
+                'graceful_timeout': tempo_encerramento,
+                'post_fork': lambda servidor, worker: _reiniciar_conexoes(),
+            }
+            for chave, valor in opcoes.items():
+                self.cfg.set(chave, valor)
+
+        def load(self):
+            return carregar_app()
+
+    AppGunicorn().run()
+
+def servir_asgi(host, porta, workers, threads, tempo_encerramento):
+    import uvicorn
+
+    # Lido por asgi.py em cada worker
+    os.environ['NOVELAS_THREADS'] = str(threads)
+    uvicorn.run(
+        'asgi:app', host=host, port=porta, workers=workers,
+        lifespan='on', timeout_graceful_shutdown=tempo_encerramento,
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor de produção do buscador de elencos')
+    parser.add_argument('--bind', default='0.0.0.0:5000', help='HOST:PORTA (padrão 0.0.0.0:5000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='processos (padrão: um por núcleo)')
+    parser.add_argument('--threads', type=int, default=4, help='threads por processo (padrão 4)')
+    parser.add_argument('--preload', action='store_true',
+                        help='carrega banco e índices antes de criar os workers')
+    parser.add_argument('--asgi', action='store_true', help='serve asgi.app no uvicorn')
+    parser.add_argument('--tempo-encerramento', type=int, default=30,
+                        help='segundos para terminar requisições ao encerrar (padrão 30)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(DB_PATH):
+        print("ERRO: Banco de dados não encontrado!")
+        print("Execute primeiro: python criar_banco.py")
+        return 1
+
+    host, _, porta = args.bind.rpartition(':')
+    host = host or '0.0.0.0'
+    porta = int(porta)
+    workers = max(1, args.workers)
+    threads = max(1, args.threads)
+
+    if args.preload:
+        print(f"Banco pré-carregado: {precarregar_banco(DB_PATH) / 2**20:.1f} MiB")
+
+    if args.asgi:
+        if not disponivel('uvicorn'):
+            print("ERRO: o modo --asgi precisa do uvicorn (pip install uvicorn)")
+            return 1
+        servir_asgi(host, porta, workers, threads, args.tempo_encerramento)
+    elif disponivel('gunicorn'):
+        servir_gunicorn(host, porta, workers, threads, args.preload, args.tempo_encerramento)
+    else:
+        servir_prefork(host, porta, workers, threads, args.preload, args.tempo_encerramento)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Catálogo pequeno dos testes dos índices e consultas
+
+Três produções com anos, personagens e acentos; Lima Duarte está em duas
+(liga Roque Santeiro a O Bem-Amado) e Tieta não tem ninguém em comum com
+as outras. O banco é criado pelo mesmo caminho da importação incremental
+(criar_banco_limpo, aplicar_diferencas, filmografias e migrações).
+"""
+
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from importacao_incremental import importar_incremental  # noqa: E402
+from importar_elencos import criar_banco_limpo  # noqa: E402
+
+def producao(titulo, ano_inicio, ano_fim, elenco):
+    return {
+        'titulo': titulo,
+        'tipo': 'Novela',
+        'ano_inicio': ano_inicio,
+        'ano_fim': ano_fim,
+        'elenco': [{'ator': ator, 'personagem': personagem} for ator, personagem in elenco],
+    }
+
+PRODUCOES = [
+    producao('Roque Santeiro', 1985, 1986, [
+        ('Regina Duarte', 'Viúva Porcina'),
+        ('Lima Duarte', 'Sinhozinho Malta'),
+        ('José Wilker', 'Roque Santeiro'),
+        ('Elá Wilker', None),
+    ]),
+    producao('O Bem-Amado', 1973, 1973, [
+        ('Paulo Gracindo', 'Odorico Paraguaçu'),
+        ('Lima Duarte', 'Zeca Diabo'),
+        ('Emiliano Queiroz', 'Dirceu Borboleta'),
+    ]),
+    producao('Tieta', 1989, 1990, [
+        ('Betty Faria', 'Tieta'),
+        ('Joana Fomm', 'Perpétua'),
+        ('Armando Bogus', 'Zé Esteves'),
+    ]),
+]
+
+def criar_banco(diretorio, producoes=PRODUCOES):
+    """Cria (ou atualiza) o banco de teste em `diretorio` e retorna o caminho"""
+    db_path = os.path.join(diretorio, 'novelas_teste.db')
+    importar_incremental(producoes, db_path, criar_banco_limpo)
+    return db_path
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Autocomplete em memória (autocomplete.py): prefixos de nome e sobrenome sem
+acentos/caixa, ranking por produções, recarga quando o banco é trocado e o
+índice exportado para o navegador.
+
+Uso:
+    python -m pytest tests
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_teste import PRODUCOES, criar_banco, producao  # noqa: E402
+from autocomplete import VERSAO_EXPORTACAO, IndiceAutocomplete  # noqa: E402
+
+class TestAutocomplete(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.db_path = criar_banco(self.diretorio.name)
+        self.indice = IndiceAutocomplete(self.db_path)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def test_prefixo_de_nome_e_de_sobrenome(self):
+        self.assertEqual(self.indice.sugerir('regi'), ['Regina Duarte'])
+        self.assertEqual(self.indice.sugerir('wilk'), ['Elá Wilker', 'José Wilker'])
+
+    def test_sem_acentos_nem_caixa(self):
+        self.assertEqual(self.indice.sugerir('JOSE'), ['José Wilker'])
+        self.assertEqual(self.indice.sugerir('ela w'), ['Elá Wilker'])
+
+    def test_mais_producoes_primeiro(self):
+        # Lima Duarte está em duas produções, Regina Duarte em uma
+        self.assertEqual(self.indice.sugerir('duarte'), ['Lima Duarte', 'Regina Duarte'])
+        self.assertEqual(self.indice.sugerir('duarte', limite=1), ['Lima Duarte'])
+
+    def test_sem_resultado(self):
+        self.assertEqual(self.indice.sugerir('xuxa'), [])
+
+    def test_recarrega_quando_o_banco_muda(self):
+        self.assertEqual(self.indice.sugerir('cristiana'), [])
+        pantanal = producao('Pantanal', 1990, 1990, [('Cristiana Oliveira', 'Juma'), ('Marcos Winter', 'Jove')])
+        criar_banco(self.diretorio.name, PRODUCOES + [pantanal])
+        self.assertEqual(self.indice.sugerir('cristiana'), ['Cristiana Oliveira'])
+
+    def test_exportar(self):
+        entrada = self.indice.exportar()
+        self.assertIs(self.indice.exportar(), entrada)
+        self.assertTrue(entrada.corpo.endswith(b'\n'))
+
+        exportado = json.loads(entrada.corpo)
+        self.assertEqual(exportado['versao'], VERSAO_EXPORTACAO)
+        self.assertEqual(exportado['nomes'][0], 'Lima Duarte')
+        self.assertEqual(exportado['pesos'][0], 2)
+        self.assertEqual(sorted(exportado['nomes']), sorted(
+            {ator['ator'] for p in PRODUCOES for ator in p['elenco']}
+        ))
+        # A chave só vai quando o navegador não consegue calculá-la sozinho
+        chaves = dict(zip(exportado['nomes'], exportado['chaves']))
+        self.assertEqual(chaves['José Wilker'], 'jose wilker')
+        self.assertIsNone(chaves['Lima Duarte'])
+
+        # As variantes comprimidas saem prontas da exportação
+        self.assertEqual(gzip.decompress(entrada.variantes['gzip']), entrada.corpo)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Busca aproximada (busca_aproximada.py): sugestões para nomes com erros de
+digitação, sem acentos/caixa, ordenadas por distância e produções, nomes com
+CORINGA e a distância limitada conferida contra o Levenshtein completo.
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_teste import PRODUCOES, criar_banco, producao  # noqa: E402
+from busca_aproximada import (  # noqa: E402
+    CORINGA, IndiceAproximado, distancia_limitada, distancia_nome, trigramas,
+)
+
+def levenshtein(a, b):
+    anterior = list(range(len(b) + 1))
+    for i, letra in enumerate(a, 1):
+        atual = [i]
+        for j, outra in enumerate(b, 1):
+            atual.append(min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (letra != outra)))
+        anterior = atual
+    return anterior[-1]
+
+class TestIndiceAproximado(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.db_path = criar_banco(self.diretorio.name)
+        self.indice = IndiceAproximado(self.db_path)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def test_erro_de_digitacao(self):
+        self.assertEqual(self.indice.sugerir('lima duartte'), ['Lima Duarte'])
+        self.assertEqual(self.indice.sugerir('reginna'), ['Regina Duarte'])
+        self.assertEqual(self.indice.sugerir('bety faria'), ['Betty Faria'])
+
+    def test_sem_acentos_nem_caixa(self):
+        self.assertEqual(self.indice.sugerir('BÉTTY'), ['Betty Faria'])
+        self.assertEqual(self.indice.sugerir('jose wilkr'), ['José Wilker'])
+
+    def test_empate_por_producoes(self):
+        # Mesma distância: Lima Duarte tem duas produções, Regina Duarte uma
+        self.assertEqual(self.indice.sugerir('duartte'), ['Lima Duarte', 'Regina Duarte'])
+        self.assertEqual(self.indice.sugerir('duartte', limite=1), ['Lima Duarte'])
+
+    def test_distancia_antes_de_producoes(self):
+        producoes = PRODUCOES + [
+            producao('Selva de Pedra', 1986, 1986, [('Tony Ramos', None)]),
+            producao('Torre de Babel', 1998, 1999, [('Tony Ramos', None), ('Tonu Ramos', None)]),
+        ]
+        criar_banco(self.diretorio.name, producoes)
+        self.assertEqual(self.indice.sugerir('tonu ramos'), ['Tonu Ramos', 'Tony Ramos'])
+
+    def test_sem_sugestao(self):
+        self.assertEqual(self.indice.sugerir('x'), [])
+        self.assertEqual(self.indice.sugerir('xuxa meneghel'), [])
+
+    def test_nome_com_coringa(self):
+        pantanal = producao('Pantanal', 1990, 1990, [(f'Jos{CORINGA} Mayer', None)])
+        criar_banco(self.diretorio.name, PRODUCOES + [pantanal])
+        self.assertEqual(self.indice.sugerir('josé mayer'), ['Jos? Mayer'])
+
+class TestDistancia(unittest.TestCase):
+
+    def test_trigramas(self):
+        self.assertEqual(trigramas('ana'), {'  a', ' an', 'ana', 'na '})
+        self.assertEqual(trigramas('li ma'), {'  l', ' li', 'li ', '  m', ' ma', 'ma '})
+
+    def test_igual_ao_levenshtein(self):
+        aleatorio = random.Random(3)
+        for _ in range(500):
+            a = ''.join(aleatorio.choices('abc ', k=aleatorio.randint(0, 8)))
+            b = ''.join(aleatorio.choices('abc ', k=aleatorio.randint(0, 8)))
+            limite = aleatorio.randint(1, 3)
+            with self.subTest(a=a, b=b, limite=limite):
+                self.assertEqual(distancia_limitada(a, b, limite), min(levenshtein(a, b), limite + 1))
+
+    def test_coringa(self):
+        self.assertEqual(distancia_limitada('jose', f'jo{CORINGA}e', 1), 0)
+        # Só no nome: no termo o CORINGA é um caractere comum
+        self.assertEqual(distancia_limitada(f'jo{CORINGA}e', 'jose', 1), 1)
+
+    def test_sequencia_de_palavras(self):
+        self.assertEqual(distancia_nome('duartte', 'lima duarte', 2), 1)
+        self.assertEqual(distancia_nome('lima duarte', 'lima duarte', 2), 0)
+        self.assertEqual(distancia_nome('xuxa', 'lima duarte', 1), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paginação do elenco (consultas.elenco_producao): keyset por nome e id do
+ator, as mesmas páginas com e sem o cache de elencos grandes (elencos.py),
+descarte do cache quando o banco muda e os erros de parâmetros.
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_teste import PRODUCOES, criar_banco, producao  # noqa: E402
+from conexoes import abrir_conexao_leitura  # noqa: E402
+from consultas import (  # noqa: E402
+    LIMITE_ELENCO, ParametroInvalido, ProducaoNaoEncontrada, codificar_cursor, elenco_producao,
+)
+from elencos import CacheElencos  # noqa: E402
+
+ELENCO_ROQUE = [
+    {'ator': 'Elá Wilker', 'personagem': 'Não especificado'},
+    {'ator': 'José Wilker', 'personagem': 'Roque Santeiro'},
+    {'ator': 'Lima Duarte', 'personagem': 'Sinhozinho Malta'},
+    {'ator': 'Regina Duarte', 'personagem': 'Viúva Porcina'},
+]
+
+class TestElencoProducao(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.db_path = criar_banco(self.diretorio.name)
+        self.abrir()
+
+    def tearDown(self):
+        self.conn.close()
+        self.diretorio.cleanup()
+
+    def abrir(self):
+        self.conn = abrir_conexao_leitura(self.db_path)
+        self.roque = self.conn.execute(
+            "SELECT id FROM producoes WHERE titulo = 'Roque Santeiro'"
+        ).fetchone()[0]
+
+    def paginas(self, producao_id, limite, cache=None):
+        """Todas as páginas do elenco, seguindo proximo_cursor"""
+        paginas = [elenco_producao(self.conn, producao_id, limite=limite, cache=cache)]
+        while paginas[-1]['proximo_cursor']:
+            paginas.append(elenco_producao(
+                self.conn, producao_id, paginas[-1]['proximo_cursor'], limite, cache
+            ))
+        return paginas
+
+    def test_pagina_unica(self):
+        resposta = elenco_producao(self.conn, self.roque)
+        self.assertEqual(resposta['titulo'], 'Roque Santeiro')
+        self.assertEqual(resposta['anos'], '1985-1986')
+        self.assertEqual(resposta['total_elenco'], 4)
+        self.assertEqual(resposta['elenco'], ELENCO_ROQUE)
+        self.assertIsNone(resposta['proximo_cursor'])
+
+    def test_keyset(self):
+        for limite in range(1, 5):
+            with self.subTest(limite=limite):
+                paginas = self.paginas(self.roque, limite)
+                self.assertEqual(len(paginas), -(-4 // limite))
+                self.assertTrue(all(len(p['elenco']) <= limite for p in paginas))
+                self.assertEqual([ator for p in paginas for ator in p['elenco']], ELENCO_ROQUE)
+
+    def test_com_cache(self):
+        cache = CacheElencos(self.db_path, minimo=2)
+        for limite in range(1, 5):
+            with self.subTest(limite=limite):
+                self.assertEqual(self.paginas(self.roque, limite, cache), self.paginas(self.roque, limite))
+        # 4 + 2 + 2 + 1 páginas; só a primeira foi ao banco
+        self.assertEqual(cache.faltas, 1)
+        self.assertEqual(cache.acertos, 8)
+
+    def test_elenco_pequeno_fora_do_cache(self):
+        cache = CacheElencos(self.db_path, minimo=5)
+        self.paginas(self.roque, 2, cache)
+        self.paginas(self.roque, 2, cache)
+        self.assertEqual(cache.acertos, 0)
+
+    def test_cache_descartado_quando_o_banco_muda(self):
+        cache = CacheElencos(self.db_path, minimo=2)
+        self.assertEqual(len(elenco_producao(self.conn, self.roque, cache=cache)['elenco']), 4)
+
+        roque = dict(PRODUCOES[0], elenco=PRODUCOES[0]['elenco'] + [{'ator': 'Armando Bogus', 'personagem': None}])
+        criar_banco(self.diretorio.name, [roque] + PRODUCOES[1:])
+        self.conn.close()
+        self.abrir()
+
+        resposta = elenco_producao(self.conn, self.roque, cache=cache)
+        self.assertEqual(resposta['elenco'][0]['ator'], 'Armando Bogus')
+        self.assertEqual(resposta['total_elenco'], 5)
+
+    def test_elenco_grande(self):
+        nomes = [f'Ator {i:03d}' for i in range(LIMITE_ELENCO + 20)]
+        criar_banco(self.diretorio.name, PRODUCOES + [
+            producao('Avenida Brasil', 2012, 2012, [(nome, None) for nome in reversed(nomes)])
+        ])
+        self.conn.close()
+        self.abrir()
+        producao_id = self.conn.execute(
+            "SELECT id FROM producoes WHERE titulo = 'Avenida Brasil'"
+        ).fetchone()[0]
+
+        # Limites acima do máximo param em LIMITE_ELENCO
+        primeira = elenco_producao(self.conn, producao_id, limite=LIMITE_ELENCO * 2)
+        self.assertEqual(len(primeira['elenco']), LIMITE_ELENCO)
+        self.assertIsNotNone(primeira['proximo_cursor'])
+
+        cache = CacheElencos(self.db_path)
+        for limite in (7, LIMITE_ELENCO):
+            with self.subTest(limite=limite):
+                paginas = self.paginas(producao_id, limite, cache)
+                self.assertEqual([ator['ator'] for p in paginas for ator in p['elenco']], nomes)
+                self.assertEqual(paginas, self.paginas(producao_id, limite))
+
+    def test_parametros_invalidos(self):
+        for cursor, limite in [
+            ('nao-e-base64!', None),
+            (codificar_cursor(['Lima Duarte']), None),
+            (codificar_cursor([1, 'Lima Duarte']), None),
+            (codificar_cursor(['Lima Duarte', True]), None),
+            (None, 'dez'),
+            (None, '0'),
+            (None, -1),
+        ]:
+            with self.subTest(cursor=cursor, limite=limite):
+                with self.assertRaises(ParametroInvalido):
+                    elenco_producao(self.conn, self.roque, cursor, limite)
+
+    def test_producao_inexistente(self):
+        with self.assertRaises(ProducaoNaoEncontrada):
+            elenco_producao(self.conn, 999999)
+        with self.assertRaises(ProducaoNaoEncontrada):
+            elenco_producao(self.conn, 999999, cache=CacheElencos(self.db_path, minimo=2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Filmografias materializadas (filmografias.py): corpo da busca exata já
+ordenado e formatado, homônimos sem acento no mesmo corpo, bytes estáveis ao
+rematerializar, o mesmo corpo montado na hora sem a tabela e o lote igual ao
+montado de atores/elenco/producoes.
+
+Uso:
+    python -m pytest tests
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_teste import PRODUCOES, criar_banco, producao  # noqa: E402
+from consultas import _lote_por_elenco, buscar_lote  # noqa: E402
+from esquema import normalizar_nome  # noqa: E402
+from filmografias import filmografia_exata, materializar  # noqa: E402
+
+NOMES = sorted({ator['ator'] for p in PRODUCOES for ator in p['elenco']})
+
+class TestFilmografias(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.db_path = criar_banco(self.diretorio.name)
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        self.diretorio.cleanup()
+
+    def filmografia(self, nome):
+        corpo = filmografia_exata(self.conn, nome)
+        return json.loads(gzip.decompress(corpo)) if corpo else None
+
+    def corpos(self):
+        return dict(self.conn.execute('SELECT nome_normalizado, corpo FROM filmografias'))
+
+    def test_corpo_da_busca_exata(self):
+        self.assertEqual(self.filmografia('Lima Duarte'), {
+            'termo': 'lima duarte',
+            'total': 2,
+            'atores': [{'ator': 'Lima Duarte', 'producoes': [
+                {'titulo': 'Roque Santeiro', 'tipo': 'Novela', 'anos': '1985-1986', 'personagem': 'Sinhozinho Malta'},
+                {'titulo': 'O Bem-Amado', 'tipo': 'Novela', 'anos': '1973', 'personagem': 'Zeca Diabo'},
+            ]}],
+            'proximo_cursor': None,
+        })
+
+    def test_sem_acentos_nem_caixa(self):
+        filmografia = self.filmografia('ELA WILKER')
+        self.assertEqual(filmografia['atores'][0]['ator'], 'Elá Wilker')
+        self.assertEqual(filmografia['atores'][0]['producoes'][0]['personagem'], 'Não especificado')
+
+    def test_nome_inexistente(self):
+        self.assertIsNone(filmografia_exata(self.conn, 'Xuxa'))
+        self.assertIsNone(filmografia_exata(self.conn, '  '))
+
+    def test_homonimos_no_mesmo_corpo(self):
+        tieta = producao('Tieta', 1989, 1990, [('Betty Faria', 'Tieta'), ('Jose Wilker', 'Osnar')])
+        self.conn.close()
+        criar_banco(self.diretorio.name, PRODUCOES[:2] + [tieta])
+        self.conn = sqlite3.connect(self.db_path)
+
+        filmografia = self.filmografia('josé wilker')
+        self.assertEqual([ator['ator'] for ator in filmografia['atores']], ['Jose Wilker', 'José Wilker'])
+        self.assertEqual(filmografia['total'], 2)
+
+    def test_rematerializar_mantem_os_bytes(self):
+        antes = self.corpos()
+        self.assertEqual(set(antes), {normalizar_nome(nome) for nome in NOMES})
+        self.assertEqual(materializar(self.conn), len(NOMES))
+        self.assertEqual(self.corpos(), antes)
+
+        # Só algumas chaves: as outras ficam intactas
+        materializar(self.conn, ['lima duarte', 'xuxa'])
+        self.assertEqual(self.corpos(), antes)
+
+    def test_sem_a_tabela(self):
+        esperado = {nome: self.filmografia(nome) for nome in NOMES}
+        self.conn.execute('DROP TABLE filmografias')
+        for nome in NOMES:
+            with self.subTest(nome=nome):
+                self.assertEqual(self.filmografia(nome), esperado[nome])
+
+    def test_lote_igual_ao_elenco(self):
+        nomes = NOMES + ['lima duarte', 'Xuxa']
+        self.conn.row_factory = sqlite3.Row
+        chave, por_chave = _lote_por_elenco(self.conn, nomes)
+        lote = buscar_lote(self.conn, nomes)
+        self.assertEqual(lote['encontrados'], len(NOMES) + 1)
+        for nome, resultado in zip(nomes, lote['resultados']):
+            with self.subTest(nome=nome):
+                self.assertEqual(resultado['atores'], por_chave.get(chave(nome), []))
+
+if __name__ == '__main__':
+    unittest.main()
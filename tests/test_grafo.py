@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grafo de coestrelas (grafo.py): caminho mais curto da busca bidirecional,
+conferido contra uma busca em largura simples num catálogo aleatório,
+coestrelas com o número de produções em comum e recarga quando o banco muda.
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_teste import PRODUCOES, criar_banco, producao  # noqa: E402
+from grafo import AtorNaoEncontrado, GrafoElenco  # noqa: E402
+
+def catalogo_aleatorio(semente, producoes=40, atores=80, elenco=4):
+    aleatorio = random.Random(semente)
+    nomes = [f'Ator {i:03d}' for i in range(atores)]
+    return [
+        producao(f'Produção {i:03d}', 1970 + i, None, [(nome, None) for nome in aleatorio.sample(nomes, elenco)])
+        for i in range(producoes)
+    ]
+
+def graus_bfs(producoes, origem, destino):
+    """Distância em produções por uma busca em largura comum (None se não há caminho)"""
+    vizinhos = {}
+    for p in producoes:
+        nomes = [ator['ator'] for ator in p['elenco']]
+        for nome in nomes:
+            vizinhos.setdefault(nome, set()).update(nomes)
+    distancias = {origem: 0}
+    fila = deque([origem])
+    while fila:
+        atual = fila.popleft()
+        if atual == destino:
+            return distancias[atual]
+        for vizinho in vizinhos.get(atual, ()):
+            if vizinho not in distancias:
+                distancias[vizinho] = distancias[atual] + 1
+                fila.append(vizinho)
+    return None
+
+class TestGrafo(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.diretorio = tempfile.TemporaryDirectory()
+        cls.grafo = GrafoElenco(criar_banco(cls.diretorio.name))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.diretorio.cleanup()
+
+    def test_caminho_por_ator_em_comum(self):
+        self.assertEqual(self.grafo.caminho('Regina Duarte', 'Paulo Gracindo'), {
+            'de': 'Regina Duarte', 'para': 'Paulo Gracindo', 'graus': 2,
+            'atores': ['Regina Duarte', 'Lima Duarte', 'Paulo Gracindo'],
+            'producoes': ['Roque Santeiro', 'O Bem-Amado'],
+        })
+
+    def test_caminho_direto_sem_acentos(self):
+        resposta = self.grafo.caminho('regina duarte', 'JOSE WILKER')
+        self.assertEqual(resposta['graus'], 1)
+        self.assertEqual(resposta['atores'], ['Regina Duarte', 'José Wilker'])
+
+    def test_mesmo_ator(self):
+        resposta = self.grafo.caminho('Lima Duarte', 'lima duarte')
+        self.assertEqual((resposta['graus'], resposta['atores'], resposta['producoes']), (0, ['Lima Duarte'], []))
+
+    def test_sem_caminho(self):
+        resposta = self.grafo.caminho('Regina Duarte', 'Betty Faria')
+        self.assertEqual((resposta['graus'], resposta['atores'], resposta['producoes']), (None, [], []))
+
+    def test_ator_inexistente(self):
+        with self.assertRaises(AtorNaoEncontrado):
+            self.grafo.caminho('Regina Duarte', 'Xuxa')
+
+    def test_coestrelas(self):
+        resposta = self.grafo.coestrelas('Lima Duarte', limite=3)
+        self.assertEqual(resposta['ator'], 'Lima Duarte')
+        self.assertEqual(resposta['total'], 5)
+        # Empatados em produções em comum: ordem de nome
+        self.assertEqual(resposta['coestrelas'], [
+            {'ator': 'Elá Wilker', 'producoes_em_comum': 1},
+            {'ator': 'Emiliano Queiroz', 'producoes_em_comum': 1},
+            {'ator': 'José Wilker', 'producoes_em_comum': 1},
+        ])
+
+    def test_recarrega_quando_o_banco_muda(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            grafo = GrafoElenco(criar_banco(diretorio))
+            self.assertIsNone(grafo.caminho('Regina Duarte', 'Betty Faria')['graus'])
+            # Betty Faria entra em Roque Santeiro e liga Tieta às outras
+            roque, bem_amado, tieta = PRODUCOES
+            roque = dict(roque, elenco=roque['elenco'] + [{'ator': 'Betty Faria', 'personagem': None}])
+            criar_banco(diretorio, [roque, bem_amado, tieta])
+            self.assertEqual(grafo.caminho('Regina Duarte', 'Betty Faria')['graus'], 1)
+
+class TestBuscaBidirecional(unittest.TestCase):
+
+    def test_igual_a_busca_em_largura(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            producoes = catalogo_aleatorio(7)
+            grafo = GrafoElenco(criar_banco(diretorio, producoes))
+            nomes = sorted({ator['ator'] for p in producoes for ator in p['elenco']})
+            elencos = {p['titulo']: {ator['ator'] for ator in p['elenco']} for p in producoes}
+
+            for origem in nomes[::5]:
+                for destino in nomes[::3]:
+                    with self.subTest(origem=origem, destino=destino):
+                        resposta = grafo.caminho(origem, destino)
+                        self.assertEqual(resposta['graus'], graus_bfs(producoes, origem, destino))
+                        if resposta['graus'] is None:
+                            continue
+                        # Cada produção do caminho tem os dois atores que ela liga
+                        atores = resposta['atores']
+                        self.assertEqual((atores[0], atores[-1]), (origem, destino))
+                        for i, titulo in enumerate(resposta['producoes']):
+                            self.assertLessEqual({atores[i], atores[i + 1]}, elencos[titulo])
+
+if __name__ == '__main__':
+    unittest.main()
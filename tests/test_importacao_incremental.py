@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reimportação incremental (importacao_incremental.py): contagem de novas,
+alteradas, removidas e inalteradas, atores órfãos, filmografias regravadas,
+migrações na cópia e troca atômica do arquivo (inclusive quando a
+importação falha no meio).
+
+Uso:
+    python -m pytest tests
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_teste import PRODUCOES, criar_banco, producao  # noqa: E402
+from filmografias import filmografia_exata  # noqa: E402
+from importacao_incremental import SUFIXO_NOVO, importar_incremental  # noqa: E402
+from migracoes import VERSAO_ATUAL  # noqa: E402
+
+class TestImportacaoIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.db_path = criar_banco(self.diretorio.name)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def consultar(self, sql, parametros=()):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, parametros).fetchall()
+        finally:
+            conn.close()
+
+    def filmografia(self, nome):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            corpo = filmografia_exata(conn, nome)
+        finally:
+            conn.close()
+        return json.loads(gzip.decompress(corpo)) if corpo else None
+
+    def test_banco_novo(self):
+        self.assertEqual(self.consultar('SELECT COUNT(*) FROM producoes'), [(3,)])
+        self.assertEqual(self.consultar('SELECT COUNT(*) FROM atores'), [(9,)])
+        self.assertEqual(self.consultar('PRAGMA user_version'), [(VERSAO_ATUAL,)])
+        self.assertFalse(os.path.exists(self.db_path + SUFIXO_NOVO))
+
+    def test_sem_mudancas(self):
+        inode = os.stat(self.db_path).st_ino
+        contagem = importar_incremental(PRODUCOES, self.db_path)
+        self.assertEqual(contagem, {'novas': 0, 'alteradas': 0, 'removidas': 0, 'inalteradas': 3})
+        # Mesmo sem mudanças o arquivo é trocado inteiro
+        self.assertNotEqual(os.stat(self.db_path).st_ino, inode)
+
+    def test_diferencas(self):
+        roque, bem_amado, _ = PRODUCOES
+        # Novo ator em Roque Santeiro; Tieta sai; Pantanal entra
+        roque = dict(roque, elenco=roque['elenco'] + [{'ator': 'Armando Bogus', 'personagem': 'Padre Hipólito'}])
+        pantanal = producao('Pantanal', 1990, 1990, [('Cristiana Oliveira', 'Juma'), ('Marcos Winter', 'Jove')])
+
+        contagem = importar_incremental([roque, bem_amado, pantanal], self.db_path)
+        self.assertEqual(contagem, {'novas': 1, 'alteradas': 1, 'removidas': 1, 'inalteradas': 1})
+
+        titulos = [titulo for (titulo,) in self.consultar('SELECT titulo FROM producoes ORDER BY titulo')]
+        self.assertEqual(titulos, ['O Bem-Amado', 'Pantanal', 'Roque Santeiro'])
+
+        # Quem só estava em Tieta sai do banco e da filmografia materializada
+        self.assertEqual(self.consultar("SELECT COUNT(*) FROM atores WHERE nome = 'Betty Faria'"), [(0,)])
+        self.assertIsNone(self.filmografia('Betty Faria'))
+
+        # Armando Bogus ficou (agora em Roque Santeiro), com a filmografia regravada
+        armando = self.filmografia('armando bogus')
+        self.assertEqual(
+            [(p['titulo'], p['personagem']) for p in armando['atores'][0]['producoes']],
+            [('Roque Santeiro', 'Padre Hipólito')]
+        )
+        self.assertEqual(self.filmografia('Cristiana Oliveira')['total'], 1)
+
+    def test_falha_mantem_o_banco(self):
+        antes = self.consultar('SELECT id, titulo FROM producoes ORDER BY id')
+        with self.assertRaises(KeyError):
+            importar_incremental(PRODUCOES + [{'titulo': 'Sem tipo'}], self.db_path)
+        self.assertEqual(self.consultar('SELECT id, titulo FROM producoes ORDER BY id'), antes)
+        self.assertFalse(os.path.exists(self.db_path + SUFIXO_NOVO))
+
+    def test_banco_ausente_sem_schema(self):
+        with self.assertRaises(ValueError):
+            importar_incremental(PRODUCOES, os.path.join(self.diretorio.name, 'outro.db'))
+
+    def test_migra_banco_antigo(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA user_version = 0')
+        conn.commit()
+        conn.close()
+
+        importar_incremental(PRODUCOES, self.db_path)
+        self.assertEqual(self.consultar('PRAGMA user_version'), [(VERSAO_ATUAL,)])
+
+if __name__ == '__main__':
+    unittest.main()
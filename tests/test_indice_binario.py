@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice binário (indice_binario.py): o lote lido do arquivo mapeado igual ao
+consultas.buscar_lote, e o índice indisponível (rota volta para o SQL)
+quando falta, é inválido, é de outra versão do banco ou o banco está em WAL.
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalogo_teste import PRODUCOES, criar_banco, producao  # noqa: E402
+from conexoes import abrir_conexao_leitura  # noqa: E402
+from consultas import LIMITE_LOTE, ParametroInvalido, buscar_lote  # noqa: E402
+from indice_binario import IndiceBinario, caminho_indice, gerar_indice, versao_banco  # noqa: E402
+
+# Homônimo sem acento, produção sem anos e produção em andamento
+EXTRAS = [
+    producao('Malhação', 1995, None, [('Jose Wilker', None), ('Lima Duarte', 'Diretor')]),
+    producao('Especial', None, None, [('Lima Duarte', None)]),
+]
+
+NOMES = sorted({ator['ator'] for p in PRODUCOES + EXTRAS for ator in p['elenco']})
+
+class TestIndiceBinario(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.db_path = criar_banco(self.diretorio.name, PRODUCOES + EXTRAS)
+        self.indice = IndiceBinario(self.db_path)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def lote_sql(self, nomes):
+        conn = abrir_conexao_leitura(self.db_path)
+        try:
+            return buscar_lote(conn, nomes)
+        finally:
+            conn.close()
+
+    def test_sem_arquivo(self):
+        self.assertFalse(self.indice.disponivel())
+        self.assertIsNone(self.indice.buscar_lote(['Lima Duarte']))
+
+    def test_igual_ao_sql(self):
+        # Jose Wilker e José Wilker têm a mesma chave
+        self.assertEqual(gerar_indice(self.db_path), len(NOMES) - 1)
+        self.assertTrue(self.indice.disponivel())
+
+        nomes = NOMES + ['LIMA DUARTE', 'Xuxa', '', 'jose wilker']
+        lote = self.indice.buscar_lote(nomes)
+        self.assertEqual(lote, self.lote_sql(nomes))
+        self.assertEqual(lote['total'], len(nomes))
+        self.assertEqual(lote['encontrados'], len(NOMES) + 2)
+
+        # Mesma ordem da filmografia: ano_inicio DESC, sem ano por último
+        lima = lote['resultados'][nomes.index('Lima Duarte')]['atores'][0]['producoes']
+        self.assertEqual([p['titulo'] for p in lima], ['Malhação', 'Roque Santeiro', 'O Bem-Amado', 'Especial'])
+        self.assertEqual(
+            [grupo['ator'] for grupo in lote['resultados'][nomes.index('José Wilker')]['atores']],
+            ['Jose Wilker', 'José Wilker']
+        )
+
+    def test_banco_alterado(self):
+        gerar_indice(self.db_path)
+        self.assertTrue(self.indice.disponivel())
+
+        criar_banco(self.diretorio.name, PRODUCOES)
+        self.assertFalse(self.indice.disponivel())
+        self.assertIsNone(self.indice.buscar_lote(['Lima Duarte']))
+
+        gerar_indice(self.db_path)
+        self.assertEqual(self.indice.buscar_lote(NOMES), self.lote_sql(NOMES))
+
+    def test_arquivo_removido_ou_invalido(self):
+        gerar_indice(self.db_path)
+        self.assertTrue(self.indice.disponivel())
+        os.remove(caminho_indice(self.db_path))
+        self.assertFalse(self.indice.disponivel())
+
+        with open(caminho_indice(self.db_path), 'wb') as f:
+            f.write(b'isto nao e um indice')
+        self.assertFalse(self.indice.disponivel())
+
+    def test_banco_em_wal(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.close()
+        self.assertIsNone(versao_banco(self.db_path))
+        with self.assertRaises(RuntimeError):
+            gerar_indice(self.db_path)
+
+    def test_parametros_invalidos(self):
+        gerar_indice(self.db_path)
+        for nomes in ['Lima Duarte', ['Lima Duarte', 1], ['Lima Duarte'] * (LIMITE_LOTE + 1)]:
+            with self.subTest(nomes=str(nomes)[:40]):
+                with self.assertRaises(ParametroInvalido):
+                    self.indice.buscar_lote(nomes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Saída do parser RTF em streaming (parser_rtf.py) contra o parser original
+(benchmarks/bench_parser.extrair_legado) num RTF pequeno com os três
+formatos de bloco, escapes \\'xx, grupos, marcador de fase, aviso e uma
+marca de título seguida de vários espaços.
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+
+from bench_parser import extrair_legado  # noqa: E402
+from parser_rtf import iterar_producoes  # noqa: E402
+
+AMOSTRA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'elencos.rtf')
+
+ELENCOS_ESPERADOS = {
+    'Roque Santeiro': ['Regina Duarte', 'Lima Duarte', 'José Wilker', 'Elá Wilker'],
+    'Pantanal': ['Cristiana Oliveira', 'Marcos Winter'],
+    'Sinhá Moça': ['Lucélia Santos', 'Rubens de Falco', 'Edwin Luisi'],
+    'Tieta': ['Betty Faria', 'Joana Fomm', 'Armando Bogus'],
+    'O Bem-Amado': ['Paulo Gracindo', 'Lima Duarte', 'Emiliano Queiroz'],
+    'Avenida Brasil': ['Murilo Benício', 'Adriana Esteves'],
+}
+
+def extrair_streaming(tamanho_leitura=None):
+    avisos = []
+    argumentos = {'tamanho_leitura': tamanho_leitura} if tamanho_leitura else {}
+    return list(iterar_producoes(AMOSTRA, avisos, **argumentos)), avisos
+
+class TestParserRtf(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.legado = extrair_legado(AMOSTRA)
+        with open(AMOSTRA, 'r', encoding='latin1') as f:
+            cls.tamanho_arquivo = len(f.read())
+
+    def test_saida_esperada(self):
+        producoes, avisos = extrair_streaming()
+        self.assertEqual(
+            {producao['titulo']: [p['ator'] for p in producao['elenco']] for producao in producoes},
+            ELENCOS_ESPERADOS
+        )
+        self.assertEqual([producao['titulo'] for producao in producoes], list(ELENCOS_ESPERADOS))
+        self.assertEqual(avisos, ['⚠️  Gabriela: apenas 1 ator(es)'])
+
+    def test_igual_ao_legado(self):
+        self.assertEqual(extrair_streaming(), self.legado)
+
+    def test_fronteiras_de_leitura(self):
+        # Todo tamanho de pedaço até o arquivo inteiro: alguma fronteira cai
+        # dentro de cada palavra de controle (\b, \par, \'xx) e de cada grupo
+        for tamanho in range(1, self.tamanho_arquivo + 1):
+            with self.subTest(tamanho_leitura=tamanho):
+                self.assertEqual(extrair_streaming(tamanho), self.legado)
+
+if __name__ == '__main__':
+    unittest.main()